@@ -0,0 +1,42 @@
+"""
+Общие утилиты бенчмарков: путь к src/ и синтетические данные.
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+CITIES = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск"]
+SURFACES = ["asphalt", "park", "trail", "embankment"]
+
+
+def synthetic_route_dicts(count: int, seed: int = 1) -> list[dict]:
+    """Словари маршрутов в формате data/routes.json."""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"route-{i}",
+            "city": rng.choice(CITIES),
+            "name": f"Маршрут {i}",
+            "distance_km": round(rng.uniform(1, 50), 1),
+            "surface_type": rng.choice(SURFACES),
+            "description": "Синтетический маршрут для бенчмарка.",
+            "features": ["освещение", "ровный рельеф"],
+            "map_link": None,
+        }
+        for i in range(count)
+    ]
+
+
+def time_per_call(func: Callable[[], object], repeat: int) -> float:
+    """Среднее время одного вызова func, мкс."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1e6
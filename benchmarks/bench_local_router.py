@@ -0,0 +1,82 @@
+"""
+Бенчмарк локального маршрутизатора: сборка графа из выгрузки OSM, размер
+файла, время открытия (mmap) и задержка построения петли по кандидатам
+на 5 / 10 / 21 км. Без --osm строится синтетическая сетка улиц размером с город.
+
+    python benchmarks/bench_local_router.py [--size 400] [--osm city.osm.pbf]
+"""
+
+import argparse
+import resource
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import _common  # noqa: F401  (src/ в sys.path)
+
+from services.local_router import LocalRouter
+from services.loop_generator import generate_candidates
+from tools.build_walk_graph import build_graph, write_synthetic_osm
+
+DISTANCES_KM = (5, 10, 21)
+
+
+def _rss_mb() -> float:
+    # ru_maxrss в Linux — килобайты
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=400, help="сторона синтетической сетки, улиц")
+    parser.add_argument("--osm", type=Path, help="настоящая выгрузка OSM вместо синтетики")
+    parser.add_argument("--city", default="Москва")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.osm
+        if source is None:
+            source = Path(tmp) / "city.osm"
+            write_synthetic_osm(source, args.size, place=args.city)
+        output = Path(tmp) / "city.wgraph"
+
+        started = time.perf_counter()
+        stats = build_graph(source, output)
+        build_s = time.perf_counter() - started
+        print(
+            f"граф: {stats['nodes']} узлов, {stats['edges']} рёбер, "
+            f"{stats['bytes'] / 1e6:.1f} МБ, сборка {build_s:.1f} с"
+        )
+
+        rss_before = _rss_mb()
+        started = time.perf_counter()
+        router = LocalRouter(output)
+        open_ms = (time.perf_counter() - started) * 1000
+        print(f"открытие: {open_ms:.2f} мс, RSS процесса {rss_before:.0f} МБ")
+
+        start = router.geocode(args.city)
+        if start is None:
+            raise SystemExit(f"В графе нет места {args.city!r}")
+        directions = [c.direction for c in generate_candidates()]
+        print(f"{'км':>4} {'p50, мс':>9} {'p95, мс':>9} {'дист., км':>10}")
+        for distance_km in DISTANCES_KM:
+            timings, distances = [], []
+            for direction in directions:
+                started = time.perf_counter()
+                route = router.get_round_route(*start, distance_km, direction)
+                timings.append((time.perf_counter() - started) * 1000)
+                if route:
+                    distances.append(route["summary"]["distance"] / 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(
+                f"{distance_km:4d} {statistics.median(timings):9.1f} {p95:9.1f} "
+                f"{statistics.mean(distances) if distances else 0:10.1f}"
+            )
+        print(f"RSS после поисков: {_rss_mb():.0f} МБ")
+        router.close()
+
+
+if __name__ == "__main__":
+    main()
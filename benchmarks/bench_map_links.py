@@ -0,0 +1,105 @@
+"""
+Бенчмарк ссылок на карту: прежнее прореживание каждой N-й точки с полным
+GeoJSON против упрощения Douglas–Peucker по бюджету точек и округлённых координат.
+Меряет длину URL, время построения и отклонение формы от исходной линии.
+
+    python benchmarks/bench_map_links.py [--points 10000] [--max-points 30]
+"""
+
+import argparse
+import json
+import math
+import random
+from urllib.parse import quote, unquote
+
+from _common import time_per_call
+
+from utils.map_links import build_route_map_link
+
+KM_PER_DEG = 111.0
+
+
+def legacy_map_link(coordinates: list[list[float]], max_points: int = 30) -> str:
+    """build_route_map_link до упрощения с сохранением формы."""
+    if len(coordinates) > max_points:
+        step = len(coordinates) / max_points
+        indices = [min(int(i * step), len(coordinates) - 1) for i in range(max_points)]
+        coordinates = [coordinates[i] for i in indices]
+    geojson = {
+        "type": "Feature",
+        "properties": {},
+        "geometry": {"type": "LineString", "coordinates": coordinates},
+    }
+    return "https://geojson.io/#data=data:application/json," + quote(json.dumps(geojson), safe="")
+
+
+def synthetic_loop(points: int, turns: int = 16, seed: int = 1) -> list[list[float]]:
+    """
+    Круговой маршрут ~10 км по «кварталам»: turns прямых участков с поворотами.
+
+    Число поворотов не зависит от числа точек: ORS на длинной петле даёт
+    более плотную геометрию, а не больше углов.
+    """
+    rng = random.Random(seed)
+    lon, lat = 37.6173, 55.7558
+    heading = 0.0
+    coordinates = []
+    every = max(1, points // turns)
+    for i in range(points):
+        if i % every == 0:
+            heading += rng.choice([-1, 1]) * math.pi / 2 + 2 * math.pi / turns
+        step = 10 / points / KM_PER_DEG
+        lon += step * math.cos(heading) / 0.56 + rng.uniform(-1, 1) * 1e-6
+        lat += step * math.sin(heading) + rng.uniform(-1, 1) * 1e-6
+        coordinates.append([round(lon, 8), round(lat, 8)])
+    return coordinates
+
+
+def _link_coordinates(link: str) -> list[list[float]]:
+    return json.loads(unquote(link.split(",", 1)[1]))["geometry"]["coordinates"]
+
+
+def max_deviation_m(original: list[list[float]], simplified: list[list[float]]) -> float:
+    """Наибольшее расстояние от точки исходной линии до упрощённой ломаной, м."""
+    scale = math.cos(math.radians(original[0][1]))
+
+    def to_xy(p):
+        return p[0] * scale * KM_PER_DEG * 1000, p[1] * KM_PER_DEG * 1000
+
+    segments = [(to_xy(a), to_xy(b)) for a, b in zip(simplified, simplified[1:])]
+    worst = 0.0
+    for point in original[::10]:
+        px, py = to_xy(point)
+        best = math.inf
+        for (ax, ay), (bx, by) in segments:
+            dx, dy = bx - ax, by - ay
+            length2 = dx * dx + dy * dy
+            t = 0.0 if not length2 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length2))
+            best = min(best, math.hypot(px - ax - t * dx, py - ay - t * dy))
+        worst = max(worst, best)
+    return worst
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=10_000)
+    parser.add_argument("--max-points", type=int, default=30)
+    parser.add_argument("--turns", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    line = synthetic_loop(args.points, args.turns)
+    print(f"points: {args.points}, turns: {args.turns}, budget: {args.max_points}")
+    print(f"{'':16} {'URL, симв.':>10} {'мкс':>10} {'откл., м':>10}")
+    for label, build in (
+        ("every N-th", lambda: legacy_map_link(line, args.max_points)),
+        ("douglas-peucker", lambda: build_route_map_link(line, args.max_points)),
+    ):
+        link = build()
+        elapsed = time_per_call(build, args.repeat)
+        deviation = max_deviation_m(line, _link_coordinates(link))
+        print(f"{label:16} {len(link):10d} {elapsed:10.0f} {deviation:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
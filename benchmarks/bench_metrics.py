@@ -0,0 +1,57 @@
+"""
+Бенчмарк накладных расходов метрик на горячем пути: обработчик без работы
+с @timed_handler и без, запись в гистограмму и счётчик, сборка /metrics.
+
+    python benchmarks/bench_metrics.py [--repeat 200000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from _common import time_per_call
+
+from services.metrics import HANDLER_SECONDS, REGISTRY, SEARCHES, timed_handler, track_cache
+from services.route_cache import RouteCache
+
+
+async def bare_handler() -> int:
+    return 1
+
+
+async def _await_many(handler, repeat: int) -> float:
+    """Среднее время await handler(), мкс."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await handler()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200_000)
+    args = parser.parse_args()
+
+    timed = timed_handler(bare_handler)
+    loop = asyncio.new_event_loop()
+    bare_us = loop.run_until_complete(_await_many(bare_handler, args.repeat))
+    timed_us = loop.run_until_complete(_await_many(timed, args.repeat))
+    loop.close()
+
+    child = HANDLER_SECONDS.labels("bench")
+    observe_us = time_per_call(lambda: child.observe(0.042), args.repeat)
+    inc_us = time_per_call(lambda: SEARCHES.labels("json").inc(), args.repeat)
+    track_cache("bench", RouteCache())
+    render_us = time_per_call(REGISTRY.render, 1000)
+
+    print(f"{'операция':<36} {'мкс':>8}")
+    print(f"{'await обработчика без метрик':<36} {bare_us:>8.3f}")
+    print(f"{'await обработчика с @timed_handler':<36} {timed_us:>8.3f}")
+    print(f"{'  накладные расходы':<36} {timed_us - bare_us:>8.3f}")
+    print(f"{'Histogram.observe':<36} {observe_us:>8.3f}")
+    print(f"{'Counter.labels(...).inc':<36} {inc_us:>8.3f}")
+    print(f"{'сборка /metrics':<36} {render_us:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Бенчмарк поиска по JSON-каталогу: линейный перебор против RouteIndex.
+
+    python benchmarks/bench_route_index.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import random
+import time
+
+from _common import CITIES, SURFACES, synthetic_route_dicts, time_per_call
+
+from models.route import Route
+from services.route_index import RouteIndex
+
+
+def linear_search(routes, city, surface_type, distance_km, tolerance_km):
+    """Прежний алгоритм RouteService.search: фильтр + сортировка."""
+    filtered = [
+        r
+        for r in routes
+        if r.city == city
+        and r.surface_type == surface_type
+        and distance_km - tolerance_km <= r.distance_km <= distance_km + tolerance_km
+    ]
+    filtered.sort(key=lambda r: abs(r.distance_km - distance_km))
+    return filtered
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5, help="limit для запроса к индексу")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    print(f"{'routes':>10} {'build, s':>10} {'linear, us':>12} {'index all, us':>14} "
+          f"{'index k, us':>12} {'speedup k':>10}")
+    for size in args.sizes:
+        routes = [Route.from_dict(d) for d in synthetic_route_dicts(size)]
+        started = time.perf_counter()
+        index = RouteIndex(routes)
+        build_s = time.perf_counter() - started
+
+        queries = [
+            (rng.choice(CITIES), rng.choice(SURFACES), rng.uniform(1, 50))
+            for _ in range(args.queries)
+        ]
+        q = iter(queries * 1000)
+        linear_repeat = max(1, min(args.queries, 20_000_000 // size))
+        linear_us = time_per_call(lambda: linear_search(routes, *next(q), 2.0), linear_repeat)
+        all_us = time_per_call(lambda: index.query(*next(q), 2.0), args.queries)
+        k_us = time_per_call(lambda: index.query(*next(q), 2.0, args.k), args.queries)
+        print(f"{size:>10} {build_s:>10.2f} {linear_us:>12.1f} {all_us:>14.1f} "
+              f"{k_us:>12.1f} {linear_us / k_us:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Бенчмарк памяти каталога: байт на маршрут для прежнего @dataclass Route
+(__dict__, list features, неинтернированные строки) и текущего slotted Route.
+
+    python benchmarks/bench_route_memory.py [--count 200000]
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+from _common import synthetic_route_dicts
+
+from models.route import Route
+
+
+@dataclass
+class LegacyRoute:
+    """Route до перехода на slots — для сравнения."""
+
+    id: str
+    city: str
+    name: str
+    distance_km: float
+    surface_type: str
+    description: str
+    features: list[str]
+    map_link: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LegacyRoute":
+        return cls(
+            id=data["id"],
+            city=data["city"],
+            name=data["name"],
+            distance_km=float(data["distance_km"]),
+            surface_type=data["surface_type"],
+            description=data["description"],
+            features=data.get("features", []),
+            map_link=data.get("map_link"),
+        )
+
+
+def bytes_per_route(cls, raw: str, count: int) -> float:
+    """Память на маршрут после разбора JSON (как при загрузке каталога)."""
+    gc.collect()
+    tracemalloc.start()
+    routes = [cls.from_dict(item) for item in json.loads(raw)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del routes
+    return current / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=200_000)
+    args = parser.parse_args()
+
+    raw = json.dumps(synthetic_route_dicts(args.count), ensure_ascii=False)
+    legacy = bytes_per_route(LegacyRoute, raw, args.count)
+    current = bytes_per_route(Route, raw, args.count)
+    print(f"routes:          {args.count}")
+    print(f"legacy dataclass {legacy:8.0f} B/route")
+    print(f"slotted Route    {current:8.0f} B/route  ({(1 - current / legacy) * 100:.0f}% меньше)")
+
+
+if __name__ == "__main__":
+    main()
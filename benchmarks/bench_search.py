@@ -0,0 +1,282 @@
+"""
+Бенчмарк пути поиска: RouteService.search / search_async против локальной
+заглушки ORS (tools/ors_stub.py) с задержкой, разбросом и долей ответов 429,
+и поиск по JSON-каталогу без ORS. N одновременных пользователей делают по M
+поисков со случайными (город, дистанция, поверхность); повторы запросов
+попадают в кэши, как в жизни.
+
+Печатает p50/p95/p99 задержки поиска, пропускную способность и число
+запросов к ORS на поиск; с --api stream (search_stream, как в обработчике
+бота) — ещё p50/p95 времени до первого показанного маршрута. С --check сравнивает результат с сохранённым
+базовым (benchmarks/baselines/bench_search.json) и завершается с кодом 1
+при регрессии; --update-baseline перезаписывает базовый результат.
+
+    python benchmarks/bench_search.py [--users 8] [--searches 25] [--latency 0.05]
+    python benchmarks/bench_search.py --recordings data/ors_recordings.json --check
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import _common  # noqa: F401 — путь к src/
+
+from services.rate_limiter import RateLimiter
+from services.route_service import CITIES, SURFACE_TYPES, RouteService
+from tools.ors_stub import Recordings, start_ors_stub
+
+BASELINE_FILE = Path(__file__).resolve().parent / "baselines" / "bench_search.json"
+
+# Допустимое ухудшение относительно базового результата
+DEFAULT_TOLERANCE = 0.25
+
+# Квота, которая в бенчмарке не ограничивает: отказы даёт только 429 заглушки
+UNLIMITED = 10**9
+
+# Проверяемые показатели сценария -> True, если больше — лучше. p50 поиска с ORS
+# лежит на границе попаданий в кэш и сетевых запросов и слишком шумный, как и
+# пропускная способность JSON-поиска (сотни тысяч в секунду)
+CHECKED_METRICS = {
+    "ors": {"p95_ms": False, "throughput_rps": True, "ors_calls_per_search": False},
+    "json": {"p50_ms": False, "p95_ms": False},
+}
+
+# Абсолютный запас сверх допуска — чтобы околонулевые показатели не «регрессировали» от шума
+SLACK = {"p50_ms": 0.05, "p95_ms": 0.05, "ors_calls_per_search": 0.05}
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Перцентиль q (0..100) по отсортированному списку (ближайший ранг)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def make_queries(users: int, searches: int, seed: int) -> list[list[tuple[str, float, str]]]:
+    """Для каждого пользователя — список поисков (город, дистанция, поверхность)."""
+    rng = random.Random(seed)
+    surfaces = list(SURFACE_TYPES)
+    return [
+        [
+            (rng.choice(CITIES), float(rng.randint(3, 21)), rng.choice(surfaces))
+            for _ in range(searches)
+        ]
+        for _ in range(users)
+    ]
+
+
+def make_service(base_url: Optional[str], cache_dir: Path) -> RouteService:
+    """RouteService без предрасчитанной базы; base_url=None — только JSON-каталог."""
+    return RouteService(
+        ors_api_key="bench-key" if base_url else None,
+        ors_base_url=base_url or "",
+        cache_dir=cache_dir,
+        geocode_limiter=RateLimiter("geocode", UNLIMITED, UNLIMITED),
+        directions_limiter=RateLimiter("directions", UNLIMITED, UNLIMITED),
+    )
+
+
+async def run_async(
+    service: RouteService, queries: list[list[tuple]], first_results: Optional[list[float]] = None
+) -> tuple[list[float], int]:
+    """
+    Пользователи — задачи asyncio, поиск — search_async.
+
+    С first_results поиск идёт через search_stream (как в обработчике бота),
+    а в first_results пишется время до первого списка маршрутов.
+    """
+    latencies: list[float] = []
+    failures = 0
+
+    async def search(city: str, distance_km: float, surface_type: str, started: float) -> None:
+        if first_results is None:
+            await service.search_async(city, distance_km, surface_type)
+            return
+        first = None
+        async for _ in service.search_stream(city, distance_km, surface_type):
+            if first is None:
+                first = time.perf_counter() - started
+                first_results.append(first)
+
+    async def user(user_queries: list[tuple]) -> None:
+        nonlocal failures
+        for city, distance_km, surface_type in user_queries:
+            started = time.perf_counter()
+            try:
+                await search(city, distance_km, surface_type, started)
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(user(q) for q in queries))
+    return latencies, failures
+
+
+def run_sync(service: RouteService, queries: list[list[tuple]]) -> tuple[list[float], int]:
+    """Пользователи — потоки, поиск — синхронный RouteService.search."""
+    latencies: list[float] = []
+    failures = 0
+
+    def user(user_queries: list[tuple]) -> None:
+        nonlocal failures
+        for city, distance_km, surface_type in user_queries:
+            started = time.perf_counter()
+            try:
+                service.search(city, distance_km, surface_type)
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+        list(pool.map(user, queries))
+    return latencies, failures
+
+
+async def run_scenario(name: str, args: argparse.Namespace) -> dict:
+    queries = make_queries(args.users, args.searches, args.seed)
+    stub = None
+    if name == "ors":
+        stub = start_ors_stub(
+            latency=args.latency,
+            jitter=args.jitter,
+            rate_limit_ratio=args.rate_limit_ratio,
+            recordings=Recordings(args.recordings) if args.recordings else None,
+            seed=args.seed,
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = make_service(stub.base_url if stub else None, Path(tmp))
+        await service.start()
+        # Прогрев каталога и геокодинга при старте — не часть поиска
+        await service.wait_warm()
+        if stub:
+            stub.reset_counters()
+
+        first_results: Optional[list[float]] = [] if args.api == "stream" else None
+        started = time.perf_counter()
+        if args.api == "sync":
+            latencies, failures = await asyncio.to_thread(run_sync, service, queries)
+        else:
+            latencies, failures = await run_async(service, queries, first_results)
+        elapsed = time.perf_counter() - started
+        await service.aclose()
+
+    if stub:
+        stub.close()
+    latencies.sort()
+    total = len(latencies)
+    result = {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "throughput_rps": round(total / elapsed, 1),
+        "ors_calls_per_search": round(sum(stub.calls.values()) / total, 2) if stub else 0.0,
+        "ors_429": stub.rate_limited if stub else 0,
+        "failures": failures,
+    }
+    if first_results is not None:
+        first_results.sort()
+        result["first_p50_ms"] = round(percentile(first_results, 50) * 1000, 3)
+        result["first_p95_ms"] = round(percentile(first_results, 95) * 1000, 3)
+    if stub and stub.recordings is not None:
+        result["replayed"] = stub.recordings.hits
+    return result
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Показатели, ухудшившиеся больше чем на tolerance относительно baseline."""
+    regressions = []
+    for scenario, base in baseline.get("results", {}).items():
+        current = results.get(scenario)
+        if current is None:
+            continue
+        for metric, higher_is_better in CHECKED_METRICS.get(scenario, {}).items():
+            if metric not in base:
+                continue
+            was, now = base[metric], current[metric]
+            if higher_is_better:
+                worse = now < was * (1 - tolerance)
+            else:
+                worse = now > was * (1 + tolerance) + SLACK.get(metric, 0.0)
+            if worse:
+                regressions.append(f"{scenario}.{metric}: {was} -> {now}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scenarios", nargs="+", default=["ors", "json"], choices=["ors", "json"])
+    parser.add_argument("--api", choices=["async", "sync", "stream"], default="async")
+    parser.add_argument("--users", type=int, default=8, help="одновременных пользователей")
+    parser.add_argument("--searches", type=int, default=25, help="поисков на пользователя")
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка ответа ORS, сек")
+    parser.add_argument("--jitter", type=float, default=0.02, help="разброс задержки ORS, сек")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument("--recordings", type=Path, help="записанные ответы ORS (tools/ors_stub.py)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--check", action="store_true", help="код 1 при регрессии к базовому")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    # Логи поиска (ORS 429, fallback) не нужны в выводе бенчмарка
+    logging.disable(logging.ERROR)
+
+    params = {
+        key: getattr(args, key)
+        for key in ("api", "users", "searches", "latency", "jitter", "rate_limit_ratio", "seed")
+    }
+    results = {name: asyncio.run(run_scenario(name, args)) for name in args.scenarios}
+
+    print(f"{args.users} пользователей × {args.searches} поисков, api={args.api}")
+    columns = [
+        "p50_ms", "p95_ms", "p99_ms", "throughput_rps", "ors_calls_per_search", "ors_429", "failures"
+    ]
+    print(f"{'сценарий':<10}" + "".join(f"{c:>{len(c) + 2}}" for c in columns))
+    for name, result in results.items():
+        print(f"{name:<10}" + "".join(f"{result[c]:>{len(c) + 2}}" for c in columns))
+    for name, result in results.items():
+        if "first_p50_ms" in result:
+            print(
+                f"{name}: первый маршрут p50 {result['first_p50_ms']} мс, "
+                f"p95 {result['first_p95_ms']} мс (весь поиск {result['p50_ms']} / {result['p95_ms']} мс)"
+            )
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps({"params": params, "results": results}, indent=2, ensure_ascii=False) + "\n",
+            encoding="utf-8",
+        )
+        print(f"Базовый результат записан: {args.baseline}")
+        return
+
+    if args.check:
+        if not args.baseline.exists():
+            sys.exit(f"Нет базового результата {args.baseline} (запустите с --update-baseline)")
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("params") != params:
+            sys.exit(f"Параметры прогона не совпадают с базовыми: {baseline.get('params')}")
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print("Регрессия относительно базового результата:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"Регрессий нет (допуск {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Бенчмарк поиска «рядом со мной»: перебор с сортировкой по расстоянию против
+SpatialIndex (сетка ячеек + окно дистанции) на 10k / 100k / 1M маршрутов.
+Старты маршрутов разбросаны вокруг центров нескольких городов (σ ≈ 8 км),
+точки запросов — там же; печатаются среднее и p99 одного k-NN запроса.
+
+    python benchmarks/bench_spatial_index.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import random
+import time
+
+from _common import SURFACES, time_per_call
+
+from models.route import Route
+from services.spatial_index import SpatialIndex
+from services.walk_graph import haversine_m
+
+CENTERS = [(37.6173, 55.7558), (30.3159, 59.9391), (49.1064, 55.7963), (82.9204, 55.0302)]
+SPREAD_DEG = 0.07
+
+
+def synthetic_routes(count: int, seed: int = 1) -> list[Route]:
+    """Маршруты со стартами вокруг CENTERS."""
+    rng = random.Random(seed)
+    routes = []
+    for i in range(count):
+        lon, lat = rng.choice(CENTERS)
+        routes.append(
+            Route(
+                id=f"route-{i}",
+                city="Город",
+                name=f"Маршрут {i}",
+                distance_km=round(rng.uniform(1, 50), 1),
+                surface_type=rng.choice(SURFACES),
+                description="",
+                features=(),
+                start=(lon + rng.gauss(0, SPREAD_DEG * 1.8), lat + rng.gauss(0, SPREAD_DEG)),
+            )
+        )
+    return routes
+
+
+def linear_nearest(routes, lon, lat, surface_type, distance_km, tolerance_km, limit):
+    """Перебор: фильтр по поверхности и дистанции, сортировка по расстоянию."""
+    found = [
+        (haversine_m(lon, lat, *r.start) / 1000, r)
+        for r in routes
+        if r.surface_type == surface_type and abs(r.distance_km - distance_km) <= tolerance_km
+    ]
+    found.sort(key=lambda item: item[0])
+    return found[:limit]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    print(f"{'routes':>10} {'build, s':>10} {'linear, us':>12} {'index, us':>10} "
+          f"{'p99, us':>9} {'speedup':>8}")
+    for size in args.sizes:
+        routes = synthetic_routes(size)
+        started = time.perf_counter()
+        index = SpatialIndex(routes)
+        build_s = time.perf_counter() - started
+
+        queries = []
+        for _ in range(args.queries):
+            lon, lat = rng.choice(CENTERS)
+            queries.append((
+                lon + rng.gauss(0, SPREAD_DEG * 1.8),
+                lat + rng.gauss(0, SPREAD_DEG),
+                rng.choice(SURFACES),
+                rng.uniform(1, 50),
+            ))
+
+        q = iter(queries * 1000)
+        linear_repeat = max(1, min(args.queries, 2_000_000 // size))
+        linear_us = time_per_call(
+            lambda: linear_nearest(routes, *next(q), 2.0, args.k), linear_repeat
+        )
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            index.nearest(*query, 2.0, args.k)
+            timings.append((time.perf_counter() - started) * 1e6)
+        timings.sort()
+        mean_us = sum(timings) / len(timings)
+        p99_us = timings[int(len(timings) * 0.99)]
+        print(f"{size:>10} {build_s:>10.2f} {linear_us:>12.1f} {mean_us:>10.1f} "
+              f"{p99_us:>9.1f} {linear_us / mean_us:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Бенчмарк старта бота: время импорта src/main.py и время до первого ответа.
+
+Импорт: python -X importtime -c "import main" (медиана по --repeat запускам)
+и самые тяжёлые прямые импорты main с накопленным временем.
+
+Первый ответ: src/main.py запускается отдельным процессом в режиме polling
+против заглушки Bot API (tools/fake_telegram.py), в очереди getUpdates уже
+лежит /find. Печатается время от запуска процесса до ответа на /find и до
+результатов первого поиска (город -> дистанция -> поверхность). Каталог и
+кэши прогреваются в фоне после старта, поэтому первый ответ их не ждёт;
+с --ors-stub прогрев геокодинга идёт через заглушку ORS с задержкой.
+
+    python benchmarks/bench_startup.py [--repeat 5] [--runs 3] [--ors-stub]
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from _common import SRC_DIR
+
+from bench_webhook import BOT_TOKEN, ConversationDriver, bot_environment
+from tools.fake_telegram import start_fake_telegram
+from tools.ors_stub import start_ors_stub
+
+ROOT_DIR = SRC_DIR.parent
+
+# Прямых импортов main в отчёте
+TOP_IMPORTS = 8
+
+
+def parse_importtime(stderr: str) -> list[tuple[int, str, float]]:
+    """Строки -X importtime: (уровень вложенности, модуль, накопленное время, мс)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((level, name.strip(), int(cumulative) / 1000))
+    return rows
+
+
+def measure_imports(repeat: int) -> tuple[float, list[tuple[str, float]]]:
+    """Медиана времени импорта main и его самые тяжёлые прямые импорты (последний запуск)."""
+    totals = []
+    children: list[tuple[str, float]] = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import main"],
+            cwd=SRC_DIR,
+            env={**os.environ, "BOT_TOKEN": BOT_TOKEN},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        rows = parse_importtime(result.stderr)
+        totals.append(next(ms for level, name, ms in rows if level == 0 and name == "main"))
+        children = [(name, ms) for level, name, ms in rows if level == 1]
+    children.sort(key=lambda item: item[1], reverse=True)
+    return statistics.median(totals), children[:TOP_IMPORTS]
+
+
+async def first_reply(env: dict, fake, log_path: Path, timeout: float) -> Optional[dict]:
+    """Один холодный запуск бота: мс до ответа на /find и до результатов поиска."""
+    driver = ConversationDriver(_push(fake), timeout=timeout)
+    fake.on_reply = driver.on_reply
+    with open(log_path, "wb") as log:
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, str(SRC_DIR / "main.py")],
+            cwd=ROOT_DIR,
+            env={**os.environ, **env},
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    try:
+        await driver.conversation()
+    finally:
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    if driver.timeouts or len(driver.replied_at) < 4:
+        return None
+    return {
+        "first_reply_ms": (driver.replied_at[0] - started) * 1000,
+        "first_search_ms": (driver.replied_at[-1] - started) * 1000,
+        "search_step_ms": driver.latencies[-1] * 1000,
+    }
+
+
+def _push(fake):
+    async def send(update: dict) -> None:
+        fake.push_update(update)
+
+    return send
+
+
+async def measure_first_reply(args: argparse.Namespace) -> list[dict]:
+    fake = start_fake_telegram()
+    ors = start_ors_stub(latency=args.ors_latency) if args.ors_stub else None
+    results = []
+    try:
+        for _ in range(args.runs):
+            # Каждый запуск — с пустыми кэшами, как первый старт реплики
+            with tempfile.TemporaryDirectory() as tmp:
+                env = bot_environment(fake.base_url, 0, Path(tmp), ors.base_url if ors else None)
+                env["WEBHOOK_URL"] = ""
+                log_path = Path(tmp) / "bot.log"
+                result = await first_reply(env, fake, log_path, args.timeout)
+                if result is None:
+                    tail = log_path.read_text(encoding="utf-8", errors="replace").splitlines()[-5:]
+                    sys.exit("Бот не ответил:\n  " + "\n  ".join(tail))
+                results.append(result)
+    finally:
+        fake.close()
+        if ors is not None:
+            ors.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="запусков -X importtime")
+    parser.add_argument("--runs", type=int, default=3, help="холодных запусков бота")
+    parser.add_argument("--timeout", type=float, default=30.0, help="ожидание ответа бота, сек")
+    parser.add_argument("--ors-stub", action="store_true", help="поиск и прогрев через заглушку ORS")
+    parser.add_argument("--ors-latency", type=float, default=0.05, help="задержка заглушки ORS, сек")
+    args = parser.parse_args()
+
+    total, children = measure_imports(args.repeat)
+    print(f"import main: {total:.1f} мс (медиана из {args.repeat})")
+    for name, ms in children:
+        print(f"  {name:<28} {ms:8.1f} мс")
+
+    results = asyncio.run(measure_first_reply(args))
+    print(f"Холодный старт бота (медиана из {args.runs}):")
+    for key, label in (
+        ("first_reply_ms", "запуск -> ответ на /find"),
+        ("first_search_ms", "запуск -> результаты поиска"),
+        ("search_step_ms", "шаг поиска (выбор поверхности)"),
+    ):
+        print(f"  {label:<32} {statistics.median(r[key] for r in results):8.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Бенчмарк анализа surface: прежний двухпроходный цикл с dict-поиском на сегмент
+против одного прохода с группировкой по ID (services/surface_analysis.py).
+
+    python benchmarks/bench_surface_analysis.py [--routes 12] [--segments 3000]
+"""
+
+import argparse
+import random
+
+from _common import time_per_call
+
+from services.surface_analysis import ORS_SURFACE_ID_TO_PRODUCT, surface_shares
+
+SURFACE_IDS = list(ORS_SURFACE_ID_TO_PRODUCT)
+
+
+def legacy_parse_surface(route: dict) -> dict[str, float]:
+    """parse_surface_from_route до векторизации."""
+    values = route.get("extras", {}).get("surface", {}).get("values", [])
+    if not values:
+        return {"asphalt": 1.0}
+    total_length = 0
+    product_lengths: dict[str, float] = {}
+    for seg in values:
+        if len(seg) >= 2:
+            total_length += seg[1] - seg[0]
+    if total_length <= 0:
+        return {"asphalt": 1.0}
+    for seg in values:
+        if len(seg) < 3:
+            continue
+        start, end, surface_id = seg[0], seg[1], seg[2]
+        product = ORS_SURFACE_ID_TO_PRODUCT.get(
+            surface_id if isinstance(surface_id, int) else 0, "asphalt"
+        )
+        product_lengths[product] = product_lengths.get(product, 0) + end - start
+    return {k: v / total_length for k, v in product_lengths.items()}
+
+
+def synthetic_routes(count: int, segments: int, seed: int = 1) -> list[dict]:
+    rng = random.Random(seed)
+    routes = []
+    for _ in range(count):
+        values, position = [], 0
+        for _ in range(segments):
+            step = rng.randint(1, 30)
+            values.append([position, position + step, rng.choice(SURFACE_IDS)])
+            position += step
+        routes.append({"extras": {"surface": {"values": values}}})
+    return routes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--routes", type=int, default=12, help="кандидатов в пачке")
+    parser.add_argument("--segments", type=int, default=3000, help="сегментов на маршрут")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    routes = synthetic_routes(args.routes, args.segments)
+    legacy = time_per_call(lambda: [legacy_parse_surface(r) for r in routes], args.repeat)
+    print(f"routes × segments: {args.routes} × {args.segments}")
+    print(f"legacy loop      {legacy:10.0f} µs/batch")
+    batch = time_per_call(lambda: surface_shares(routes), args.repeat)
+    print(f"one pass         {batch:10.0f} µs/batch  (x{legacy / batch:.1f})")
+
+
+if __name__ == "__main__":
+    main()
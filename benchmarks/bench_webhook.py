@@ -0,0 +1,345 @@
+"""
+Нагрузочный прогон бота в режиме webhook против заглушки Telegram Bot API.
+
+Бот запускается из src/main.py отдельным процессом (PORT, WEBHOOK_URL,
+TELEGRAM_API_URL -> tools/fake_telegram.py) и получает в /webhook диалоги
+/find: сообщение /find, выбор города, дистанция текстом, выбор поверхности.
+Следующий шаг диалога отправляется после ответа бота на предыдущий, новые
+диалоги начинаются с заданной частотой апдейтов. Задержка апдейта — от POST
+в webhook до sendMessage/editMessageText в заглушке.
+
+Частота ступенчато растёт (--rates); ступень устойчива, если нет таймаутов,
+p95 не выше --slo-ms и достигнуто не меньше 90% целевой частоты. Печатается
+максимальная устойчивая частота. Всё работает офлайн: маршруты — из JSON
+каталога или из заглушки ORS (--ors-stub).
+
+Webhook-сервер PTB требует tornado (pip install "python-telegram-bot[webhooks]").
+С --in-process апдейты кладутся прямо в update_queue Application того же
+процесса — без HTTP-входа, но с той же обработкой и тем же Bot API.
+
+    python benchmarks/bench_webhook.py [--rates 10 25 50 100 200] [--duration 10]
+    python benchmarks/bench_webhook.py --in-process --ors-stub --ors-latency 0.1
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from _common import SRC_DIR
+
+from tools.fake_telegram import start_fake_telegram
+from tools.ors_stub import start_ors_stub
+
+ROOT_DIR = SRC_DIR.parent
+BOT_TOKEN = "123456:LOAD-TEST"
+CITIES = ["Москва", "Санкт-Петербург"]
+SURFACES = ["asphalt", "park", "trail", "embankment"]
+
+# Апдейтов в одном диалоге /find
+STEPS_PER_CONVERSATION = 4
+
+# Доля целевой частоты, которую ступень должна выдержать
+MIN_ACHIEVED_RATIO = 0.9
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ConversationDriver:
+    """
+    Диалоги /find от имени пользователей: апдейт -> ожидание ответа бота.
+
+    on_reply подключается к заглушке Bot API и вызывается из её потоков.
+    """
+
+    def __init__(self, send: Callable[[dict], Awaitable[None]], timeout: float, seed: int = 1):
+        self.send = send
+        self.timeout = timeout
+        self.loop = asyncio.get_running_loop()
+        self.rng = random.Random(seed)
+        self._waiters: dict[int, asyncio.Future] = {}
+        self._update_ids = itertools.count(1)
+        self._chat_ids = itertools.count(10_000_000)
+        self.latencies: list[float] = []
+        self.replied_at: list[float] = []
+        self.timeouts = 0
+
+    def on_reply(self, chat_id: int, method: str, message: dict, at: float) -> None:
+        self.loop.call_soon_threadsafe(self._resolve, chat_id, message, at)
+
+    def _resolve(self, chat_id: int, message: dict, at: float) -> None:
+        waiter = self._waiters.pop(chat_id, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result((message, at))
+
+    async def _step(self, chat_id: int, update: dict) -> Optional[dict]:
+        """Отправить апдейт и дождаться ответа бота в этот чат (None — таймаут)."""
+        waiter = self.loop.create_future()
+        self._waiters[chat_id] = waiter
+        update["update_id"] = next(self._update_ids)
+        started = time.perf_counter()
+        await self.send(update)
+        try:
+            message, replied_at = await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            self._waiters.pop(chat_id, None)
+            self.timeouts += 1
+            return None
+        self.latencies.append(replied_at - started)
+        self.replied_at.append(replied_at)
+        return message
+
+    @staticmethod
+    def _user(chat_id: int) -> dict:
+        return {"id": chat_id, "is_bot": False, "first_name": "Load", "language_code": "ru"}
+
+    def _message(self, chat_id: int, text: str) -> dict:
+        message = {
+            "message_id": self.rng.randrange(1, 10**6),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": self._user(chat_id),
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+        return {"message": message}
+
+    def _callback(self, chat_id: int, data: str, bot_message: dict) -> dict:
+        return {
+            "callback_query": {
+                "id": str(self.rng.randrange(10**12)),
+                "from": self._user(chat_id),
+                "chat_instance": str(chat_id),
+                "data": data,
+                "message": bot_message,
+            }
+        }
+
+    async def conversation(self) -> None:
+        """Один диалог /find -> город -> дистанция -> поверхность."""
+        chat_id = next(self._chat_ids)
+        city = self.rng.choice(CITIES)
+        distance = self.rng.randint(3, 21)
+        surface = self.rng.choice(SURFACES)
+
+        reply = await self._step(chat_id, self._message(chat_id, "/find"))
+        if reply is None:
+            return
+        reply = await self._step(chat_id, self._callback(chat_id, f"city:{city}", reply))
+        if reply is None:
+            return
+        reply = await self._step(chat_id, self._message(chat_id, str(distance)))
+        if reply is None:
+            return
+        await self._step(chat_id, self._callback(chat_id, f"surface:{surface}", reply))
+
+
+async def run_level(driver: ConversationDriver, rate: float, duration: float) -> dict:
+    """Ступень нагрузки: новые диалоги с частотой rate / STEPS_PER_CONVERSATION в секунду."""
+    driver.latencies, driver.replied_at, driver.timeouts = [], [], 0
+    interval = STEPS_PER_CONVERSATION / rate
+    tasks = []
+    started = time.perf_counter()
+    next_start = started
+    while next_start - started < duration:
+        tasks.append(asyncio.create_task(driver.conversation()))
+        next_start += interval
+        await asyncio.sleep(max(0.0, next_start - time.perf_counter()))
+    await asyncio.gather(*tasks)
+
+    latencies = sorted(driver.latencies)
+    # Пропускная способность — ответы внутри окна нагрузки, без хвоста диалогов после него
+    achieved = sum(1 for at in driver.replied_at if at <= started + duration) / duration
+    return {
+        "rate": rate,
+        "achieved": achieved,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "timeouts": driver.timeouts,
+    }
+
+
+def bot_environment(fake_api_url: str, port: int, cache_dir: Path, ors_url: Optional[str]) -> dict:
+    """Окружение бота: заглушки вместо Telegram и ORS, без Redis и внешних кэшей."""
+    return {
+        "BOT_TOKEN": BOT_TOKEN,
+        "TELEGRAM_API_URL": fake_api_url,
+        "PORT": str(port),
+        "WEBHOOK_URL": f"http://127.0.0.1:{port}",
+        "OPENROUTESERVICE_API_KEY": "load-test" if ors_url else "",
+        "ORS_BASE_URL": ors_url or "",
+        "CACHE_DIR": str(cache_dir),
+        "ROUTES_DB_FILE": str(cache_dir / "precomputed_routes.sqlite3"),
+        "REDIS_HOST": "",
+        "METRICS_PORT": "0",
+        # Квоты ORS не должны ограничивать прогон: отказы дала бы заглушка
+        "ORS_DIRECTIONS_PER_MINUTE": "1000000",
+        "ORS_DIRECTIONS_PER_DAY": "1000000000",
+        "ORS_GEOCODE_PER_MINUTE": "1000000",
+        "ORS_GEOCODE_PER_DAY": "1000000000",
+    }
+
+
+async def run_webhook_levels(args, env: dict, fake, port: int, log_path: Path, driver_factory):
+    """Бот — процесс src/main.py в режиме webhook."""
+    with open(log_path, "wb") as log:
+        proc = subprocess.Popen(
+            [sys.executable, str(SRC_DIR / "main.py")],
+            cwd=ROOT_DIR,
+            env={**os.environ, **env},
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    try:
+        deadline = time.monotonic() + args.startup_timeout
+        while fake.calls["setWebhook"] == 0:
+            if proc.poll() is not None or time.monotonic() > deadline:
+                tail = log_path.read_text(encoding="utf-8", errors="replace").splitlines()[-5:]
+                sys.exit(
+                    "Бот не запустился в режиме webhook:\n  " + "\n  ".join(tail) + "\n"
+                    "Webhook-серверу PTB нужен tornado: "
+                    "pip install \"python-telegram-bot[webhooks]\" (или --in-process)"
+                )
+            await asyncio.sleep(0.1)
+
+        webhook_url = f"http://127.0.0.1:{port}/webhook"
+        limits = httpx.Limits(max_connections=args.connections)
+        async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+
+            async def send(update: dict) -> None:
+                resp = await client.post(webhook_url, json=update)
+                resp.raise_for_status()
+
+            return await run_levels(args, driver_factory(send))
+    finally:
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+async def run_in_process_levels(args, env: dict, driver_factory):
+    """Application собирается как в main.py, апдейты — сразу в update_queue."""
+    os.environ.update(env)
+    import main as bot_main  # noqa: E402 — импорт main не читает .env, окружение задано выше
+    from telegram import Update
+
+    logging.getLogger().setLevel(logging.WARNING)
+    application = bot_main.build_application(bot_main.Settings())
+    await application.initialize()
+    await application.post_init(application)
+    await application.start()
+    try:
+
+        async def send(update: dict) -> None:
+            await application.update_queue.put(Update.de_json(update, application.bot))
+
+        return await run_levels(args, driver_factory(send))
+    finally:
+        await application.stop()
+        await application.post_shutdown(application)
+        await application.shutdown()
+
+
+async def run_levels(args, driver: ConversationDriver) -> list[dict]:
+    results = []
+    print(f"{'апд/с':>8} {'факт':>8} {'p50 мс':>9} {'p95 мс':>9} {'p99 мс':>9} {'таймауты':>9}")
+    for rate in args.rates:
+        result = await run_level(driver, rate, args.duration)
+        result["sustained"] = (
+            result["timeouts"] == 0
+            and result["p95_ms"] <= args.slo_ms
+            and result["achieved"] >= rate * MIN_ACHIEVED_RATIO
+        )
+        results.append(result)
+        print(
+            f"{rate:>8.0f} {result['achieved']:>8.1f} {result['p50_ms']:>9.1f} "
+            f"{result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['timeouts']:>9}"
+        )
+        if not result["sustained"]:
+            break
+    return results
+
+
+async def run(args: argparse.Namespace) -> None:
+    driver: Optional[ConversationDriver] = None
+
+    def on_reply(chat_id: int, method: str, message: dict, at: float) -> None:
+        if driver is not None:
+            driver.on_reply(chat_id, method, message, at)
+
+    def driver_factory(send) -> ConversationDriver:
+        nonlocal driver
+        driver = ConversationDriver(send, timeout=args.timeout, seed=args.seed)
+        return driver
+
+    fake = start_fake_telegram(on_reply=on_reply)
+    ors = start_ors_stub(latency=args.ors_latency) if args.ors_stub else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            port = free_port()
+            env = bot_environment(fake.base_url, port, Path(tmp), ors.base_url if ors else None)
+            if args.in_process:
+                results = await run_in_process_levels(args, env, driver_factory)
+            else:
+                log_path = Path(tmp) / "bot.log"
+                results = await run_webhook_levels(args, env, fake, port, log_path, driver_factory)
+    finally:
+        fake.close()
+        if ors is not None:
+            ors.close()
+
+    sustained = [r["rate"] for r in results if r["sustained"]]
+    mode = "in-process" if args.in_process else "webhook"
+    if sustained:
+        print(f"Максимальная устойчивая частота ({mode}): {max(sustained):.0f} апдейтов/с")
+    else:
+        print(f"Ни одна ступень не выдержана ({mode}): p95 > {args.slo_ms} мс или таймауты")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rates", type=float, nargs="+", default=[10, 25, 50, 100, 200, 400])
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд на ступень")
+    parser.add_argument("--slo-ms", type=float, default=500.0, help="допустимый p95, мс")
+    parser.add_argument("--timeout", type=float, default=10.0, help="ожидание ответа бота, сек")
+    parser.add_argument("--connections", type=int, default=100, help="соединений к webhook")
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--in-process", action="store_true", help="без HTTP-входа webhook")
+    parser.add_argument("--ors-stub", action="store_true", help="поиск через заглушку ORS")
+    parser.add_argument("--ors-latency", type=float, default=0.05, help="задержка заглушки ORS, сек")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,30 +3,52 @@
 Отвечает за настройку и регистрацию обработчиков.
 """
 
-from telegram.ext import CommandHandler, MessageHandler, filters
+from typing import Optional
 
+from telegram.ext import (
+    CallbackQueryHandler,
+    CommandHandler,
+    InlineQueryHandler,
+    MessageHandler,
+    filters,
+)
+
+from bot.conversation_store import RedisConversationStore
 from handlers.commands import help_handler, start_handler
 from handlers.messages import fallback_handler
-from handlers.search import get_search_conversation_handler
+from handlers.search import (
+    get_search_conversation_handler,
+    inline_query_handler,
+    results_callback,
+)
 
 
 class Bot:
     """Класс для управления ботом."""
 
-    def __init__(self, application):
+    def __init__(self, application, conversation_store: Optional[RedisConversationStore] = None):
         """
         Инициализация бота.
 
         Args:
             application: Экземпляр Telegram Application
+            conversation_store: Состояние диалогов в Redis (несколько реплик)
         """
         self.application = application
+        self.conversation_store = conversation_store
 
     def setup_handlers(self):
         """Настройка всех обработчиков команд и сообщений."""
+        # Диалог — раньше /start: ссылка /start find из inline-режима начинает поиск
+        self.application.add_handler(get_search_conversation_handler(self.conversation_store))
         self.application.add_handler(CommandHandler("start", start_handler))
         self.application.add_handler(CommandHandler("help", help_handler))
-        self.application.add_handler(get_search_conversation_handler())
+        # Листание и «ещё похожие» у показанных результатов (после конца диалога)
+        self.application.add_handler(
+            CallbackQueryHandler(results_callback, pattern=r"^(page|more):")
+        )
+        # Inline-режим (@бот москва 10 парк); включается в @BotFather командой /setinline
+        self.application.add_handler(InlineQueryHandler(inline_query_handler))
         self.application.add_handler(
             MessageHandler(filters.TEXT & ~filters.COMMAND, fallback_handler)
         )
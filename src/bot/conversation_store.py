@@ -0,0 +1,200 @@
+"""
+Состояние диалогов в Redis для нескольких реплик за одним webhook.
+
+ConversationHandler хранит состояние диалога в памяти процесса, а
+BasePersistence сбрасывает его раз в update_interval — следующее сообщение
+пользователя, пришедшее на другую реплику, увидело бы устаревшее состояние.
+SharedConversationHandler читает состояние и user_data из Redis перед
+обработкой апдейта (один pipeline) и записывает их сразу после неё (один
+транзакционный pipeline), поэтому любой апдейт может обработать любая реплика.
+
+Клиент Redis синхронный: чтение и запись выполняются в потоке и не держат
+event loop. check_update в Redis не ходит — он лишь проверяет, может ли
+апдейт относиться к диалогу хоть в каком-то состоянии.
+"""
+
+import asyncio
+import json
+import logging
+from itertools import chain
+from typing import Any, Optional
+
+from telegram import Update
+from telegram.ext import Application, ConversationHandler
+
+from services.cache import json_dumps
+from services.redis_store import KEY_PREFIX, REDIS_ERRORS, CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Незавершённый диалог и его user_data живут сутки с последнего апдейта
+SESSION_TTL = 24 * 3600
+
+
+class RedisConversationStore:
+    """Состояния диалогов и user_data пользователей в Redis с TTL."""
+
+    def __init__(
+        self, client: Any, ttl: float = SESSION_TTL, breaker: Optional[CircuitBreaker] = None
+    ):
+        self.client = client
+        self.ttl_ms = int(ttl * 1000)
+        # Пока Redis недоступен, диалог идёт с чистого состояния, а не ждёт таймаутов
+        self.breaker = breaker or CircuitBreaker()
+
+    @staticmethod
+    def _state_key(name: str, key: tuple) -> str:
+        return f"{KEY_PREFIX}:conv:{name}:" + ":".join(map(str, key))
+
+    @staticmethod
+    def _user_key(user_id: int) -> str:
+        return f"{KEY_PREFIX}:user:{user_id}"
+
+    def load(
+        self, name: str, key: tuple, user_id: Optional[int]
+    ) -> tuple[Optional[object], Optional[dict]]:
+        """
+        Состояние диалога и user_data одним pipeline.
+
+        Returns:
+            (состояние или None, user_data или None, если пользователь неизвестен)
+        """
+        if not self.breaker.allow():
+            return None, None
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(self._state_key(name, key))
+        if user_id is not None:
+            pipe.get(self._user_key(user_id))
+        try:
+            replies = pipe.execute()
+        except REDIS_ERRORS as e:
+            self.breaker.record_failure()
+            logger.warning("Состояние диалога %s не прочитано из Redis: %s", key, e)
+            return None, None
+        self.breaker.record_success()
+        state = json.loads(replies[0]) if replies[0] is not None else None
+        user_data = json.loads(replies[1]) if len(replies) > 1 and replies[1] is not None else None
+        return state, user_data
+
+    def save(
+        self,
+        name: str,
+        key: tuple,
+        state: Optional[object],
+        user_id: Optional[int],
+        user_data: Optional[dict],
+    ) -> None:
+        """Записать состояние (None — диалог завершён) и user_data одной транзакцией."""
+        if not self.breaker.allow():
+            return
+        pipe = self.client.pipeline(transaction=True)
+        state_key = self._state_key(name, key)
+        if state is None:
+            pipe.delete(state_key)
+        else:
+            pipe.set(state_key, json_dumps(state), px=self.ttl_ms)
+        if user_id is not None:
+            if user_data:
+                pipe.set(self._user_key(user_id), json_dumps(user_data), px=self.ttl_ms)
+            else:
+                pipe.delete(self._user_key(user_id))
+        try:
+            pipe.execute()
+        except REDIS_ERRORS as e:
+            self.breaker.record_failure()
+            logger.warning("Состояние диалога %s не записано в Redis: %s", key, e)
+            return
+        self.breaker.record_success()
+
+
+class SharedConversationHandler(ConversationHandler):
+    """
+    ConversationHandler, состояние которого общее для реплик (RedisConversationStore).
+
+    user_data синхронизируется вместе с состоянием, поэтому данные,
+    собранные на прошлых шагах диалога, видны на любой реплике.
+
+    check_update синхронный, поэтому состояние из Redis в нём не читается:
+    апдейт берётся, если его принял бы обработчик диалога в любом состоянии.
+    Состояние загружается в handle_update; если апдейт всё же не для диалога
+    (например, текст вне поиска), он передаётся следующему подходящему
+    обработчику той же группы.
+    """
+
+    def __init__(self, *args: Any, store: RedisConversationStore, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        if not self.name:
+            raise ValueError("SharedConversationHandler нужен name — он входит в ключ Redis")
+        self.store = store
+
+    def _conversation_key(self, update: Update) -> Optional[tuple]:
+        try:
+            return self._get_key(update)
+        except (AttributeError, RuntimeError):
+            # Апдейт без чата/пользователя — его отфильтрует ConversationHandler
+            return None
+
+    def check_update(self, update: object):
+        if not isinstance(update, Update) or update.channel_post or update.edited_channel_post:
+            return None
+        key = self._conversation_key(update)
+        if key is None:
+            return None
+        handlers = chain(self.entry_points, chain.from_iterable(self.states.values()), self.fallbacks)
+        for handler in handlers:
+            check = handler.check_update(update)
+            if check is not None and check is not False:
+                # Состояние ещё не известно: его определит handle_update
+                return None, key, handler, check
+        return None
+
+    async def handle_update(
+        self, update: Update, application: Application, check_result: Any, context: Any
+    ) -> Optional[object]:
+        key = check_result[1]
+        user = update.effective_user
+        user_id = user.id if user else None
+        state, user_data = await asyncio.to_thread(self.store.load, self.name, key, user_id)
+        if state is None:
+            self._conversations.pop(key, None)
+        else:
+            self._conversations[key] = state
+
+        check_result = super().check_update(update)
+        if check_result is None:
+            return await self._handle_elsewhere(update, application, context)
+
+        if context.user_data is not None:
+            context.user_data.clear()
+            context.user_data.update(user_data or {})
+
+        result = await super().handle_update(update, application, check_result, context)
+
+        # Запись — в потоке: следующий апдейт пользователя ждёт её через
+        # PerUserUpdateProcessor, а остальные апдейты не ждут Redis
+        await asyncio.to_thread(
+            self.store.save,
+            self.name,
+            key,
+            self._conversations.get(key),
+            user_id,
+            dict(context.user_data) if context.user_data is not None else None,
+        )
+        return result
+
+    async def _handle_elsewhere(
+        self, update: Update, application: Application, context: Any
+    ) -> Optional[object]:
+        """Отдать апдейт первому подходящему обработчику после этого в той же группе."""
+        for handlers in application.handlers.values():
+            if self in handlers:
+                rest = handlers[handlers.index(self) + 1:]
+                break
+        else:
+            return None
+        for handler in rest:
+            check = handler.check_update(update)
+            if check is not None and check is not False:
+                handler.collect_additional_context(context, update, application, check)
+                return await handler.handle_update(update, application, check, context)
+        return None
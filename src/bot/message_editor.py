@@ -0,0 +1,106 @@
+"""
+Постепенное обновление сообщения бота в пределах лимитов Telegram.
+
+Telegram ограничивает частоту сообщений и правок в одном чате (порядка
+одной в секунду при длительной нагрузке, короткие всплески допустимы) и
+отвечает RetryAfter при превышении. MessageEditor правит сообщение не чаще
+токенов общего для чата TokenBucket: промежуточные тексты, не успевшие
+уйти, заменяются последним, а итоговый текст отправляется всегда.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from telegram.error import BadRequest, RetryAfter
+
+from services.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Правок подряд без ожидания и скорость правок в одном чате, в секунду
+EDIT_BURST = 3
+EDIT_RATE = 1.0
+
+# Сколько чатов помнить (последние активные)
+MAX_TRACKED_CHATS = 10_000
+
+_chat_buckets: "OrderedDict[int, TokenBucket]" = OrderedDict()
+
+
+def chat_edit_bucket(chat_id: int) -> TokenBucket:
+    """Общий для всех правок чата TokenBucket (последние MAX_TRACKED_CHATS чатов)."""
+    bucket = _chat_buckets.get(chat_id)
+    if bucket is None:
+        bucket = TokenBucket(EDIT_BURST, EDIT_RATE)
+        _chat_buckets[chat_id] = bucket
+        if len(_chat_buckets) > MAX_TRACKED_CHATS:
+            _chat_buckets.popitem(last=False)
+    else:
+        _chat_buckets.move_to_end(chat_id)
+    return bucket
+
+
+class MessageEditor:
+    """
+    Правки одного сообщения: update() ставит текст, flush() дожидается отправки последнего.
+
+    edit — корутинная функция правки (например, CallbackQuery.edit_message_text),
+    аргументы update() передаются ей как есть. BadRequest промежуточного текста
+    (уже есть более новый) пишется в лог, ошибка последнего текста — из flush().
+    """
+
+    def __init__(self, edit: Callable[..., Awaitable[Any]], bucket: TokenBucket):
+        self._edit = edit
+        self._bucket = bucket
+        self._pending: Optional[tuple[str, dict]] = None
+        self._sent: Optional[tuple[str, dict]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.edits = 0
+        self.skipped = 0
+
+    def update(self, text: str, **kwargs: Any) -> None:
+        """Показать text, как только позволит лимит чата (прежний неотправленный текст отбрасывается)."""
+        if self._pending is not None:
+            self.skipped += 1
+        self._pending = (text, kwargs)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._send_pending())
+
+    async def flush(self) -> None:
+        """Дождаться отправки последнего текста."""
+        if self._task is not None:
+            await self._task
+
+    async def _send_pending(self) -> None:
+        while self._pending is not None:
+            wait = self._bucket.wait_time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            pending, self._pending = self._pending, None
+            if pending == self._sent:
+                continue
+            self._bucket.consume()
+            try:
+                await self._edit(pending[0], **pending[1])
+            except RetryAfter as e:
+                # Telegram просит подождать: повторяем, если новее ничего не пришло
+                logger.warning("Telegram RetryAfter %s с при правке сообщения", e.retry_after)
+                self._bucket.drain()
+                await asyncio.sleep(float(e.retry_after))
+                if self._pending is None:
+                    self._pending = pending
+                continue
+            except BadRequest as e:
+                if "not modified" in str(e).lower():
+                    pass
+                elif self._pending is not None:
+                    # Промежуточный текст отклонён: не мешаем отправке более нового
+                    logger.warning("Промежуточная правка сообщения отклонена: %s", e)
+                    continue
+                else:
+                    raise
+            self._sent = pending
+            self.edits += 1
@@ -0,0 +1,74 @@
+"""
+Параллельная обработка апдейтов с сохранением порядка для каждого пользователя.
+
+PTB по умолчанию обрабатывает апдейты по одному: один поиск с ORS задерживает
+всех. С SimpleUpdateProcessor апдейты идут параллельно, но два апдейта
+одного пользователя (кнопка и текст подряд) могут обогнать друг друга и
+сбить ConversationHandler. PerUserUpdateProcessor ограничивает общее число
+одновременных апдейтов и выполняет апдейты одного пользователя строго по
+очереди; разные пользователи друг друга не ждут.
+"""
+
+import asyncio
+from typing import Awaitable, Hashable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+# Одновременно обрабатываемых апдейтов (всех пользователей)
+CONCURRENT_UPDATES = 64
+
+
+def _update_key(update: object) -> Optional[Hashable]:
+    """Ключ очереди апдейта: пользователь, иначе чат; None — без упорядочивания."""
+    if not isinstance(update, Update):
+        return None
+    if update.effective_user is not None:
+        return update.effective_user.id
+    if update.effective_chat is not None:
+        return ("chat", update.effective_chat.id)
+    return None
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    До max_concurrent_updates апдейтов одновременно, апдейты одного ключа — по порядку.
+
+    Следующий апдейт пользователя ждёт своей очереди до захвата общего слота,
+    поэтому один пользователь с серией апдейтов не занимает слоты остальных.
+    """
+
+    def __init__(self, max_concurrent_updates: int = CONCURRENT_UPDATES):
+        super().__init__(max_concurrent_updates)
+        # ключ -> (замок очереди, апдейтов в ней); запись удаляется с последним апдейтом
+        self._queues: dict[Hashable, tuple[asyncio.Lock, int]] = {}
+
+    async def process_update(self, update: object, coroutine: Awaitable) -> None:
+        key = _update_key(update)
+        if key is None:
+            await super().process_update(update, coroutine)
+            return
+
+        lock, pending = self._queues.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._queues[key] = (lock, pending + 1)
+        try:
+            # asyncio.Lock будит ожидающих по порядку: апдейты идут в порядке поступления
+            async with lock:
+                await super().process_update(update, coroutine)
+        finally:
+            lock, pending = self._queues[key]
+            if pending == 1:
+                del self._queues[key]
+            else:
+                self._queues[key] = (lock, pending - 1)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable) -> None:
+        await coroutine
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -6,6 +6,22 @@
 import os
 from typing import Optional
 
+from services.loop_generator import SHAPES
+
+
+def parse_loop_shapes(value: str) -> list[str]:
+    """
+    Формы петли из LOOP_SHAPES ("out-back, triangle").
+
+    Raises:
+        ValueError: форма не из loop_generator.SHAPES или список пуст
+    """
+    shapes = [shape.strip() for shape in value.split(",") if shape.strip()]
+    unknown = [shape for shape in shapes if shape not in SHAPES]
+    if unknown or not shapes:
+        raise ValueError(f"LOOP_SHAPES={value!r}: допустимые формы — {', '.join(SHAPES)}")
+    return shapes
+
 
 class Settings:
     """Класс для управления настройками приложения."""
@@ -19,17 +35,58 @@ class Settings:
         # Database settings
         self.database_url: Optional[str] = os.getenv("DATABASE_URL")
         
-        # Redis settings (опционально)
+        # Redis (опционально): общие кэши ORS и состояние диалогов для нескольких реплик
         self.redis_host: Optional[str] = os.getenv("REDIS_HOST")
         self.redis_port: int = int(os.getenv("REDIS_PORT", "6379"))
         self.redis_db: int = int(os.getenv("REDIS_DB", "0"))
+        # Таймаут запроса к Redis, сек (запросы идут из event loop)
+        self.redis_timeout: float = float(os.getenv("REDIS_TIMEOUT", "0.05"))
 
         # OpenRouteService (маршрутизация)
         self.ors_api_key: Optional[str] = os.getenv("OPENROUTESERVICE_API_KEY")
+        self.ors_base_url: str = os.getenv("ORS_BASE_URL", "https://api.openrouteservice.org")
+        # Квоты ORS (по умолчанию — бесплатный тариф) и ожидание в очереди, сек
+        self.ors_directions_per_minute: int = int(os.getenv("ORS_DIRECTIONS_PER_MINUTE", "40"))
+        self.ors_directions_per_day: int = int(os.getenv("ORS_DIRECTIONS_PER_DAY", "2000"))
+        self.ors_geocode_per_minute: int = int(os.getenv("ORS_GEOCODE_PER_MINUTE", "100"))
+        self.ors_geocode_per_day: int = int(os.getenv("ORS_GEOCODE_PER_DAY", "1000"))
+        self.ors_queue_timeout: float = float(os.getenv("ORS_QUEUE_TIMEOUT", "10"))
+        # Кандидаты петли: число азимутов и формы (out-back, triangle, square)
+        self.loop_bearings: int = int(os.getenv("LOOP_BEARINGS", "8"))
+        self.loop_shapes: list[str] = parse_loop_shapes(
+            os.getenv("LOOP_SHAPES", "out-back,triangle,square")
+        )
+        # Повторный запрос Directions, если маршрут не попал в дистанцию (±15%)
+        self.distance_correction: bool = os.getenv("DISTANCE_CORRECTION", "True").lower() == "true"
+
+        # Одновременные поиски маршрутов и очередь ожидающих; сверх неё — «занято, повторите»
+        self.search_workers: int = int(os.getenv("SEARCH_WORKERS", "4"))
+        self.search_queue_size: int = int(os.getenv("SEARCH_QUEUE_SIZE", "32"))
+        # Одновременно обрабатываемых апдейтов (апдейты одного пользователя — по порядку)
+        self.concurrent_updates: int = int(os.getenv("CONCURRENT_UPDATES", "64"))
+
+        # Локальный пешеходный граф вместо ORS (python -m tools.build_walk_graph)
+        self.local_graph_file: Optional[str] = os.getenv("LOCAL_GRAPH_FILE")
+
+        # Каталог маршрутов (JSON-массив или NDJSON) и период проверки его изменений
+        self.routes_file: Optional[str] = os.getenv("ROUTES_FILE")
+        self.routes_reload_interval: float = float(os.getenv("ROUTES_RELOAD_INTERVAL", "30"))
+
+        # База предрассчитанных маршрутов (по умолчанию data/precomputed_routes.sqlite3)
+        self.routes_db_file: Optional[str] = os.getenv("ROUTES_DB_FILE")
+
+        # Локальные кэши (геокодинг и т.п.); по умолчанию data/cache
+        self.cache_dir: Optional[str] = os.getenv("CACHE_DIR")
+
+        # Адрес Bot API: локальный сервер или заглушка (tools/fake_telegram.py);
+        # по умолчанию api.telegram.org
+        self.telegram_api_url: Optional[str] = os.getenv("TELEGRAM_API_URL")
 
         # Railway / webhook
         self.port: int = int(os.getenv("PORT", "0"))
         self.webhook_url: Optional[str] = os.getenv("WEBHOOK_URL")
+        # Метрики Prometheus (GET /metrics); 0 — не публиковать
+        self.metrics_port: int = int(os.getenv("METRICS_PORT", "0"))
     
     def validate(self) -> bool:
         """
@@ -38,6 +38,8 @@ async def help_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/start — Начать работу с ботом\n"
         "/find — Найти маршрут для бега (город, дистанция, тип поверхности)\n"
         "/cancel — Отменить текущий поиск\n"
+        "📍 Геопозиция — маршруты рядом с вами\n"
+        f"@{context.bot.username} москва 10 парк — маршруты в любом чате без диалога\n"
         "/help — Показать это сообщение"
     )
     await update.message.reply_text(help_text)
@@ -2,11 +2,19 @@
 Обработчики поиска маршрутов для бега.
 """
 
+import hashlib
 import logging
 import re
-
-import httpx
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from typing import Optional
+
+from telegram import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQueryResultArticle,
+    InlineQueryResultsButton,
+    InputTextMessageContent,
+    Update,
+)
 from telegram.ext import (
     CallbackQueryHandler,
     CommandHandler,
@@ -16,23 +24,45 @@ from telegram.ext import (
     filters,
 )
 
-from services.route_service import route_service
+from bot.conversation_store import RedisConversationStore, SharedConversationHandler
+from bot.message_editor import MessageEditor, chat_edit_bucket
+from services.metrics import timed_handler
+from services.rate_limiter import RateLimitExceeded
+from services.route_service import get_route_service
+from services.search_executor import SearchQueueFull
+from services.search_results import PAGE_SIZE, SearchResult
 
 logger = logging.getLogger(__name__)
 
 # Состояния диалога
 CITY, DISTANCE, SURFACE = range(3)
 
+# Сколько секунд Telegram кэширует ответ на одинаковый inline-запрос у себя
+INLINE_CACHE_TIME = 300
+
+# Маршрутов в ответе на inline-запрос (Telegram принимает до 50)
+INLINE_LIMIT = 10
+
+# Параметр deep link (t.me/бот?start=find) кнопки inline-режима: сразу /find
+FIND_START_PARAMETER = "find"
 
-def _format_route(route, index: int) -> str:
-    """Форматирование одного маршрута для вывода."""
+# Сокращения городов в inline-запросе (полные названия узнаются по началу)
+CITY_ALIASES = {"мск": "Москва", "спб": "Санкт-Петербург", "питер": "Санкт-Петербург"}
+
+
+def _format_route(route, index: Optional[int], away_km: Optional[float] = None) -> str:
+    """Форматирование одного маршрута для вывода (index None — без номера, away_km — расстояние до старта)."""
     features = ", ".join(route.features) if route.features else "—"
-    surface_label = route_service.get_surface_types().get(
+    surface_label = get_route_service().get_surface_types().get(
         route.surface_type, route.surface_type
     )
     lines = [
-        f"<b>{index}. {route.name}</b>",
+        f"<b>{index}. {route.name}</b>" if index is not None else f"<b>{route.name}</b>",
         f"   📏 {route.distance_km} км | {surface_label}",
+    ]
+    if away_km is not None:
+        lines.append(f"   📍 {away_km:.1f} км от вас")
+    lines += [
         f"   {route.description}",
         f"   Особенности: {features}",
     ]
@@ -55,21 +85,134 @@ def _format_routes_list(routes: list) -> str:
     return header + "\n\n".join(items)
 
 
+def _format_partial_list(routes: list) -> str:
+    """Промежуточный результат: первые PAGE_SIZE найденных маршрутов и отметка, что поиск идёт."""
+    header = f"Нашёл {len(routes)} маршрут(ов), ищу ещё… ⏳\n\n"
+    items = [_format_route(r, i + 1) for i, r in enumerate(routes[:PAGE_SIZE])]
+    return header + "\n\n".join(items)
+
+
+def _format_nearby_list(nearby: list) -> str:
+    """Форматирование маршрутов рядом с пользователем: [(км до старта, маршрут), ...]."""
+    if not nearby:
+        return (
+            "Рядом с вами маршрутов под эти критерии нет. Попробуйте другую "
+            "дистанцию или тип поверхности.\n\n"
+            "Используйте /find для нового поиска."
+        )
+
+    header = f"Нашёл {len(nearby)} маршрут(ов) рядом с вами:\n\n"
+    items = [_format_route(r, i + 1, away_km) for i, (away_km, r) in enumerate(nearby)]
+    return header + "\n\n".join(items)
+
+
+def _format_results_page(result: SearchResult, page: int) -> str:
+    """Страница сохранённого результата; нумерация маршрутов сквозная."""
+    if result.location is not None:
+        header = f"Нашёл {len(result.routes)} маршрут(ов) рядом с вами"
+    else:
+        header = f"Нашёл {len(result.routes)} маршрут(ов) под ваши критерии"
+    if result.pages > 1:
+        header += f" (стр. {page + 1}/{result.pages})"
+    items = [_format_route(r, index, away_km) for index, r, away_km in result.page(page)]
+    return header + ":\n\n" + "\n\n".join(items)
+
+
+def _results_keyboard(result: SearchResult, page: int) -> Optional[InlineKeyboardMarkup]:
+    """Кнопки листания результата и «ещё похожие»; None, если кнопок нет."""
+    keyboard = []
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton("◀️ Назад", callback_data=f"page:{result.key}:{page - 1}"))
+    if page + 1 < result.pages:
+        nav.append(InlineKeyboardButton("Вперёд ▶️", callback_data=f"page:{result.key}:{page + 1}"))
+    if nav:
+        keyboard.append(nav)
+    if get_route_service().can_extend(result):
+        keyboard.append([InlineKeyboardButton("🔁 Ещё похожие", callback_data=f"more:{result.key}")])
+    return InlineKeyboardMarkup(keyboard) if keyboard else None
+
+
+def _surface_keyboard() -> InlineKeyboardMarkup:
+    """Кнопки выбора типа поверхности, по две в ряд."""
+    surface_types = get_route_service().get_surface_types()
+    keyboard = [
+        [
+            InlineKeyboardButton(label, callback_data=f"surface:{stype}")
+            for stype, label in list(surface_types.items())[i : i + 2]
+        ]
+        for i in range(0, len(surface_types), 2)
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+
+def _clear_search(context: ContextTypes.DEFAULT_TYPE) -> None:
+    for key in ("search_city", "search_location", "search_distance"):
+        context.user_data.pop(key, None)
+
+
+def _search_error_text(city: str, error: Exception) -> str:
+    """Ответ пользователю на ошибку поиска (httpx импортируется только при ошибке)."""
+    import httpx
+
+    if isinstance(error, httpx.TimeoutException):
+        logger.warning("Timeout при поиске маршрутов для %s", city)
+        return (
+            "Сервис маршрутизации не ответил вовремя. "
+            "Попробуйте позже или измените параметры поиска.\n\n"
+            "Используйте /find для нового поиска."
+        )
+    if isinstance(error, httpx.HTTPStatusError):
+        logger.error("ORS HTTP error: %s", error)
+        if error.response.status_code == 429:
+            return (
+                "Превышен лимит запросов к сервису маршрутов. "
+                "Попробуйте через несколько минут.\n\n"
+                "Используйте /find для нового поиска."
+            )
+        return (
+            "Временная ошибка сервиса маршрутов. "
+            "Попробуйте позже.\n\n"
+            "Используйте /find для нового поиска."
+        )
+    logger.error("Ошибка поиска маршрутов: %s", error, exc_info=error)
+    return (
+        "Произошла ошибка при поиске. Попробуйте изменить параметры "
+        "или повторить позже.\n\n"
+        "Используйте /find для нового поиска."
+    )
+
+
+@timed_handler
 async def find_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Старт сценария поиска — показ выбора города."""
-    cities = route_service.get_cities()
+    cities = get_route_service().get_cities()
     keyboard = [
         [InlineKeyboardButton(city, callback_data=f"city:{city}")] for city in cities
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
 
     await update.message.reply_text(
-        "Выберите город:",
+        "Выберите город или отправьте геопозицию 📍, чтобы найти маршруты рядом:",
         reply_markup=reply_markup,
     )
     return CITY
 
 
+@timed_handler
+async def location_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Геопозиция вместо города: дальше ищутся ближайшие маршруты каталога."""
+    location = update.message.location
+    context.user_data.pop("search_city", None)
+    context.user_data["search_location"] = (location.longitude, location.latitude)
+
+    await update.message.reply_text(
+        "Ищу маршруты рядом с вами.\n\nУкажите желаемую дистанцию в км (например: 10):"
+    )
+    return DISTANCE
+
+
+@timed_handler
 async def city_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Обработка выбора города."""
     query = update.callback_query
@@ -79,12 +222,14 @@ async def city_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
         return ConversationHandler.END
 
     city = query.data.replace("city:", "")
+    context.user_data.pop("search_location", None)
     context.user_data["search_city"] = city
 
     await query.edit_message_text(f"Город: <b>{city}</b>\n\nУкажите желаемую дистанцию в км (например: 10):")
     return DISTANCE
 
 
+@timed_handler
 async def distance_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Приём дистанции от пользователя."""
     text = update.message.text.strip()
@@ -109,23 +254,14 @@ async def distance_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 
     context.user_data["search_distance"] = distance
 
-    surface_types = route_service.get_surface_types()
-    keyboard = [
-        [
-            InlineKeyboardButton(label, callback_data=f"surface:{stype}")
-            for stype, label in list(surface_types.items())[i : i + 2]
-        ]
-        for i in range(0, len(surface_types), 2)
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-
     await update.message.reply_text(
         f"Дистанция: <b>{distance} км</b>\n\nВыберите тип поверхности:",
-        reply_markup=reply_markup,
+        reply_markup=_surface_keyboard(),
     )
     return SURFACE
 
 
+@timed_handler
 async def surface_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Обработка выбора типа поверхности — поиск и вывод результатов."""
     query = update.callback_query
@@ -136,72 +272,259 @@ async def surface_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 
     surface_type = query.data.replace("surface:", "")
     city = context.user_data.get("search_city")
+    location = context.user_data.get("search_location")
     distance = context.user_data.get("search_distance")
 
-    if not city or not distance:
+    if not (city or location) or not distance:
         await query.edit_message_text("Сессия поиска истекла. Используйте /find для нового поиска.")
         return ConversationHandler.END
 
+    route_service = get_route_service()
+    # До конца фонового прогрева каталог догружается в потоке, не в event loop
+    await route_service.wait_catalog()
+    # Правки сообщения — в пределах лимита чата; промежуточные тексты могут схлопнуться
+    editor = MessageEditor(query.edit_message_text, chat_edit_bucket(update.effective_chat.id))
+
+    async def stream_routes() -> list:
+        """Показывать маршруты по мере нахождения; вернуть итоговый список."""
+        routes: list = []
+        async for routes, final in route_service.search_stream(
+            city=city, distance_km=distance, surface_type=surface_type
+        ):
+            # Итог выводится страницей результата ниже, без отметки «ищу ещё»
+            if not final:
+                editor.update(
+                    _format_partial_list(routes), parse_mode="HTML", disable_web_page_preview=True
+                )
+        return routes
+
+    result: Optional[SearchResult] = None
     try:
-        routes = route_service.search(city=city, distance_km=distance, surface_type=surface_type)
-        result_text = _format_routes_list(routes)
-    except httpx.TimeoutException:
-        logger.warning("Timeout при поиске маршрутов для %s", city)
-        result_text = (
-            "Сервис маршрутизации не ответил вовремя. "
-            "Попробуйте позже или измените параметры поиска.\n\n"
-            "Используйте /find для нового поиска."
-        )
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 429:
-            result_text = (
-                "Превышен лимит запросов к сервису маршрутов. "
-                "Попробуйте через несколько минут.\n\n"
-                "Используйте /find для нового поиска."
+        if location:
+            # Поиск по каталогу в памяти (SpatialIndex), без сетевых запросов — в потоке
+            # и через общий пул поисков, как и поиск по городу
+            nearby = await route_service.search_executor.run(
+                lambda: route_service.search_nearby_async(
+                    *location, distance_km=distance, surface_type=surface_type
+                )
             )
+            result_text = _format_nearby_list(nearby)
+            if nearby:
+                result = SearchResult(distance, surface_type, location=tuple(location))
+                result.merge([r for _, r in nearby], [d for d, _ in nearby])
         else:
-            result_text = (
-                "Временная ошибка сервиса маршрутов. "
-                "Попробуйте позже.\n\n"
-                "Используйте /find для нового поиска."
-            )
-        logger.error("ORS HTTP error: %s", e)
-    except Exception as e:
-        logger.exception("Ошибка поиска маршрутов: %s", e)
+            editor.update("🔎 Ищу маршруты…")
+            # Поиск с ORS — через общий пул: при заполненной очереди сразу SearchQueueFull
+            routes = await route_service.search_executor.run(stream_routes)
+            result_text = _format_routes_list(routes)
+            if routes:
+                result = SearchResult(distance, surface_type, city=city)
+                result.merge(routes)
+    except SearchQueueFull:
+        # Данные поиска сохраняются: пользователь повторит выбором поверхности
+        editor.update(
+            "Сейчас слишком много поисков. Выберите поверхность ещё раз через несколько секунд:",
+            reply_markup=_surface_keyboard(),
+        )
+        await editor.flush()
+        return SURFACE
+    except RateLimitExceeded:
+        logger.warning("Квота ORS исчерпана при поиске для %s", city)
         result_text = (
-            "Произошла ошибка при поиске. Попробуйте изменить параметры "
-            "или повторить позже.\n\n"
+            "Превышен лимит запросов к сервису маршрутов. "
+            "Попробуйте через несколько минут.\n\n"
             "Используйте /find для нового поиска."
         )
+    except Exception as e:
+        result_text = _search_error_text(city, e)
 
-    await query.edit_message_text(
-        result_text,
-        parse_mode="HTML",
-        disable_web_page_preview=True,
+    reply_markup = None
+    if result is not None:
+        # Результат сохраняется под коротким ключом: кнопки листают его без нового поиска
+        route_service.search_results.put(result)
+        result_text = _format_results_page(result, 0)
+        reply_markup = _results_keyboard(result, 0)
+
+    editor.update(
+        result_text, parse_mode="HTML", disable_web_page_preview=True, reply_markup=reply_markup
     )
+    await editor.flush()
 
     # Очистка данных поиска
-    context.user_data.pop("search_city", None)
-    context.user_data.pop("search_distance", None)
+    _clear_search(context)
 
     return ConversationHandler.END
 
 
+@timed_handler
+async def results_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Кнопки результата: page:<ключ>:<страница> и more:<ключ> (вне диалога поиска)."""
+    query = update.callback_query
+    action, _, rest = (query.data or "").partition(":")
+    key, _, page = rest.partition(":")
+    if action not in ("page", "more") or (action == "page" and not page.isdigit()):
+        # callback_data пришли не от наших кнопок
+        await query.answer()
+        return
+
+    route_service = get_route_service()
+    result = route_service.search_results.get(key)
+    if result is None:
+        await query.answer("Результаты устарели. Используйте /find для нового поиска.")
+        return
+
+    if action == "page":
+        page_number = min(int(page), result.pages - 1)
+        await query.answer()
+    else:
+        shown = len(result.routes)
+        try:
+            # Дополнение идёт через общий пул поисков, как и сам поиск
+            added = await route_service.search_executor.run(
+                lambda: route_service.extend_results(result)
+            )
+        except SearchQueueFull:
+            await query.answer("Сейчас слишком много поисков, попробуйте через несколько секунд.")
+            return
+        except RateLimitExceeded:
+            await query.answer("Превышен лимит запросов к сервису маршрутов, попробуйте позже.")
+            return
+        except Exception as e:
+            logger.exception("Ошибка дополнения результата %s: %s", key, e)
+            await query.answer("Не удалось найти ещё маршруты, попробуйте позже.")
+            return
+        if added:
+            await query.answer(f"Добавлено маршрутов: {added}")
+            page_number = shown // PAGE_SIZE
+        else:
+            await query.answer("Новых маршрутов не нашлось.")
+            page_number = (shown - 1) // PAGE_SIZE
+
+    editor = MessageEditor(query.edit_message_text, chat_edit_bucket(update.effective_chat.id))
+    editor.update(
+        _format_results_page(result, page_number),
+        parse_mode="HTML",
+        disable_web_page_preview=True,
+        reply_markup=_results_keyboard(result, page_number),
+    )
+    await editor.flush()
+
+
+def _parse_inline_query(text: str) -> Optional[tuple[str, float, str]]:
+    """
+    Разобрать inline-запрос вида «москва 10 парк» (порядок слов любой).
+
+    Returns:
+        (город, дистанция в км, тип поверхности) или None, если чего-то не хватает
+    """
+    route_service = get_route_service()
+    city = distance = surface_type = None
+    for word in text.casefold().replace(",", ".").split():
+        number = re.fullmatch(r"(\d+(?:\.\d+)?)(?:км)?", word)
+        if number:
+            distance = float(number.group(1))
+            continue
+        if len(word) < 3:
+            continue
+        if word in CITY_ALIASES:
+            city = CITY_ALIASES[word]
+            continue
+        for name in route_service.get_cities():
+            if name.casefold().startswith(word) or word.startswith(name.casefold()):
+                city = name
+                break
+        else:
+            # «парк», «парке», «набережной» — по первым буквам названия поверхности
+            for stype, label in route_service.get_surface_types().items():
+                label = label.casefold()
+                if word == stype or label.startswith(word) or word.startswith(label[:4]):
+                    surface_type = stype
+                    break
+    if city is None or distance is None or surface_type is None or not 1 <= distance <= 50:
+        return None
+    return city, distance, surface_type
+
+
+def _inline_article(route) -> InlineQueryResultArticle:
+    """Маршрут как результат inline-запроса; id — хэш id маршрута (не длиннее 64 байт)."""
+    surface_label = get_route_service().get_surface_types().get(
+        route.surface_type, route.surface_type
+    )
+    return InlineQueryResultArticle(
+        id=hashlib.md5(route.id.encode()).hexdigest(),
+        title=route.name,
+        description=f"{route.distance_km} км | {surface_label} | {route.city}",
+        input_message_content=InputTextMessageContent(
+            _format_route(route, None),
+            parse_mode="HTML",
+            disable_web_page_preview=True,
+        ),
+    )
+
+
+@timed_handler
+async def inline_query_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Inline-режим: «@бот москва 10 парк» без диалога /find.
+
+    Ответ собирается только из локальных данных (предрассчитанные маршруты,
+    кэш маршрутов ORS, JSON-каталог): живые запросы к ORS не укладываются в
+    срок ответа на inline-запрос. Одинаковые запросы Telegram отдаёт из своего
+    кэша INLINE_CACHE_TIME секунд.
+    """
+    query = update.inline_query
+    parsed = _parse_inline_query(query.query)
+    routes = []
+    if parsed is not None:
+        city, distance, surface_type = parsed
+        routes = await get_route_service().search_cached_async(
+            city, distance, surface_type, limit=INLINE_LIMIT
+        )
+    button = None
+    if not routes:
+        text = "Как искать: город, км, поверхность" if parsed is None else "Не нашёл — искать в боте"
+        button = InlineQueryResultsButton(text=text, start_parameter=FIND_START_PARAMETER)
+    await query.answer(
+        [_inline_article(r) for r in routes],
+        cache_time=INLINE_CACHE_TIME,
+        is_personal=False,
+        button=button,
+    )
+
+
+@timed_handler
 async def cancel_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Отмена текущего диалога поиска."""
-    context.user_data.pop("search_city", None)
-    context.user_data.pop("search_distance", None)
+    _clear_search(context)
     await update.message.reply_text("Поиск отменён. Используйте /find когда будете готовы.")
     return ConversationHandler.END
 
 
-def get_search_conversation_handler() -> ConversationHandler:
-    """Создать ConversationHandler для поиска маршрутов."""
-    return ConversationHandler(
-        entry_points=[CommandHandler("find", find_handler)],
+def get_search_conversation_handler(
+    store: Optional[RedisConversationStore] = None,
+) -> ConversationHandler:
+    """
+    Создать ConversationHandler для поиска маршрутов.
+
+    Args:
+        store: Общее для реплик хранилище состояния диалога (Redis); без него
+            состояние живёт в памяти процесса
+    """
+    kwargs = {"name": "search", "store": store} if store is not None else {}
+    handler_class = SharedConversationHandler if store is not None else ConversationHandler
+    return handler_class(
+        entry_points=[
+            CommandHandler("find", find_handler),
+            # Кнопка inline-режима открывает бота ссылкой /start find
+            CommandHandler(
+                "start", find_handler, filters=filters.Regex(rf"^/start {FIND_START_PARAMETER}$")
+            ),
+            MessageHandler(filters.LOCATION, location_handler),
+        ],
         states={
             CITY: [
                 CallbackQueryHandler(city_callback, pattern=r"^city:"),
+                MessageHandler(filters.LOCATION, location_handler),
             ],
             DISTANCE: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, distance_handler),
@@ -211,4 +534,5 @@ def get_search_conversation_handler() -> ConversationHandler:
             ],
         },
         fallbacks=[CommandHandler("cancel", cancel_handler)],
+        **kwargs,
     )
@@ -6,15 +6,18 @@
 
 import logging
 import os
+
 from dotenv import load_dotenv
 from telegram import Update
 from telegram.ext import Application
 
 from bot.bot import Bot
+from bot.conversation_store import RedisConversationStore
+from bot.update_processor import PerUserUpdateProcessor
 from config.settings import Settings
-
-# Загрузка переменных окружения
-load_dotenv()
+from services.metrics import MetricsServer, track_cache
+from services.redis_store import create_redis_client
+from services.route_service import create_route_service, get_route_service, set_route_service
 
 # Настройка логирования
 logging.basicConfig(
@@ -24,17 +27,73 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def build_application(settings: Settings) -> Application:
+    """
+    Application с обработчиками бота (используется и нагрузочными прогонами).
+
+    Сервисы создаются в post_init, а не при импорте: каталог маршрутов и
+    кэши прогреваются в фоне, пока бот уже принимает апдейты.
+    """
+    # Один клиент Redis на процесс: состояние диалогов и кэши ORS
+    redis_client = create_redis_client(
+        settings.redis_host, settings.redis_port, settings.redis_db, settings.redis_timeout
+    )
+    # Эндпоинт /metrics рядом с портом webhook: Prometheus снимает метрики с каждой реплики
+    metrics_server = MetricsServer(settings.metrics_port) if settings.metrics_port else None
+
+    async def post_init(application: Application) -> None:
+        """Создать сервисы и открыть их соединения до приёма обновлений."""
+        route_service = create_route_service(settings, redis_client)
+        set_route_service(route_service)
+        await route_service.start()
+        if metrics_server is not None:
+            track_cache("geocode", route_service.geocode_cache)
+            track_cache("routes", route_service.route_cache)
+            track_cache("results", route_service.search_results)
+            await metrics_server.start()
+
+    async def post_shutdown(application: Application) -> None:
+        """Закрыть соединения сервисов при остановке бота."""
+        if metrics_server is not None:
+            await metrics_server.aclose()
+        await get_route_service().aclose()
+        set_route_service(None)
+
+    builder = (
+        Application.builder()
+        .token(settings.bot_token)
+        # Поиск одного пользователя не задерживает остальных, его апдейты — по порядку
+        .concurrent_updates(PerUserUpdateProcessor(settings.concurrent_updates))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    if settings.telegram_api_url:
+        # Локальный Bot API сервер или заглушка (tools/fake_telegram.py)
+        api_url = settings.telegram_api_url.rstrip("/")
+        builder = builder.base_url(f"{api_url}/bot").base_file_url(f"{api_url}/file/bot")
+    application = builder.build()
+
+    # С Redis состояние диалогов общее: апдейт пользователя может обработать любая реплика
+    conversation_store = None
+    if redis_client is not None:
+        conversation_store = RedisConversationStore(redis_client)
+        logger.info("Состояние диалогов и кэши ORS — в Redis")
+    bot = Bot(application, conversation_store)
+    bot.setup_handlers()
+    return application
+
+
 def main():
     """Основная функция запуска бота."""
+    # .env читается здесь, а не при импорте: до Settings и build_application
+    load_dotenv()
     settings = Settings()
 
     if not settings.bot_token:
         logger.error("BOT_TOKEN не найден в переменных окружения!")
         return
 
-    application = Application.builder().token(settings.bot_token).build()
-    bot = Bot(application)
-    bot.setup_handlers()
+    application = build_application(settings)
 
     port = int(os.getenv("PORT", "0"))
     webhook_url = os.getenv("WEBHOOK_URL")
@@ -2,15 +2,38 @@
 Модель маршрута для бега.
 """
 
+import sys
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterable, Optional
 
 from utils.map_links import build_route_map_link
 
+DIRECTION_LABELS = {
+    "north": "север",
+    "northeast": "северо-восток",
+    "east": "восток",
+    "southeast": "юго-восток",
+    "south": "юг",
+    "southwest": "юго-запад",
+    "west": "запад",
+    "northwest": "северо-запад",
+}
+SHAPE_LABELS = {"": "Маршрут", "triangle": "Петля-треугольник", "square": "Петля-квадрат"}
 
-@dataclass
+
+def _intern_features(features: Iterable[str]) -> tuple[str, ...]:
+    return tuple(sys.intern(f) for f in features)
+
+
+@dataclass(slots=True)
 class Route:
-    """Маршрут для бега в городе."""
+    """
+    Маршрут для бега в городе.
+
+    Экземпляры без __dict__ (slots); город, тип поверхности и особенности
+    интернируются, features хранится кортежем — каталог из сотен тысяч
+    маршрутов держит одну копию каждой повторяющейся строки.
+    """
 
     id: str
     city: str
@@ -18,8 +41,16 @@ class Route:
     distance_km: float
     surface_type: str  # asphalt, park, trail, embankment
     description: str
-    features: list[str]
+    features: tuple[str, ...]
     map_link: Optional[str] = None
+    start: Optional[tuple[float, float]] = None  # (lon, lat) точки старта
+
+    def __post_init__(self):
+        self.city = sys.intern(self.city)
+        self.surface_type = sys.intern(self.surface_type)
+        self.features = _intern_features(self.features)
+        if self.start is not None:
+            self.start = (float(self.start[0]), float(self.start[1]))
 
     @classmethod
     def from_dict(cls, data: dict) -> "Route":
@@ -31,10 +62,27 @@ class Route:
             distance_km=float(data["distance_km"]),
             surface_type=data["surface_type"],
             description=data["description"],
-            features=data.get("features", []),
+            features=data.get("features", ()),
             map_link=data.get("map_link"),
+            start=data.get("start"),
         )
 
+    def to_dict(self) -> dict:
+        """Словарь в формате from_dict (для хранения в кэше)."""
+        data = {
+            "id": self.id,
+            "city": self.city,
+            "name": self.name,
+            "distance_km": self.distance_km,
+            "surface_type": self.surface_type,
+            "description": self.description,
+            "features": list(self.features),
+            "map_link": self.map_link,
+        }
+        if self.start is not None:
+            data["start"] = list(self.start)
+        return data
+
     @classmethod
     def from_ors(
         cls,
@@ -56,15 +104,17 @@ class Route:
         distance_m = summary.get("distance", 0)
         distance_km = round(distance_m / 1000, 1)
 
-        direction_labels = {"north": "север", "east": "восток", "south": "юг", "west": "запад"}
-        dir_label = direction_labels.get(direction, "")
+        # direction: "north" или "<форма>-<азимут>" (services/loop_generator.py)
+        shape, _, bearing = direction.rpartition("-")
+        dir_label = DIRECTION_LABELS.get(bearing, "")
 
         name = f"Маршрут от центра ({distance_km} км)"
         if dir_label:
-            name = f"Маршрут на {dir_label} ({distance_km} км)"
+            kind = SHAPE_LABELS.get(shape, SHAPE_LABELS[""])
+            name = f"{kind} на {dir_label} ({distance_km} км)"
 
         description = f"Круговой маршрут от центра города. Дистанция {distance_km} км."
-        features = [surface_type, "динамический маршрут"]
+        features = (surface_type, "динамический маршрут")
 
         geometry = route_data.get("geometry", {}).get("coordinates", [])
         map_link = build_route_map_link(geometry) if geometry else None
@@ -80,4 +130,5 @@ class Route:
             description=description,
             features=features,
             map_link=map_link,
+            start=tuple(geometry[0][:2]) if geometry else None,
         )
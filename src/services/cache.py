@@ -0,0 +1,198 @@
+"""
+Кэши для ответов внешних сервисов.
+In-memory LRU с TTL и хранилище на SQLite, переживающее перезапуски.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Маркер промаха: None — допустимое закэшированное значение (negative cache)
+MISSING: Any = object()
+
+
+def json_dumps(value: Any) -> str:
+    """Компактная JSON-сериализация (для хранения и оценки размера записи)."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class LRUCache:
+    """
+    In-memory LRU-кэш с TTL для каждой записи.
+
+    Ограничивается числом записей и (опционально) суммарным размером в байтах;
+    размер записи передаёт вызывающий код.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evictions = 0
+        self._data: OrderedDict[str, tuple[Any, float, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        """Значение по ключу или MISSING (нет записи или истёк TTL)."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            value, expires_at, size = item
+            if expires_at <= time.time():
+                del self._data[key]
+                self.total_bytes -= size
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def contains(self, key: str) -> bool:
+        """Есть ли живая запись (без обновления порядка LRU)."""
+        with self._lock:
+            item = self._data.get(key)
+        return item is not None and item[1] > time.time()
+
+    def set(self, key: str, value: Any, ttl: float, size: int = 0) -> None:
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[2]
+            self._data[key] = (value, time.time() + ttl, size)
+            self.total_bytes += size
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None
+                and self.total_bytes > self.max_bytes
+                and len(self._data) > 1
+            ):
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
+
+
+class SQLiteStore:
+    """
+    Key-value хранилище с TTL на SQLite.
+
+    Значения хранятся как JSON; при compress=True — как zlib-сжатый JSON (BLOB).
+    """
+
+    def __init__(self, path: Path, table: str = "cache", compress: bool = False):
+        self.path = Path(path)
+        self.table = table
+        self.compress = compress
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открыть базу при первом обращении (вызывается под self._lock)."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            with self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                    "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+                )
+        return self._conn
+
+    def get(self, key: str) -> tuple[Any, float]:
+        """(значение, expires_at) или (MISSING, 0) при промахе/истёкшей записи."""
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return MISSING, 0.0
+        return self._decode(row[0]), row[1]
+
+    def contains(self, key: str) -> bool:
+        """Есть ли живая запись (значение не читается и не распаковывается)."""
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, tuple[Any, float]]:
+        """Найденные живые ключи -> (значение, expires_at) одним запросом."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT key, value, expires_at FROM {self.table} WHERE key IN ({placeholders})",
+                keys,
+            ).fetchall()
+        now = time.time()
+        return {
+            key: (self._decode(value), expires_at)
+            for key, value, expires_at in rows
+            if expires_at > now
+        }
+
+    def contains_many(self, keys: Iterable[str]) -> set[str]:
+        """Ключи с живыми записями одним запросом."""
+        keys = list(keys)
+        if not keys:
+            return set()
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT key FROM {self.table} WHERE key IN ({placeholders}) AND expires_at > ?",
+                (*keys, time.time()),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, self._encode(value), time.time() + ttl),
+                )
+
+    def _encode(self, value: Any) -> Any:
+        raw = json_dumps(value)
+        if self.compress:
+            return zlib.compress(raw.encode("utf-8"), 6)
+        return raw
+
+    def _decode(self, stored: Any) -> Any:
+        if isinstance(stored, bytes):
+            stored = zlib.decompress(stored).decode("utf-8")
+        return json.loads(stored)
+
+    def purge_expired(self) -> int:
+        """Удалить истёкшие записи. Returns: число удалённых."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cur = conn.execute(
+                    f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),)
+                )
+        return cur.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
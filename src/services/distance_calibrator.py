@@ -0,0 +1,174 @@
+"""
+Калибровка дистанции круговых маршрутов по городам и азимутам.
+
+Маршрут ORS по улицам длиннее ломаной через опорные точки в stretch раз;
+stretch зависит от сети улиц города и направления. Калибратор учится на
+summary.distance уже построенных маршрутов и подсказывает detour_factor для
+следующих запросов, чтобы петля сразу выходила близкой к заказанной дистанции.
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from services.loop_generator import DETOUR_FACTOR
+
+logger = logging.getLogger(__name__)
+
+# Вес нового замера в скользящем среднем (после первых 1/ALPHA замеров)
+ALPHA = 0.3
+
+# Допустимое отклонение дистанции маршрута от заказанной (доля)
+DISTANCE_TOLERANCE = 0.15
+
+# Границы правдоподобного коэффициента: меньше 1 не бывает, больше 3 — сбой геометрии
+MIN_FACTOR = 1.0
+MAX_FACTOR = 3.0
+
+# Сохранять файл после стольких новых замеров (и при остановке)
+SAVE_EVERY = 20
+
+
+def city_key(city: str) -> str:
+    return " ".join(city.split()).casefold()
+
+
+class _Estimate:
+    """Скользящее среднее коэффициента."""
+
+    __slots__ = ("factor", "samples")
+
+    def __init__(self, factor: float = DETOUR_FACTOR, samples: int = 0):
+        self.factor = factor
+        self.samples = samples
+
+    def update(self, value: float) -> None:
+        self.samples += 1
+        weight = max(ALPHA, 1.0 / self.samples)
+        self.factor += weight * (value - self.factor)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"factor": round(self.factor, 4), "samples": self.samples}
+
+
+class DistanceCalibrator:
+    """
+    Коэффициент извилистости по (город, кандидат петли) с откатом на город.
+
+    Хранится в JSON-файле (обычно data/cache/calibration.json); без path —
+    только в памяти. Считает точность: среднее отклонение дистанции и долю
+    маршрутов в пределах допуска — до и после коррекции.
+    """
+
+    def __init__(self, path: Optional[Path] = None, tolerance: float = DISTANCE_TOLERANCE):
+        self.path = Path(path) if path else None
+        self.tolerance = tolerance
+        self._cities: dict[str, _Estimate] = {}
+        self._directions: dict[tuple[str, str], _Estimate] = {}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.routes = 0
+        self.within_tolerance = 0
+        self.abs_error_sum = 0.0
+        self.corrections = 0
+        self.load()
+
+    def factor(self, city: str, direction: str) -> float:
+        """detour_factor для нового запроса (азимут → город → значение по умолчанию)."""
+        key = city_key(city)
+        with self._lock:
+            estimate = self._directions.get((key, direction)) or self._cities.get(key)
+            return estimate.factor if estimate else DETOUR_FACTOR
+
+    @staticmethod
+    def implied_factor(target_km: float, used_factor: float, actual_km: float) -> float:
+        """Коэффициент, при котором этот маршрут вышел бы ровно target_km."""
+        # Периметр ломаной был target_km / used_factor
+        factor = actual_km * used_factor / target_km
+        return min(MAX_FACTOR, max(MIN_FACTOR, factor))
+
+    def is_off_target(self, target_km: float, actual_km: float) -> bool:
+        return abs(actual_km - target_km) > self.tolerance * target_km
+
+    def observe(
+        self,
+        city: str,
+        direction: str,
+        target_km: float,
+        used_factor: float,
+        actual_km: float,
+    ) -> float:
+        """
+        Учесть построенный маршрут.
+
+        Returns:
+            Коэффициент, подразумеваемый этим маршрутом (для коррекции)
+        """
+        if target_km <= 0 or actual_km <= 0:
+            return used_factor
+        implied = self.implied_factor(target_km, used_factor, actual_km)
+        key = city_key(city)
+        with self._lock:
+            self._directions.setdefault((key, direction), _Estimate()).update(implied)
+            self._cities.setdefault(key, _Estimate()).update(implied)
+            self._unsaved += 1
+            save = self._unsaved >= SAVE_EVERY
+        if save:
+            self.save()
+        return implied
+
+    def record_result(self, target_km: float, actual_km: float, corrected: bool) -> None:
+        """Учесть в статистике точности маршрут, отданный пользователю."""
+        with self._lock:
+            self.routes += 1
+            self.corrections += corrected
+            self.abs_error_sum += abs(actual_km - target_km) / target_km
+            self.within_tolerance += not self.is_off_target(target_km, actual_km)
+
+    def stats(self) -> dict[str, Any]:
+        """Точность дистанции по итоговым маршрутам."""
+        routes = self.routes
+        return {
+            "routes": routes,
+            "corrections": self.corrections,
+            "mean_abs_error": self.abs_error_sum / routes if routes else 0.0,
+            "within_tolerance": self.within_tolerance / routes if routes else 0.0,
+            "cities": {city: e.to_dict() for city, e in self._cities.items()},
+        }
+
+    def load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            for city, entry in data.get("cities", {}).items():
+                self._cities[city] = _Estimate(entry["factor"], entry["samples"])
+                for direction, d in entry.get("directions", {}).items():
+                    self._directions[(city, direction)] = _Estimate(d["factor"], d["samples"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Калибровка дистанции %s не прочитана: %s", self.path, e)
+
+    def save(self) -> None:
+        """Записать калибровку атомарно (временный файл + rename)."""
+        if self.path is None:
+            return
+        with self._lock:
+            cities: dict[str, dict[str, Any]] = {
+                city: {**e.to_dict(), "directions": {}} for city, e in self._cities.items()
+            }
+            for (city, direction), e in self._directions.items():
+                cities[city]["directions"][direction] = e.to_dict()
+            self._unsaved = 0
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(
+                json.dumps({"version": 1, "cities": cities}, ensure_ascii=False, indent=1),
+                encoding="utf-8",
+            )
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning("Калибровка дистанции не сохранена: %s", e)
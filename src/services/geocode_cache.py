@@ -0,0 +1,101 @@
+"""
+Кэш геокодинга OpenRouteService.
+Координаты городов не меняются, поэтому повторный геокодинг не нужен.
+"""
+
+import time
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from services.cache import MISSING, LRUCache, SQLiteStore
+
+# Срок жизни найденных координат
+GEOCODE_TTL = 30 * 24 * 3600
+
+# Срок жизни "не найдено" (negative cache) — короче, чтобы опечатки не залипали
+GEOCODE_NEGATIVE_TTL = 3600
+
+
+class GeocodeCache:
+    """
+    Двухуровневый кэш геокодинга: in-memory LRU и SQLite на диске.
+
+    Хранит и отрицательные результаты (город не найден) с отдельным TTL.
+    Ошибки сети и HTTP не кэшируются — их решает клиент. Вместо SQLite можно
+    передать store — общее хранилище реплик (services/redis_store.RedisStore).
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl: float = GEOCODE_TTL,
+        negative_ttl: float = GEOCODE_NEGATIVE_TTL,
+        max_entries: int = 1024,
+        store: Optional[Any] = None,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._memory = LRUCache(max_entries)
+        self._store = store
+        if store is None and path:
+            self._store = SQLiteStore(path, table="geocode")
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return " ".join(text.split()).casefold()
+
+    def get(self, text: str) -> Any:
+        """
+        Закэшированные координаты.
+
+        Returns:
+            (lon, lat), None для закэшированного "не найдено" или MISSING
+        """
+        key = self._key(text)
+        value = self._memory.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+
+        if self._store is None:
+            self.misses += 1
+            return MISSING
+        value, expires_at = self._store.get(key)
+        if value is MISSING:
+            self.misses += 1
+            return MISSING
+
+        self.hits += 1
+        coords = tuple(value) if value is not None else None
+        self._memory.set(key, coords, expires_at - time.time())
+        return coords
+
+    def prefetch(self, texts: Iterable[str]) -> int:
+        """
+        Поднять в память записи нескольких городов одним запросом к хранилищу.
+
+        Returns:
+            Сколько записей загружено
+        """
+        if self._store is None:
+            return 0
+        keys = [key for key in map(self._key, texts) if self._memory.get(key) is MISSING]
+        found = self._store.get_many(keys) if keys else {}
+        now = time.time()
+        for key, (value, expires_at) in found.items():
+            self._memory.set(key, tuple(value) if value is not None else None, expires_at - now)
+        return len(found)
+
+    def set(self, text: str, coords: Optional[tuple[float, float]]) -> None:
+        """Сохранить координаты (None — город не найден)."""
+        key = self._key(text)
+        ttl = self.ttl if coords is not None else self.negative_ttl
+        self._memory.set(key, coords, ttl)
+        if self._store is not None:
+            self._store.set(key, list(coords) if coords is not None else None, ttl)
+
+    def close(self) -> None:
+        if self._store is not None:
+            self._store.close()
@@ -0,0 +1,231 @@
+"""
+Локальный маршрутизатор: круговые маршруты по пешеходному графу без ORS.
+
+Повторяет интерфейс клиентов OpenRouteService (geocode, get_round_route,
+parse_surface_from_route) и формат routes[0], поэтому RouteService, кэш
+маршрутов и анализ покрытия работают с ним без изменений. Граф строится
+офлайн: python -m tools.build_walk_graph (см. services/walk_graph.py).
+"""
+
+import asyncio
+import heapq
+import logging
+import math
+from pathlib import Path
+from typing import Optional
+
+from services.loop_generator import DETOUR_FACTOR, loop_waypoints
+from services.surface_analysis import surface_shares
+from services.walk_graph import EARTH_RADIUS_M, WalkGraph
+
+logger = logging.getLogger(__name__)
+
+# Штраф за повторный проход ребра: петля предпочитает новые улицы обратному пути
+REUSE_PENALTY = 2.0
+
+# Скорость пешехода для summary.duration, м/с (как у профиля foot-walking)
+WALKING_SPEED_MS = 5 / 3.6
+
+
+class LocalRouter:
+    """
+    Синхронный маршрутизатор по WalkGraph (A* между опорными точками петли).
+
+    Потокобезопасен: граф только читается, состояние поиска локально.
+    """
+
+    def __init__(self, graph_path: Path, reuse_penalty: float = REUSE_PENALTY):
+        self.graph = WalkGraph(graph_path)
+        self.reuse_penalty = reuse_penalty
+        self._places = {
+            " ".join(name.split()).casefold(): (lon, lat)
+            for name, (lon, lat) in self.graph.places().items()
+        }
+        logger.info(
+            "Локальный граф %s: %d узлов, %d рёбер",
+            graph_path,
+            self.graph.node_count,
+            self.graph.edge_count,
+        )
+
+    def geocode(self, text: str) -> Optional[tuple[float, float]]:
+        """Название города -> (lon, lat) по местам из выгрузки OSM."""
+        return self._places.get(" ".join(text.split()).casefold())
+
+    def _shortest_path(
+        self, source: int, target: int, used_edges: set[int]
+    ) -> Optional[list[int]]:
+        """
+        A* от source до target.
+
+        Returns:
+            Индексы рёбер пути или None, если target недостижим
+        """
+        graph = self.graph
+        lon, lat, offsets = graph.lon, graph.lat, graph.offsets
+        targets, lengths = graph.targets, graph.lengths
+        # Эвристика — равнопромежуточная проекция; 0.99 держит её допустимой
+        scale = math.radians(1 / 1e7) * EARTH_RADIUS_M * 0.99
+        cos_lat = math.cos(math.radians(lat[target] / 1e7))
+        t_lon, t_lat = lon[target], lat[target]
+
+        def heuristic(node: int) -> float:
+            return scale * math.hypot((lon[node] - t_lon) * cos_lat, lat[node] - t_lat)
+
+        best = {source: 0.0}
+        # Узел -> (предыдущий узел, ребро, которым в него пришли)
+        came_from: dict[int, tuple[int, int]] = {}
+        heap = [(heuristic(source), 0.0, source)]
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == target:
+                path = []
+                while node != source:
+                    node, edge = came_from[node]
+                    path.append(edge)
+                path.reverse()
+                return path
+            if cost > best.get(node, math.inf):
+                continue
+            for edge in range(offsets[node], offsets[node + 1]):
+                weight = lengths[edge]
+                if edge in used_edges:
+                    weight *= self.reuse_penalty
+                nxt = targets[edge]
+                new_cost = cost + weight
+                if new_cost < best.get(nxt, math.inf):
+                    best[nxt] = new_cost
+                    came_from[nxt] = (node, edge)
+                    heapq.heappush(heap, (new_cost + heuristic(nxt), new_cost, nxt))
+        return None
+
+    def _edge_source(self, edge: int) -> int:
+        """Узел, из которого выходит ребро (бинарный поиск по offsets)."""
+        offsets = self.graph.offsets
+        lo, hi = 0, self.graph.node_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if offsets[mid + 1] <= edge:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _reverse_edge(self, edge: int) -> int:
+        """Встречное ребро (граф неориентированный, хранятся оба направления)."""
+        graph = self.graph
+        source, target = self._edge_source(edge), graph.targets[edge]
+        for back in range(graph.offsets[target], graph.offsets[target + 1]):
+            if graph.targets[back] == source:
+                return back
+        return edge
+
+    def _route_dict(self, start: int, edges: list[int]) -> dict:
+        """Путь по рёбрам -> routes[0] в формате ORS (summary, extras, geometry)."""
+        graph = self.graph
+        coordinates = [list(graph.coord(start))]
+        values: list[list[int]] = []
+        distance = 0.0
+        for i, edge in enumerate(edges):
+            distance += graph.lengths[edge]
+            coordinates.append(list(graph.coord(graph.targets[edge])))
+            surface = graph.surface[edge]
+            # Соседние рёбра с одинаковым покрытием — один сегмент extras
+            if values and values[-1][2] == surface:
+                values[-1][1] = i + 1
+            else:
+                values.append([i, i + 1, surface])
+        return {
+            "summary": {
+                "distance": round(distance, 1),
+                "duration": round(distance / WALKING_SPEED_MS, 1),
+            },
+            "extras": {"surface": {"values": values}},
+            "geometry": {"coordinates": coordinates},
+        }
+
+    def get_round_route(
+        self,
+        lon: float,
+        lat: float,
+        distance_km: float,
+        direction: str = "north",
+        detour_factor: float = DETOUR_FACTOR,
+    ) -> Optional[dict]:
+        """
+        Круговой маршрут по графу (см. OpenRouteService.get_round_route).
+
+        Опорные точки петли привязываются к ближайшим узлам и соединяются
+        кратчайшими путями; уже пройденные рёбра дороже, чтобы обратный путь
+        по возможности шёл другими улицами.
+        """
+        nodes = []
+        for point_lon, point_lat in loop_waypoints(lon, lat, distance_km, direction, detour_factor):
+            node = self.graph.nearest_node(point_lon, point_lat)
+            if node is None:
+                logger.warning("Локальный граф: нет узлов около %.5f, %.5f", point_lon, point_lat)
+                return None
+            if not nodes or nodes[-1] != node:
+                nodes.append(node)
+        if len(nodes) < 2:
+            return None
+
+        edges: list[int] = []
+        used: set[int] = set()
+        for source, target in zip(nodes, nodes[1:]):
+            leg = self._shortest_path(source, target, used)
+            if leg is None:
+                logger.warning("Локальный граф: нет пути для петли %s", direction)
+                return None
+            edges.extend(leg)
+            used.update(leg)
+            used.update(self._reverse_edge(edge) for edge in leg)
+        return self._route_dict(nodes[0], edges)
+
+    def parse_surface_from_route(self, route: dict) -> dict[str, float]:
+        """Доли типов поверхности продукта (см. OpenRouteService)."""
+        return surface_shares([route])[0]
+
+    def close(self) -> None:
+        self.graph.close()
+
+
+class AsyncLocalRouter:
+    """
+    Асинхронная обёртка LocalRouter с интерфейсом AsyncOpenRouteService.
+
+    Поиск пути — работа CPU, поэтому он выполняется в пуле потоков и не
+    блокирует event loop.
+    """
+
+    def __init__(self, router: LocalRouter):
+        self.router = router
+        self._started = False
+
+    @property
+    def is_started(self) -> bool:
+        return self._started
+
+    async def start(self) -> None:
+        self._started = True
+
+    async def aclose(self) -> None:
+        self._started = False
+
+    async def geocode(self, text: str) -> Optional[tuple[float, float]]:
+        return self.router.geocode(text)
+
+    async def get_round_route(
+        self,
+        lon: float,
+        lat: float,
+        distance_km: float,
+        direction: str = "north",
+        detour_factor: float = DETOUR_FACTOR,
+    ) -> Optional[dict]:
+        return await asyncio.to_thread(
+            self.router.get_round_route, lon, lat, distance_km, direction, detour_factor
+        )
+
+    def parse_surface_from_route(self, route: dict) -> dict[str, float]:
+        return self.router.parse_surface_from_route(route)
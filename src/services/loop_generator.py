@@ -0,0 +1,227 @@
+"""
+Генерация кандидатов кругового маршрута для ORS Directions.
+
+Опорные точки считаются геодезически (сфера), поэтому форма и длина петли
+не зависят от широты города. Кандидат задаётся строкой direction:
+
+    "north", "northeast", ...      — туда-обратно по азимуту
+    "triangle-east", "square-b30"  — петля-многоугольник, центр которой лежит по азимуту
+
+Строка direction остаётся ключом кэша маршрутов и базы предрасчёта, поэтому
+прежние "north"/"east"/"south"/"west" сохраняют смысл.
+"""
+
+import logging
+import math
+import threading
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Маршрут по улицам длиннее ломаной через опорные точки
+DETOUR_FACTOR = 1.3
+
+COMPASS = {
+    "north": 0.0,
+    "northeast": 45.0,
+    "east": 90.0,
+    "southeast": 135.0,
+    "south": 180.0,
+    "southwest": 225.0,
+    "west": 270.0,
+    "northwest": 315.0,
+}
+_COMPASS_BY_BEARING = {bearing: name for name, bearing in COMPASS.items()}
+
+# Форма -> число сторон (out-back — отрезок туда и обратно)
+SHAPES = {"out-back": 2, "triangle": 3, "square": 4}
+DEFAULT_SHAPE = "out-back"
+
+DEFAULT_BEARINGS = 8
+DEFAULT_SHAPES = ("out-back", "triangle", "square")
+
+
+@dataclass(frozen=True)
+class LoopCandidate:
+    """Кандидат петли: форма, азимут и имя для ORS/кэша."""
+
+    shape: str
+    bearing: float
+
+    @property
+    def direction(self) -> str:
+        return format_direction(self.shape, self.bearing)
+
+
+def destination_point(
+    lon: float, lat: float, bearing_deg: float, distance_km: float
+) -> tuple[float, float]:
+    """Точка на distance_km от (lon, lat) по азимуту bearing_deg (по большому кругу)."""
+    phi1 = math.radians(lat)
+    lambda1 = math.radians(lon)
+    theta = math.radians(bearing_deg)
+    delta = distance_km / EARTH_RADIUS_KM
+
+    sin_phi2 = math.sin(phi1) * math.cos(delta) + math.cos(phi1) * math.sin(delta) * math.cos(theta)
+    phi2 = math.asin(max(-1.0, min(1.0, sin_phi2)))
+    lambda2 = lambda1 + math.atan2(
+        math.sin(theta) * math.sin(delta) * math.cos(phi1),
+        math.cos(delta) - math.sin(phi1) * sin_phi2,
+    )
+    lon2 = (math.degrees(lambda2) + 540.0) % 360.0 - 180.0
+    return lon2, math.degrees(phi2)
+
+
+def format_direction(shape: str, bearing: float) -> str:
+    """Имя кандидата: "northeast", "triangle-south", "square-b22.5"."""
+    bearing = bearing % 360.0
+    name = _COMPASS_BY_BEARING.get(bearing, f"b{bearing:g}")
+    return name if shape == DEFAULT_SHAPE else f"{shape}-{name}"
+
+
+def parse_direction(direction: str) -> tuple[str, float]:
+    """
+    Разобрать имя кандидата в (форма, азимут).
+
+    Неизвестное имя трактуется как "north", как и раньше, с предупреждением в лог.
+    """
+    shape, _, name = direction.rpartition("-")
+    if shape not in SHAPES:
+        shape, name = DEFAULT_SHAPE, direction
+    if name in COMPASS:
+        return shape, COMPASS[name]
+    if name.startswith("b"):
+        try:
+            return shape, float(name[1:]) % 360.0
+        except ValueError:
+            pass
+    logger.warning("Неизвестный кандидат петли %r — азимут north", direction)
+    return shape, COMPASS["north"]
+
+
+def loop_waypoints(
+    lon: float,
+    lat: float,
+    distance_km: float,
+    direction: str,
+    detour_factor: float = DETOUR_FACTOR,
+) -> list[list[float]]:
+    """
+    Опорные точки петли [[lon, lat], ...] от старта обратно к старту.
+
+    Периметр ломаной — distance_km / detour_factor, чтобы маршрут по улицам
+    получился близким к заказанной дистанции. Многоугольник правильный,
+    старт — одна из вершин, обход по часовой стрелке.
+    """
+    shape, bearing = parse_direction(direction)
+    sides = SHAPES[shape]
+    side_km = distance_km / detour_factor / sides
+    if sides == 2:
+        far = destination_point(lon, lat, bearing, side_km)
+        return [[lon, lat], list(far), [lon, lat]]
+
+    # Начальный курс выбран так, чтобы центр многоугольника лежал по азимуту bearing
+    heading = bearing - (90.0 - 180.0 / sides)
+    points = [[lon, lat]]
+    cur_lon, cur_lat = lon, lat
+    for _ in range(sides - 1):
+        cur_lon, cur_lat = destination_point(cur_lon, cur_lat, heading, side_km)
+        points.append([cur_lon, cur_lat])
+        heading += 360.0 / sides
+    points.append([lon, lat])
+    return points
+
+
+def generate_candidates(
+    bearings: int = DEFAULT_BEARINGS,
+    shapes: Iterable[str] = DEFAULT_SHAPES,
+) -> list[LoopCandidate]:
+    """
+    Все кандидаты: shapes × bearings азимутов через 360/bearings.
+
+    Порядок по умолчанию разносит азимуты: сначала стороны света, затем
+    промежуточные (для 8 азимутов: N, E, S, W, NE, SE, SW, NW).
+    """
+    step = 360.0 / bearings
+    order = sorted((i * step for i in range(bearings)), key=lambda b: (_spread_rank(b), b))
+    return [LoopCandidate(shape, bearing) for shape in shapes for bearing in order]
+
+
+def _spread_rank(bearing: float) -> int:
+    """0 — сторона света, 1 — промежуточное направление, 2 — прочие азимуты."""
+    if bearing % 90.0 == 0:
+        return 0
+    return 1 if bearing % 45.0 == 0 else 2
+
+
+class LoopPlanner:
+    """
+    Выбор кандидатов петли до сетевых запросов.
+
+    Запоминает доли поверхностей, полученные по каждому кандидату вокруг
+    точки старта, и на следующих поисках ставит первыми кандидатов, уже
+    лежащих в кэше (бесплатно), затем — с лучшей долей нужной поверхности.
+    Неопробованные получают нейтральную оценку prior и идут в порядке
+    разнесённых азимутов. Так бюджет Directions тратится на вероятные попадания.
+    """
+
+    def __init__(
+        self,
+        bearings: int = DEFAULT_BEARINGS,
+        shapes: Iterable[str] = DEFAULT_SHAPES,
+        prior: float = 0.5,
+        coord_precision: int = 2,
+    ):
+        self.candidates = generate_candidates(bearings, shapes)
+        self.prior = prior
+        self.coord_precision = coord_precision
+        self._shares: dict[tuple[float, float, str], dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _origin(self, lon: float, lat: float) -> tuple[float, float]:
+        return round(lon, self.coord_precision), round(lat, self.coord_precision)
+
+    def record(
+        self, lon: float, lat: float, direction: str, surface_share: dict[str, float]
+    ) -> None:
+        """
+        Запомнить доли поверхностей кандидата direction у старта (lon, lat).
+
+        Дистанция в ключ не входит: покрытие по азимуту от центра меняется
+        с дистанцией медленно, а оценка нужна лишь для порядка кандидатов.
+        """
+        with self._lock:
+            self._shares[(*self._origin(lon, lat), direction)] = surface_share
+
+    def score(self, lon: float, lat: float, direction: str, surface_type: str) -> float:
+        """Ожидаемая доля surface_type по кандидату (prior, если он не опробован)."""
+        share: Optional[dict[str, float]] = self._shares.get((*self._origin(lon, lat), direction))
+        return self.prior if share is None else share.get(surface_type, 0.0)
+
+    def plan(
+        self,
+        lon: float,
+        lat: float,
+        surface_type: str,
+        budget: int,
+        cached: Iterable[str] = (),
+    ) -> list[str]:
+        """
+        Имена кандидатов одного поиска в порядке убывания ожидаемой пользы.
+
+        Args:
+            budget: Сколько кандидатов оценить за поиск
+            cached: Кандидаты, ответ по которым уже есть в кэше маршрутов;
+                они бесплатны и идут первыми
+        """
+        cached = set(cached)
+        directions = [c.direction for c in self.candidates]
+        free = [d for d in directions if d in cached]
+        paid = sorted(
+            (d for d in directions if d not in cached),
+            key=lambda d: -self.score(lon, lat, d, surface_type),
+        )
+        return (free + paid)[:budget]
@@ -0,0 +1,327 @@
+"""
+Метрики бота в текстовом формате Prometheus.
+
+Счётчики и гистограммы — простые объекты в памяти процесса: запись — это
+несколько сложений и бинарный поиск корзины, без блокировок и аллокаций.
+Дочерние метрики с метками кэшируются, поэтому на горячем пути меток не
+разбирают. Показатели, которые уже считаются в других местах (кэши), не
+дублируются: они читаются функциями-сборщиками только при запросе /metrics.
+
+Эндпоинт поднимает MetricsServer (asyncio, без зависимостей) на METRICS_PORT
+рядом с портом run_webhook.
+"""
+
+import abc
+import asyncio
+import functools
+import logging
+import math
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Iterable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# Корзины задержек, секунды: от обработчика без сети до медленного ответа ORS
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+T = TypeVar("T")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(abc.ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Any] = {}
+
+    def labels(self, *values: str) -> Any:
+        """Дочерняя метрика для значений меток (создаётся один раз и кэшируется)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: ожидались метки {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self) -> Any:
+        """Новая дочерняя метрика для одного набора значений меток."""
+
+    @abc.abstractmethod
+    def _samples(self) -> Iterable[str]:
+        """Строки значений в текстовом формате Prometheus."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Монотонный счётчик."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def _samples(self) -> Iterable[str]:
+        for values, child in self._children.items():
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        # counts[i] — наблюдения в (buckets[i-1], buckets[i]]; последний — выше всех границ
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными корзинами (кумулятивные только при выводе)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def _samples(self) -> Iterable[str]:
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                labels = _format_labels(self.labelnames, values, le)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+class CallbackMetric(_Metric):
+    """
+    Значение читается функцией при каждом запросе /metrics (kind — gauge или counter).
+
+    Для показателей, которые уже считает другой объект (например, кэш):
+    на горячем пути ничего не пишется.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        kind: str = "gauge",
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+
+    def track(self, values: tuple[str, ...], func: Callable[[], float]) -> None:
+        self._children[values] = func
+
+    def _new_child(self) -> Any:
+        raise TypeError(f"{self.name}: значения задаются через track(), а не labels()")
+
+    def _samples(self) -> Iterable[str]:
+        for values, func in self._children.items():
+            try:
+                value = func()
+            except Exception as e:  # сбор метрик не должен ронять /metrics
+                logger.warning("Метрика %s%s не собрана: %s", self.name, values, e)
+                continue
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}"
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+HANDLER_SECONDS: Histogram = REGISTRY.register(
+    Histogram("bot_handler_seconds", "Время обработчиков бота, с", ["handler"])
+)
+ORS_REQUEST_SECONDS: Histogram = REGISTRY.register(
+    Histogram("ors_request_seconds", "Время запросов к ORS, с", ["endpoint"])
+)
+ORS_RESPONSES: Counter = REGISTRY.register(
+    Counter(
+        "ors_responses_total",
+        "Ответы ORS по HTTP-статусу (error — сетевая ошибка)",
+        ["endpoint", "status"],
+    )
+)
+ORS_RATE_LIMITED: Counter = REGISTRY.register(
+    Counter(
+        "ors_rate_limited_total",
+        "Отказы по квоте ORS: http_429 — ответ сервера, quota — локальная очередь",
+        ["endpoint", "reason"],
+    )
+)
+SEARCHES: Counter = REGISTRY.register(
+    Counter(
+        "route_searches_total",
+        "Поиски по источнику ответа (precomputed, ors, json, nearby, cached)",
+        ["source"],
+    )
+)
+SEARCH_QUEUE_WAIT_SECONDS: Histogram = REGISTRY.register(
+    Histogram("search_queue_wait_seconds", "Ожидание поиска в очереди SearchExecutor, с")
+)
+SEARCH_REJECTED: Counter = REGISTRY.register(
+    Counter("search_rejected_total", "Поиски, отклонённые при заполненной очереди")
+)
+SEARCH_QUEUE_DEPTH: CallbackMetric = REGISTRY.register(
+    CallbackMetric("search_queue_depth", "Поисков в очереди SearchExecutor")
+)
+CACHE_HITS: CallbackMetric = REGISTRY.register(
+    CallbackMetric("cache_hits_total", "Попадания в кэш", ["cache"], kind="counter")
+)
+CACHE_MISSES: CallbackMetric = REGISTRY.register(
+    CallbackMetric("cache_misses_total", "Промахи кэша", ["cache"], kind="counter")
+)
+CACHE_HIT_RATIO: CallbackMetric = REGISTRY.register(
+    CallbackMetric("cache_hit_ratio", "Доля попаданий в кэш с запуска", ["cache"])
+)
+
+
+def track_cache(name: str, cache: Any) -> None:
+    """Показывать в /metrics счётчики кэша (атрибуты hits и misses)."""
+    CACHE_HITS.track((name,), lambda: cache.hits)
+    CACHE_MISSES.track((name,), lambda: cache.misses)
+    CACHE_HIT_RATIO.track(
+        (name,),
+        lambda: cache.hits / (cache.hits + cache.misses) if cache.hits + cache.misses else 0.0,
+    )
+
+
+def observe_ors(endpoint: str, started: float, status: Optional[int]) -> None:
+    """Учесть запрос к ORS: задержку, статус ответа (None — сетевая ошибка) и 429."""
+    ORS_REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - started)
+    ORS_RESPONSES.labels(endpoint, str(status) if status is not None else "error").inc()
+    if status == 429:
+        ORS_RATE_LIMITED.labels(endpoint, "http_429").inc()
+
+
+def timed_handler(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Декоратор обработчика: задержка в bot_handler_seconds{handler=<имя функции>}."""
+    child = HANDLER_SECONDS.labels(func.__name__)
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            child.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+class MetricsServer:
+    """HTTP-эндпоинт GET /metrics на asyncio (один короткий ответ на соединение)."""
+
+    def __init__(self, port: int, host: str = "0.0.0.0", registry: Registry = REGISTRY):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # port=0 — свободный порт (в тестах)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Метрики Prometheus: http://%s:%d/metrics", self.host, self.port)
+
+    async def aclose(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Заголовки запроса не нужны, но их надо дочитать до пустой строки
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", self.registry.render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"Not Found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+                + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
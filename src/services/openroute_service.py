@@ -3,47 +3,32 @@
 Геокодинг и построение маршрутов для бега.
 """
 
+import importlib.util
 import logging
-from typing import Optional
+import time
+from typing import Callable, Optional
 
 import httpx
 
+from services.cache import MISSING
+from services.geocode_cache import GeocodeCache
+from services.loop_generator import DETOUR_FACTOR, loop_waypoints
+from services.metrics import observe_ors
+from services.rate_limiter import RateLimiter
+from services.surface_analysis import (  # noqa: F401 — ORS_SURFACE_ID_TO_PRODUCT реэкспорт
+    EXTRAS,
+    ORS_SURFACE_ID_TO_PRODUCT,
+    surface_shares,
+)
+
 logger = logging.getLogger(__name__)
 
 ORS_BASE = "https://api.openrouteservice.org"
-GEOCODE_URL = f"{ORS_BASE}/geocode/search"
-DIRECTIONS_URL = f"{ORS_BASE}/v2/directions/foot-walking/geojson"
-
-# ORS surface IDs: https://giscience.github.io/openrouteservice/api-reference/endpoints/directions/extra-info/surface/
-# 0=Unknown, 1=Paved, 2=Unpaved, 3=Asphalt, 4=Concrete, 8=Compacted Gravel, 10=Gravel,
-# 11=Dirt, 12=Ground, 14=Paving Stones, 17=Grass
-ORS_SURFACE_ID_TO_PRODUCT = {
-    0: "asphalt",
-    1: "asphalt",
-    2: "trail",
-    3: "asphalt",
-    4: "asphalt",
-    6: "asphalt",
-    7: "trail",
-    8: "trail",
-    10: "trail",
-    11: "trail",
-    12: "park",
-    13: "trail",
-    14: "embankment",
-    15: "trail",
-    17: "park",
-    18: "park",
-}
-
-# Направления для построения кругового маршрута (delta lat, delta lon на 1 км)
-# lat: 1 deg ≈ 111 km, lon: 1 deg ≈ 111*cos(lat) km
-DIRECTIONS = {
-    "north": (1 / 111, 0),
-    "east": (0, 1 / (111 * 0.6)),  # cos(55°) ≈ 0.6 для Москвы
-    "south": (-1 / 111, 0),
-    "west": (0, -1 / (111 * 0.6)),
-}
+GEOCODE_PATH = "/geocode/search"
+ORS_PROFILE = "foot-walking"
+DIRECTIONS_PATH = f"/v2/directions/{ORS_PROFILE}/geojson"
+GEOCODE_URL = f"{ORS_BASE}{GEOCODE_PATH}"
+DIRECTIONS_URL = f"{ORS_BASE}{DIRECTIONS_PATH}"
 
 
 class OpenRouteServiceError(Exception):
@@ -52,12 +37,155 @@ class OpenRouteServiceError(Exception):
     pass
 
 
-class OpenRouteService:
-    """Клиент OpenRouteService API."""
+def _http2_available() -> bool:
+    """HTTP/2 в httpx требует пакет h2 (httpx[http2])."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class _OpenRouteServiceBase:
+    """Общая логика клиентов ORS: параметры запросов и разбор ответов."""
 
-    def __init__(self, api_key: str, timeout: float = 15.0):
+    def __init__(
+        self,
+        api_key: str,
+        timeout: float = 15.0,
+        geocode_cache: Optional[GeocodeCache] = None,
+        base_url: str = ORS_BASE,
+        geocode_limiter: Optional[RateLimiter] = None,
+        directions_limiter: Optional[RateLimiter] = None,
+    ):
         self.api_key = api_key
         self.timeout = timeout
+        self.geocode_cache = geocode_cache
+        self.geocode_limiter = geocode_limiter
+        self.directions_limiter = directions_limiter
+        # base_url подменяется для локального ORS или заглушки (tools/ors_stub.py)
+        base_url = base_url.rstrip("/")
+        self.geocode_url = f"{base_url}{GEOCODE_PATH}"
+        self.directions_url = f"{base_url}{DIRECTIONS_PATH}"
+
+    def _cached_geocode(self, text: str):
+        """Координаты из кэша геокодинга или MISSING."""
+        if self.geocode_cache is None:
+            return MISSING
+        return self.geocode_cache.get(text)
+
+    def _store_geocode(self, text: str, coords: Optional[tuple[float, float]]) -> None:
+        if self.geocode_cache is not None:
+            self.geocode_cache.set(text, coords)
+
+    def _parse_geocode(self, text: str, data: dict) -> Optional[tuple[float, float]]:
+        """Ответ /geocode/search -> (lon, lat) первого совпадения."""
+        features = data.get("features", [])
+        if not features:
+            logger.warning("Geocode: пустой ответ для %s", text)
+            return None
+
+        coords = features[0].get("geometry", {}).get("coordinates")
+        if not coords or len(coords) < 2:
+            return None
+
+        lon, lat = float(coords[0]), float(coords[1])
+        logger.info("Geocode %s -> (%.4f, %.4f)", text, lon, lat)
+        return (lon, lat)
+
+    def _round_route_payload(
+        self,
+        lon: float,
+        lat: float,
+        distance_km: float,
+        direction: str,
+        detour_factor: float = DETOUR_FACTOR,
+    ) -> dict:
+        """Тело запроса Directions для кругового маршрута от центра по кандидату direction."""
+        return {
+            "coordinates": loop_waypoints(lon, lat, distance_km, direction, detour_factor),
+            "extra_info": list(EXTRAS),
+        }
+
+    def _parse_directions(self, data: dict) -> Optional[dict]:
+        """Ответ Directions -> routes[0] в плоском виде (summary, extras, geometry)."""
+        # GeoJSON: features; JSON: routes
+        routes = data.get("features") or data.get("routes", [])
+        if not routes:
+            logger.warning("ORS: пустой список маршрутов")
+            return None
+
+        feat = routes[0]
+        # GeoJSON: geometry + properties; JSON: flat
+        if "geometry" in feat and "properties" in feat:
+            props = feat["properties"]
+            return {
+                "summary": props.get("summary", {}),
+                "extras": props.get("extras", {}),
+                "geometry": {"coordinates": feat["geometry"].get("coordinates", [])},
+            }
+        return feat
+
+    def _log_http_error(self, endpoint: str, e: httpx.HTTPStatusError) -> None:
+        if e.response.status_code == 429:
+            logger.error("ORS: превышен лимит запросов (429)")
+        else:
+            logger.error("ORS %s error: %s", endpoint, e)
+
+    def parse_surface_from_route(self, route: dict) -> dict[str, float]:
+        """
+        Доля каждого типа поверхности (продукт) по сегментам маршрута.
+
+        ORS возвращает values: [[from_m, to_m, surface_id], ...]
+
+        Returns:
+            {"asphalt": 0.7, "park": 0.2, "trail": 0.1, ...}
+        """
+        return surface_shares([route])[0]
+
+    def build_map_link(self, geometry: list, center_lon: float = 0, center_lat: float = 0) -> str:
+        """Ссылка на карту. ORS geometry: [[lon, lat], ...]."""
+        if geometry and isinstance(geometry[0], (list, tuple)):
+            coords = geometry
+            if coords:
+                lat = coords[len(coords) // 2][1]
+                lon = coords[len(coords) // 2][0]
+                return f"https://www.openstreetmap.org/?mlat={lat}&mlon={lon}&zoom=14"
+        if center_lat and center_lon:
+            return f"https://www.openstreetmap.org/?mlat={center_lat}&mlon={center_lon}&zoom=14"
+        return "https://www.openstreetmap.org/"
+
+
+class OpenRouteService(_OpenRouteServiceBase):
+    """
+    Синхронный клиент OpenRouteService API (новое соединение на каждый вызов).
+
+    Лимитеры общие с AsyncOpenRouteService: ожидание квоты блокирует
+    рабочий поток, а не event loop.
+    """
+
+    @staticmethod
+    def _send(
+        endpoint: str,
+        limiter: Optional[RateLimiter],
+        send: Callable[..., httpx.Response],
+        *args,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Запрос с учётом квоты и метрик ORS (задержка и статус ответа).
+
+        Raises:
+            RateLimitExceeded: квота не освободилась до дедлайна очереди
+        """
+        if limiter is not None:
+            limiter.acquire_blocking()
+        started = time.perf_counter()
+        try:
+            resp = send(*args, **kwargs)
+        except httpx.RequestError:
+            observe_ors(endpoint, started, None)
+            raise
+        observe_ors(endpoint, started, resp.status_code)
+        if resp.status_code == 429 and limiter is not None:
+            limiter.on_rate_limited()
+        return resp
 
     def geocode(self, text: str) -> Optional[tuple[float, float]]:
         """
@@ -69,153 +197,221 @@ class OpenRouteService:
         Returns:
             (longitude, latitude) или None при ошибке
         """
+        cached = self._cached_geocode(text)
+        if cached is not MISSING:
+            return cached
+
         try:
             with httpx.Client(timeout=self.timeout) as client:
-                resp = client.get(
-                    GEOCODE_URL,
+                resp = self._send(
+                    "geocode",
+                    self.geocode_limiter,
+                    client.get,
+                    self.geocode_url,
                     params={"api_key": self.api_key, "text": text},
                 )
                 resp.raise_for_status()
                 data = resp.json()
-
-            features = data.get("features", [])
-            if not features:
-                logger.warning("Geocode: пустой ответ для %s", text)
-                return None
-
-            coords = features[0].get("geometry", {}).get("coordinates")
-            if not coords or len(coords) < 2:
-                return None
-
-            lon, lat = float(coords[0]), float(coords[1])
-            logger.info("Geocode %s -> (%.4f, %.4f)", text, lon, lat)
-            return (lon, lat)
+            coords = self._parse_geocode(text, data)
+            self._store_geocode(text, coords)
+            return coords
 
         except httpx.HTTPStatusError as e:
-            if e.response.status_code == 429:
-                logger.error("ORS: превышен лимит запросов (429)")
-            else:
-                logger.error("ORS geocode error: %s", e)
+            self._log_http_error("geocode", e)
             return None
         except (httpx.RequestError, KeyError, ValueError) as e:
             logger.error("ORS geocode error: %s", e)
             return None
 
-    def _point_at_distance(
-        self, lon: float, lat: float, distance_km: float, direction: str
-    ) -> tuple[float, float]:
-        """Точка в direction на distance_km от (lon, lat)."""
-        dlat, dlon = DIRECTIONS.get(direction, DIRECTIONS["north"])
-        half = distance_km / 2
-        delta_lat = dlat * half
-        delta_lon = dlon * half
-        return (lon + delta_lon, lat + delta_lat)
-
     def get_round_route(
         self,
         lon: float,
         lat: float,
         distance_km: float,
         direction: str = "north",
+        detour_factor: float = DETOUR_FACTOR,
     ) -> Optional[dict]:
         """
-        Построить круговой маршрут: центр -> точка -> центр.
+        Построить круговой маршрут от центра и обратно.
 
         Args:
             lon, lat: Координаты центра
             distance_km: Желаемая дистанция в км
-            direction: Направление (north, east, south, west)
+            direction: Кандидат петли ("north", "triangle-east", ...)
+            detour_factor: Во сколько раз маршрут по улицам длиннее ломаной
 
         Returns:
             Ответ ORS API (routes[0]) или None
         """
-        mid_lon, mid_lat = self._point_at_distance(lon, lat, distance_km, direction)
-        coordinates = [[lon, lat], [mid_lon, mid_lat], [lon, lat]]
-
         try:
             with httpx.Client(timeout=self.timeout) as client:
-                resp = client.post(
-                    DIRECTIONS_URL,
+                resp = self._send(
+                    "directions",
+                    self.directions_limiter,
+                    client.post,
+                    self.directions_url,
                     params={"api_key": self.api_key},
-                    json={
-                        "coordinates": coordinates,
-                        "extra_info": ["surface"],
-                    },
+                    json=self._round_route_payload(lon, lat, distance_km, direction, detour_factor),
                 )
                 resp.raise_for_status()
                 data = resp.json()
-
-            # GeoJSON: features; JSON: routes
-            routes = data.get("features") or data.get("routes", [])
-            if not routes:
-                logger.warning("ORS: пустой список маршрутов")
-                return None
-
-            feat = routes[0]
-            # GeoJSON: geometry + properties; JSON: flat
-            if "geometry" in feat and "properties" in feat:
-                props = feat["properties"]
-                return {
-                    "summary": props.get("summary", {}),
-                    "extras": props.get("extras", {}),
-                    "geometry": {"coordinates": feat["geometry"].get("coordinates", [])},
-                }
-            return feat
+            return self._parse_directions(data)
 
         except httpx.HTTPStatusError as e:
-            if e.response.status_code == 429:
-                logger.error("ORS: превышен лимит запросов (429)")
-            else:
-                logger.error("ORS directions error: %s", e)
+            self._log_http_error("directions", e)
             return None
         except (httpx.RequestError, KeyError) as e:
             logger.error("ORS directions error: %s", e)
             return None
 
-    def parse_surface_from_route(self, route: dict) -> dict[str, float]:
+
+class AsyncOpenRouteService(_OpenRouteServiceBase):
+    """
+    Асинхронный клиент OpenRouteService API.
+
+    Держит один долгоживущий httpx.AsyncClient с пулом keep-alive соединений
+    (и HTTP/2, если установлен пакет h2). Открывается через start() и
+    закрывается через aclose() — обычно в post_init/post_shutdown Application.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        timeout: float = 15.0,
+        geocode_cache: Optional[GeocodeCache] = None,
+        base_url: str = ORS_BASE,
+        geocode_limiter: Optional[RateLimiter] = None,
+        directions_limiter: Optional[RateLimiter] = None,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        super().__init__(
+            api_key, timeout, geocode_cache, base_url, geocode_limiter, directions_limiter
+        )
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def is_started(self) -> bool:
+        return self._client is not None and not self._client.is_closed
+
+    async def start(self) -> None:
+        """Открыть пул соединений (повторный вызов ничего не делает)."""
+        if self.is_started:
+            return
+        http2 = self._transport is None and _http2_available()
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=self.limits,
+            http2=http2,
+            transport=self._transport,
+        )
+        logger.info("ORS: async-клиент запущен (http2=%s)", http2)
+
+    async def aclose(self) -> None:
+        """Закрыть пул соединений."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("ORS: async-клиент остановлен")
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        if not self.is_started:
+            await self.start()
+        return self._client
+
+    async def _request(
+        self, endpoint: str, limiter: Optional[RateLimiter], method: str, url: str, **kwargs
+    ) -> httpx.Response:
         """
-        Доля каждого типа поверхности (продукт) по сегментам маршрута.
+        Запрос через общий пул с учётом квоты и метрик ORS.
 
-        ORS возвращает values: [[from_m, to_m, surface_id], ...]
+        Время ожидания в очереди лимитера в ors_request_seconds не входит.
 
-        Returns:
-            {"asphalt": 0.7, "park": 0.2, "trail": 0.1, ...}
+        Raises:
+            RateLimitExceeded: квота не освободилась до дедлайна очереди
+            httpx.HTTPStatusError: ответ 4xx/5xx
+        """
+        client = await self._get_client()
+        if limiter is not None:
+            await limiter.acquire()
+        started = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kwargs)
+        except httpx.RequestError:
+            observe_ors(endpoint, started, None)
+            raise
+        observe_ors(endpoint, started, resp.status_code)
+        if resp.status_code == 429 and limiter is not None:
+            limiter.on_rate_limited()
+        resp.raise_for_status()
+        return resp
+
+    async def geocode(self, text: str) -> Optional[tuple[float, float]]:
         """
-        result: dict[str, float] = {}
-        segments = route.get("extras", {}).get("surface", {}).get("values", [])
-        if not segments:
-            return {"asphalt": 1.0}
+        Асинхронный геокодинг: название города -> (lon, lat) или None.
 
-        total_length = 0.0
-        for seg in segments:
-            if len(seg) >= 2:
-                total_length += seg[1] - seg[0]
+        Raises:
+            RateLimitExceeded: квота geocode не освободилась до дедлайна
+        """
+        cached = self._cached_geocode(text)
+        if cached is not MISSING:
+            return cached
 
-        length_by_product: dict[str, float] = {}
-        for seg in segments:
-            if len(seg) < 3:
-                continue
-            length = seg[1] - seg[0]
-            surface_id = seg[2] if isinstance(seg[2], int) else 0
-            product = ORS_SURFACE_ID_TO_PRODUCT.get(surface_id, "asphalt")
-            length_by_product[product] = length_by_product.get(product, 0) + length
+        try:
+            resp = await self._request(
+                "geocode",
+                self.geocode_limiter,
+                "GET",
+                self.geocode_url,
+                params={"api_key": self.api_key, "text": text},
+            )
+            coords = self._parse_geocode(text, resp.json())
+            self._store_geocode(text, coords)
+            return coords
 
-        if total_length <= 0:
-            return {"asphalt": 1.0}
+        except httpx.HTTPStatusError as e:
+            self._log_http_error("geocode", e)
+            return None
+        except (httpx.RequestError, KeyError, ValueError) as e:
+            logger.error("ORS geocode error: %s", e)
+            return None
 
-        for product, length in length_by_product.items():
-            result[product] = length / total_length
+    async def get_round_route(
+        self,
+        lon: float,
+        lat: float,
+        distance_km: float,
+        direction: str = "north",
+        detour_factor: float = DETOUR_FACTOR,
+    ) -> Optional[dict]:
+        """
+        Асинхронно построить круговой маршрут (см. OpenRouteService.get_round_route).
 
-        return result
+        Raises:
+            RateLimitExceeded: квота directions не освободилась до дедлайна
+        """
+        try:
+            resp = await self._request(
+                "directions",
+                self.directions_limiter,
+                "POST",
+                self.directions_url,
+                params={"api_key": self.api_key},
+                json=self._round_route_payload(lon, lat, distance_km, direction, detour_factor),
+            )
+            return self._parse_directions(resp.json())
 
-    def build_map_link(self, geometry: list, center_lon: float = 0, center_lat: float = 0) -> str:
-        """Ссылка на карту. ORS geometry: [[lon, lat], ...]."""
-        if geometry and isinstance(geometry[0], (list, tuple)):
-            coords = geometry
-            if coords:
-                lat = coords[len(coords) // 2][1]
-                lon = coords[len(coords) // 2][0]
-                return f"https://www.openstreetmap.org/?mlat={lat}&mlon={lon}&zoom=14"
-        if center_lat and center_lon:
-            return f"https://www.openstreetmap.org/?mlat={center_lat}&mlon={center_lon}&zoom=14"
-        return "https://www.openstreetmap.org/"
+        except httpx.HTTPStatusError as e:
+            self._log_http_error("directions", e)
+            return None
+        except (httpx.RequestError, KeyError, ValueError) as e:
+            logger.error("ORS directions error: %s", e)
+            return None
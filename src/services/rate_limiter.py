@@ -0,0 +1,156 @@
+"""
+Ограничение частоты запросов к OpenRouteService.
+Token bucket по минутной и суточной квоте с очередью ожидания до дедлайна.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional
+
+from services.metrics import ORS_RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+# Квоты бесплатного тарифа ORS: https://openrouteservice.org/plans/
+DIRECTIONS_PER_MINUTE = 40
+DIRECTIONS_PER_DAY = 2000
+GEOCODE_PER_MINUTE = 100
+GEOCODE_PER_DAY = 1000
+
+# Сколько запрос может ждать своей очереди, секунды
+QUEUE_TIMEOUT = 10.0
+
+
+class RateLimitExceeded(Exception):
+    """Квота ORS исчерпана: запрос не дождался своей очереди до дедлайна."""
+
+    pass
+
+
+class TokenBucket:
+    """Token bucket: capacity токенов, пополнение rate токенов в секунду."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        """Сколько секунд ждать до появления токена (0 — есть сейчас)."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        self._refill()
+        self.tokens -= 1
+
+    def drain(self) -> None:
+        """Обнулить токены (сервер уже ответил 429)."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RateLimiter:
+    """
+    Лимитер одного эндпоинта ORS: минутная и суточная квоты.
+
+    Запросы сверх квоты встают в FIFO-очередь и ждут токен; если токен
+    не успевает появиться до дедлайна, сразу бросается RateLimitExceeded.
+    Квота общая для асинхронных запросов (acquire) и синхронного клиента
+    в рабочих потоках (acquire_blocking).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        per_minute: int,
+        per_day: int,
+        queue_timeout: float = QUEUE_TIMEOUT,
+    ):
+        self.name = name
+        self.queue_timeout = queue_timeout
+        self._buckets = [
+            TokenBucket(per_minute, per_minute / 60),
+            TokenBucket(per_day, per_day / 86400),
+        ]
+        self._lock = asyncio.Lock()
+        self._thread_lock = threading.Lock()
+        # Токены списываются и из event loop, и из рабочих потоков
+        self._buckets_lock = threading.Lock()
+        self.rejected = 0
+
+    def _try_consume(self) -> float:
+        """Списать токен, если он есть (0), иначе вернуть время ожидания, секунды."""
+        with self._buckets_lock:
+            wait = max(bucket.wait_time() for bucket in self._buckets)
+            if wait <= 0:
+                for bucket in self._buckets:
+                    bucket.consume()
+            return wait
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        """Дождаться токена не дольше timeout секунд (по умолчанию queue_timeout)."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (self.queue_timeout if timeout is None else timeout)
+
+        # asyncio.timeout, а не wait_for: в 3.11 wait_for может вернуть
+        # TimeoutError, когда внутренний acquire уже взял замок
+        acquired = False
+        try:
+            async with asyncio.timeout_at(deadline):
+                acquired = await self._lock.acquire()
+        except BaseException as e:
+            if acquired:
+                self._lock.release()
+            if isinstance(e, TimeoutError):
+                self._reject()
+            raise
+
+        try:
+            while True:
+                wait = self._try_consume()
+                if wait <= 0:
+                    return
+                if loop.time() + wait > deadline:
+                    self._reject()
+                await asyncio.sleep(wait)
+        finally:
+            self._lock.release()
+
+    def acquire_blocking(self, timeout: Optional[float] = None) -> None:
+        """То же, что acquire, для синхронного клиента: блокирует текущий поток."""
+        deadline = time.monotonic() + (self.queue_timeout if timeout is None else timeout)
+
+        if not self._thread_lock.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            self._reject()
+        try:
+            while True:
+                wait = self._try_consume()
+                if wait <= 0:
+                    return
+                if time.monotonic() + wait > deadline:
+                    self._reject()
+                time.sleep(wait)
+        finally:
+            self._thread_lock.release()
+
+    def on_rate_limited(self) -> None:
+        """ORS ответил 429 — локальная оценка квоты устарела, ждём пополнения."""
+        with self._buckets_lock:
+            self._buckets[0].drain()
+
+    def _reject(self) -> None:
+        self.rejected += 1
+        ORS_RATE_LIMITED.labels(self.name, "quota").inc()
+        logger.warning("ORS %s: квота исчерпана, запрос отклонён по дедлайну", self.name)
+        raise RateLimitExceeded(f"ORS {self.name}: превышена квота запросов")
@@ -0,0 +1,198 @@
+"""
+Общее для реплик бота хранилище кэшей в Redis.
+
+RedisStore повторяет интерфейс SQLiteStore (get/contains/set), поэтому
+GeocodeCache и RouteCache подключают его вместо файла на диске: реплики за
+одним webhook видят одни и те же координаты и маршруты. Пакетные чтения
+(get_many/contains_many) идут одним pipeline — один сетевой round-trip на
+все ключи поиска. TTL записей выставляет сам Redis.
+
+Клиент синхронный и вызывается из event loop, поэтому каждый запрос
+ограничен коротким таймаутом (REDIS_TIMEOUT), а после ошибки CircuitBreaker
+на RESET_AFTER секунд переводит хранилище в промахи без обращений к Redis:
+недоступный Redis стоит поиску не больше одного таймаута за период.
+
+Пакет redis опционален (requirements-redis.txt): без него create_redis_client
+возвращает None и бот работает с локальными кэшами.
+"""
+
+import json
+import logging
+import time
+import zlib
+from typing import Any, Iterable, Optional
+
+from services.cache import MISSING, json_dumps
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - зависит от окружения
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Общий префикс ключей бота в Redis
+KEY_PREFIX = "runbot"
+
+# Таймаут соединения и ответа Redis, сек: запросы идут из event loop
+REDIS_TIMEOUT = 0.05
+
+# Сколько секунд не обращаться к Redis после ошибки
+RESET_AFTER = 5.0
+
+# Ошибки Redis, при которых кэш деградирует в промах, а не роняет поиск
+REDIS_ERRORS: tuple[type[BaseException], ...] = (OSError,)
+if redis is not None:
+    REDIS_ERRORS = (redis.RedisError, OSError)
+
+
+def create_redis_client(
+    host: Optional[str], port: int = 6379, db: int = 0, timeout: float = REDIS_TIMEOUT
+) -> Optional[Any]:
+    """
+    Клиент Redis или None (не задан REDIS_HOST или не установлен пакет redis).
+
+    Соединение открывается при первом запросе, а не здесь.
+    """
+    if not host:
+        return None
+    if redis is None:
+        logger.warning("REDIS_HOST задан, но пакет redis не установлен (pip install -r requirements-redis.txt)")
+        return None
+    return redis.Redis(
+        host=host, port=port, db=db, socket_timeout=timeout, socket_connect_timeout=timeout
+    )
+
+
+class CircuitBreaker:
+    """
+    Размыкатель обращений к Redis: после ошибки reset_after секунд запросы не идут.
+
+    По истечении паузы пропускается один пробный запрос; успех замыкает цепь,
+    ошибка размыкает её снова.
+    """
+
+    def __init__(self, reset_after: float = RESET_AFTER):
+        self.reset_after = reset_after
+        self._open_until = 0.0
+        self.trips = 0
+        self.skipped = 0
+
+    def allow(self) -> bool:
+        """Можно ли обратиться к Redis сейчас."""
+        now = time.monotonic()
+        if now < self._open_until:
+            self.skipped += 1
+            return False
+        if self._open_until:
+            # Пробный запрос: до его результата остальные ждут следующей паузы
+            self._open_until = now + self.reset_after
+        return True
+
+    def record_success(self) -> None:
+        self._open_until = 0.0
+
+    def record_failure(self) -> None:
+        if not self._open_until:
+            self.trips += 1
+        self._open_until = time.monotonic() + self.reset_after
+
+
+class RedisStore:
+    """
+    Key-value хранилище с TTL в Redis (интерфейс SQLiteStore).
+
+    Значения — JSON; при compress=True — zlib-сжатый JSON. Клиент принадлежит
+    вызывающему коду и здесь не закрывается. Пока breaker разомкнут, чтения —
+    промахи, записи пропускаются.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        namespace: str,
+        compress: bool = False,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.client = client
+        self.prefix = f"{KEY_PREFIX}:{namespace}:"
+        self.compress = compress
+        self.breaker = breaker or CircuitBreaker()
+        self.errors = 0
+
+    def _encode(self, value: Any) -> bytes:
+        raw = json_dumps(value).encode("utf-8")
+        return zlib.compress(raw, 6) if self.compress else raw
+
+    def _decode(self, stored: bytes) -> Any:
+        if self.compress:
+            stored = zlib.decompress(stored)
+        return json.loads(stored)
+
+    @staticmethod
+    def _expires_at(pttl: int) -> float:
+        # -1 — ключ без TTL (записан не нами): считаем его живым ещё сутки
+        return time.time() + (pttl / 1000 if pttl >= 0 else 24 * 3600)
+
+    def _failed(self, operation: str, error: BaseException) -> None:
+        self.errors += 1
+        self.breaker.record_failure()
+        logger.warning("Redis %s%s: %s", self.prefix, operation, error)
+
+    def get(self, key: str) -> tuple[Any, float]:
+        """(значение, expires_at) или (MISSING, 0) при промахе."""
+        return self.get_many([key]).get(key, (MISSING, 0.0))
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, tuple[Any, float]]:
+        """Найденные ключи -> (значение, expires_at); GET и PTTL всех ключей одним pipeline."""
+        keys = list(keys)
+        if not keys or not self.breaker.allow():
+            return {}
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(self.prefix + key)
+            pipe.pttl(self.prefix + key)
+        try:
+            replies = pipe.execute()
+        except REDIS_ERRORS as e:
+            self._failed("get", e)
+            return {}
+        self.breaker.record_success()
+        found = {}
+        for i, key in enumerate(keys):
+            raw, pttl = replies[2 * i], replies[2 * i + 1]
+            if raw is not None:
+                found[key] = (self._decode(raw), self._expires_at(pttl))
+        return found
+
+    def contains(self, key: str) -> bool:
+        return bool(self.contains_many([key]))
+
+    def contains_many(self, keys: Iterable[str]) -> set[str]:
+        """Ключи с живыми записями (EXISTS одним pipeline, значения не читаются)."""
+        keys = list(keys)
+        if not keys or not self.breaker.allow():
+            return set()
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.exists(self.prefix + key)
+        try:
+            replies = pipe.execute()
+        except REDIS_ERRORS as e:
+            self._failed("exists", e)
+            return set()
+        self.breaker.record_success()
+        return {key for key, exists in zip(keys, replies) if exists}
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if not self.breaker.allow():
+            return
+        try:
+            self.client.set(self.prefix + key, self._encode(value), px=max(1, int(ttl * 1000)))
+        except REDIS_ERRORS as e:
+            self._failed("set", e)
+            return
+        self.breaker.record_success()
+
+    def close(self) -> None:
+        """Клиент общий для всех хранилищ; закрывает его владелец."""
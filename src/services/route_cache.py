@@ -0,0 +1,202 @@
+"""
+Кэш ответов ORS Directions для круговых маршрутов.
+Ответ детерминирован для центра, дистанции и направления, поэтому
+популярные запросы ("Москва, 10 км, парк") не должны ходить в ORS.
+"""
+
+import time
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from services.cache import MISSING, LRUCache, SQLiteStore, json_dumps
+
+# Срок жизни маршрута: сеть дорог меняется медленно
+ROUTE_CACHE_TTL = 7 * 24 * 3600
+
+# Бюджет памяти in-process уровня
+ROUTE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Квантование ключа: 3 знака координат (~100 м), дистанция с шагом 0.1 км
+COORD_PRECISION = 3
+DISTANCE_STEP_KM = 0.1
+
+
+def route_cache_profile(backend: str, profile: str, distance_correction: bool) -> str:
+    """
+    Поле profile ключа: всё, кроме точки, дистанции и кандидата, что меняет ответ.
+
+    backend — "ors" или локальный граф; с коррекцией дистанции в кэш попадает
+    ближайший к заказанной дистанции из двух маршрутов. Выученный калибратором
+    detour_factor в ключ не входит: он лишь приближает маршрут к дистанции,
+    которая в ключе уже есть, а его изменение после каждого замера обнуляло бы кэш.
+    """
+    mode = "corrected" if distance_correction else "raw"
+    return f"{backend}/{profile}/{mode}"
+
+
+class RouteCache:
+    """
+    Двухуровневый кэш маршрутов: LRU в памяти с вытеснением по размеру
+    и zlib-сжатое хранилище на SQLite.
+
+    Ключ — квантованные (lon, lat, distance_km, direction, profile), где
+    profile собирает route_cache_profile (источник маршрутов, профиль ORS,
+    режим коррекции дистанции).
+    Вместо SQLite можно передать store — общее хранилище реплик
+    (services/redis_store.RedisStore); кандидаты одного поиска проверяются
+    и читаются из него пакетно (contains_many, prefetch).
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl: float = ROUTE_CACHE_TTL,
+        max_bytes: int = ROUTE_CACHE_MAX_BYTES,
+        max_entries: int = 10000,
+        store: Optional[Any] = None,
+    ):
+        self.ttl = ttl
+        self._memory = LRUCache(max_entries, max_bytes=max_bytes)
+        self._store = store
+        if store is None and path:
+            self._store = SQLiteStore(path, table="routes", compress=True)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        lon: float,
+        lat: float,
+        distance_km: float,
+        direction: str,
+        profile: str,
+    ) -> str:
+        distance = round(round(distance_km / DISTANCE_STEP_KM) * DISTANCE_STEP_KM, 1)
+        return (
+            f"{profile}:{lon:.{COORD_PRECISION}f}:{lat:.{COORD_PRECISION}f}"
+            f":{distance}:{direction}"
+        )
+
+    def get(
+        self,
+        lon: float,
+        lat: float,
+        distance_km: float,
+        direction: str,
+        profile: str,
+    ) -> Any:
+        """Закэшированный routes[0] или MISSING."""
+        key = self.make_key(lon, lat, distance_km, direction, profile)
+        value = self._memory.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+
+        if self._store is not None:
+            value, expires_at = self._store.get(key)
+            if value is not MISSING:
+                self.hits += 1
+                self.disk_hits += 1
+                self._remember(key, value, expires_at - time.time())
+                return value
+
+        self.misses += 1
+        return MISSING
+
+    def contains(
+        self,
+        lon: float,
+        lat: float,
+        distance_km: float,
+        direction: str,
+        profile: str,
+    ) -> bool:
+        """Есть ли маршрут в кэше (счётчики попаданий не меняются)."""
+        key = self.make_key(lon, lat, distance_km, direction, profile)
+        if self._memory.contains(key):
+            return True
+        return self._store is not None and self._store.contains(key)
+
+    def contains_many(
+        self,
+        lon: float,
+        lat: float,
+        distance_km: float,
+        directions: Iterable[str],
+        profile: str,
+    ) -> set[str]:
+        """Направления, маршруты которых есть в кэше (одно обращение к хранилищу)."""
+        keys = {self.make_key(lon, lat, distance_km, d, profile): d for d in directions}
+        found = {d for key, d in keys.items() if self._memory.contains(key)}
+        rest = [key for key, d in keys.items() if d not in found]
+        if rest and self._store is not None:
+            found.update(keys[key] for key in self._store.contains_many(rest))
+        return found
+
+    def prefetch(
+        self,
+        lon: float,
+        lat: float,
+        distance_km: float,
+        directions: Iterable[str],
+        profile: str,
+    ) -> int:
+        """
+        Поднять в память маршруты направлений одним запросом к хранилищу,
+        чтобы последующие get() не ходили в него по одному.
+
+        Returns:
+            Сколько маршрутов загружено
+        """
+        if self._store is None:
+            return 0
+        keys = [
+            key
+            for key in (self.make_key(lon, lat, distance_km, d, profile) for d in directions)
+            if not self._memory.contains(key)
+        ]
+        found = self._store.get_many(keys) if keys else {}
+        now = time.time()
+        for key, (value, expires_at) in found.items():
+            self._remember(key, value, expires_at - now)
+        return len(found)
+
+    def set(
+        self,
+        lon: float,
+        lat: float,
+        distance_km: float,
+        direction: str,
+        profile: str,
+        route_data: dict,
+    ) -> None:
+        key = self.make_key(lon, lat, distance_km, direction, profile)
+        self._remember(key, route_data, self.ttl)
+        if self._store is not None:
+            self._store.set(key, route_data, self.ttl)
+
+    def _remember(self, key: str, route_data: dict, ttl: float) -> None:
+        """Положить маршрут в память; размер записи оценивается по JSON."""
+        self._memory.set(key, route_data, ttl, size=len(json_dumps(route_data)))
+
+    @property
+    def evictions(self) -> int:
+        return self._memory.evictions
+
+    def stats(self) -> dict[str, Any]:
+        """Счётчики кэша: попадания, промахи, вытеснения, заполненность."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._memory),
+            "bytes": self._memory.total_bytes,
+        }
+
+    def close(self) -> None:
+        if self._store is not None:
+            self._store.close()
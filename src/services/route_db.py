@@ -0,0 +1,105 @@
+"""
+База предрассчитанных маршрутов ORS.
+Заполняется офлайн (tools/precompute_routes.py), читается при поиске до живого ORS.
+"""
+
+import json
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    city TEXT NOT NULL,
+    target_km INTEGER NOT NULL,
+    direction TEXT NOT NULL,
+    distance_km REAL NOT NULL,
+    surface_share TEXT NOT NULL,
+    route_data BLOB NOT NULL,
+    PRIMARY KEY (city, target_km, direction)
+);
+"""
+
+
+class RouteDatabase:
+    """
+    SQLite-база кандидатов ORS по ключу (город, целевая дистанция, направление).
+
+    Один ответ Directions годится для всех типов поверхности, поэтому хранится
+    сам маршрут и доли поверхностей; ранжирование под запрос — при чтении.
+    Сохранённые ячейки служат чекпоинтами: повторный прогон их пропускает.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def target_km(distance_km: float) -> int:
+        """Целевая дистанция сетки (целые км) для запрошенной дистанции."""
+        return max(1, int(round(distance_km)))
+
+    def done_keys(self) -> set[tuple[str, int, str]]:
+        """Все уже обработанные ячейки сетки (для возобновления прогона)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT city, target_km, direction FROM candidates"
+            ).fetchall()
+        return {(city, target, direction) for city, target, direction in rows}
+
+    def save(
+        self,
+        city: str,
+        target_km: int,
+        direction: str,
+        route_data: dict,
+        surface_share: dict[str, float],
+    ) -> None:
+        """Сохранить маршрут ячейки сетки."""
+        distance_m = route_data.get("summary", {}).get("distance", 0)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO candidates VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    city,
+                    target_km,
+                    direction,
+                    distance_m / 1000,
+                    json.dumps(surface_share),
+                    zlib.compress(json.dumps(route_data).encode("utf-8")),
+                ),
+            )
+
+    def get_candidates(
+        self, city: str, distance_km: float
+    ) -> list[tuple[str, dict, dict[str, float]]]:
+        """
+        Кандидаты для ближайшей целевой дистанции.
+
+        Returns:
+            [(direction, route_data, surface_share), ...]
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT direction, route_data, surface_share FROM candidates "
+                "WHERE city = ? AND target_km = ? ORDER BY direction",
+                (city, self.target_km(distance_km)),
+            ).fetchall()
+        return [
+            (direction, json.loads(zlib.decompress(data)), json.loads(share))
+            for direction, data, share in rows
+        ]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,74 @@
+"""
+Индекс маршрутов для поиска по JSON-каталогу.
+Маршруты разбиты по (город, тип поверхности) и отсортированы по дистанции.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from models.route import Route
+
+
+class RouteIndex:
+    """
+    Неизменяемый индекс маршрутов.
+
+    Запрос — бинарный поиск окна допуска в отсортированном по дистанции
+    разделе и обход от точки вставки в обе стороны: ближайшие k маршрутов
+    за O(log n + k) без сортировки раздела.
+    """
+
+    def __init__(self, routes: Iterable[Route]):
+        grouped: dict[tuple[str, str], list[Route]] = defaultdict(list)
+        for route in routes:
+            grouped[(route.city, route.surface_type)].append(route)
+
+        self._partitions: dict[tuple[str, str], tuple[list[float], list[Route]]] = {}
+        self._size = 0
+        for key, items in grouped.items():
+            # Сортировка устойчива: при равной дистанции сохраняется порядок файла
+            items.sort(key=lambda r: r.distance_km)
+            self._partitions[key] = ([r.distance_km for r in items], items)
+            self._size += len(items)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def query(
+        self,
+        city: str,
+        surface_type: str,
+        distance_km: float,
+        tolerance_km: float,
+        limit: Optional[int] = None,
+    ) -> list[Route]:
+        """
+        Маршруты в окне distance_km ± tolerance_km, ближайшие к distance_km первыми.
+
+        Args:
+            limit: Максимум результатов (None — все в окне)
+        """
+        partition = self._partitions.get((city, surface_type))
+        if partition is None:
+            return []
+        distances, routes = partition
+
+        lo = bisect_left(distances, distance_km - tolerance_km)
+        hi = bisect_right(distances, distance_km + tolerance_km)
+        if limit is None:
+            limit = hi - lo
+
+        pivot = min(max(bisect_left(distances, distance_km), lo), hi)
+        left, right = pivot - 1, pivot
+        result: list[Route] = []
+        while len(result) < limit and (left >= lo or right < hi):
+            if right >= hi or (
+                left >= lo and distance_km - distances[left] <= distances[right] - distance_km
+            ):
+                result.append(routes[left])
+                left -= 1
+            else:
+                result.append(routes[right])
+                right += 1
+        return result
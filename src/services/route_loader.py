@@ -0,0 +1,232 @@
+"""
+Загрузка каталога маршрутов.
+Потоковое чтение JSON-массива или NDJSON и горячая перезагрузка по mtime.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+from models.route import Route
+from services.route_index import RouteIndex
+from services.spatial_index import SpatialIndex
+
+logger = logging.getLogger(__name__)
+
+# Размер блока чтения при потоковом разборе JSON-массива
+CHUNK_SIZE = 64 * 1024
+
+# Период проверки mtime файла маршрутов, секунды
+RELOAD_INTERVAL = 30.0
+
+NDJSON_SUFFIXES = {".ndjson", ".jsonl"}
+
+_WHITESPACE = " \t\r\n"
+
+
+def _iter_json_array(f, chunk_size: int) -> Iterator[dict]:
+    """Объекты JSON-массива по одному; в памяти держится не больше одной записи и блока."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        # Пропуск пробелов и разделителей между элементами
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE + ",":
+            if buffer[pos] == "," and not started:
+                raise ValueError("Ожидался JSON-массив маршрутов")
+            pos += 1
+
+        if pos < len(buffer):
+            char = buffer[pos]
+            if not started:
+                if char != "[":
+                    raise ValueError("Ожидался JSON-массив маршрутов")
+                started = True
+                pos += 1
+                continue
+            if char == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield record
+                buffer = buffer[end:]
+                pos = 0
+                continue
+        elif eof:
+            raise ValueError("Неожиданный конец JSON-массива маршрутов")
+
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def _iter_ndjson(f) -> Iterator[dict]:
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_route_records(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Потоково прочитать записи маршрутов из файла.
+
+    Формат: NDJSON (.ndjson, .jsonl или файл, не начинающийся с "[")
+    либо JSON-массив объектов.
+    """
+    with open(path, encoding="utf-8-sig") as f:
+        if path.suffix in NDJSON_SUFFIXES:
+            yield from _iter_ndjson(f)
+            return
+
+        head = f.read(chunk_size)
+        f.seek(0)
+        if head.lstrip(_WHITESPACE).startswith("["):
+            yield from _iter_json_array(f, chunk_size)
+        else:
+            yield from _iter_ndjson(f)
+
+
+@dataclass(frozen=True)
+class RouteSnapshot:
+    """Загруженная версия каталога: маршруты, индексы и mtime файла."""
+
+    routes: list[Route] = field(default_factory=list)
+    index: RouteIndex = field(default_factory=lambda: RouteIndex([]))
+    spatial: SpatialIndex = field(default_factory=lambda: SpatialIndex([]))
+    mtime: Optional[float] = None
+
+
+def load_snapshot(path: Path) -> RouteSnapshot:
+    """Прочитать файл маршрутов и построить индексы. Битые записи пропускаются."""
+    started = time.perf_counter()
+    mtime = path.stat().st_mtime
+    routes: list[Route] = []
+    skipped = 0
+    for record in iter_route_records(path):
+        try:
+            routes.append(Route.from_dict(record))
+        except (KeyError, IndexError, TypeError, ValueError):
+            skipped += 1
+
+    index = RouteIndex(routes)
+    spatial = SpatialIndex(routes)
+    logger.info(
+        "Загружено %d маршрутов из %s за %.0f мс (пропущено %d)",
+        len(routes),
+        path.name,
+        (time.perf_counter() - started) * 1000,
+        skipped,
+    )
+    return RouteSnapshot(routes=routes, index=index, spatial=spatial, mtime=mtime)
+
+
+class RouteDataset:
+    """
+    Каталог маршрутов с горячей перезагрузкой.
+
+    Новая версия строится целиком в фоне и подменяется одним присваиванием,
+    поэтому поиск всегда видит либо старый, либо новый каталог полностью.
+    """
+
+    def __init__(self, path: Path, reload_interval: float = RELOAD_INTERVAL):
+        self.path = Path(path)
+        self.reload_interval = reload_interval
+        self._snapshot: Optional[RouteSnapshot] = None
+        self._watch_task: Optional[asyncio.Task] = None
+        self._load_task: Optional[asyncio.Task] = None
+
+    @property
+    def snapshot(self) -> RouteSnapshot:
+        """Текущая версия каталога (загружается при первом обращении)."""
+        if self._snapshot is None:
+            self.reload()
+        return self._snapshot
+
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return self.path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def reload(self) -> bool:
+        """
+        Перечитать файл, если он изменился с прошлой загрузки.
+
+        Returns:
+            True если каталог был подменён
+        """
+        mtime = self._current_mtime()
+        if self._snapshot is not None and mtime == self._snapshot.mtime:
+            return False
+
+        if mtime is None:
+            logger.warning("Файл маршрутов не найден: %s", self.path)
+            if self._snapshot is None:
+                self._snapshot = RouteSnapshot()
+            return False
+
+        try:
+            snapshot = load_snapshot(self.path)
+        except (OSError, ValueError) as e:
+            logger.error("Ошибка загрузки маршрутов: %s", e)
+            if self._snapshot is None:
+                # Запоминаем mtime, чтобы не перечитывать битый файл на каждом поиске
+                self._snapshot = RouteSnapshot(mtime=mtime)
+            return False
+
+        self._snapshot = snapshot
+        return True
+
+    async def reload_async(self) -> bool:
+        """reload() в отдельном потоке, не блокируя event loop."""
+        return await asyncio.to_thread(self.reload)
+
+    async def load_async(self) -> RouteSnapshot:
+        """
+        Текущая версия каталога для асинхронного кода.
+
+        Первая загрузка идёт в потоке, одна на всех ожидающих (фоновый прогрев
+        и поиски до его окончания); snapshot в event loop её не повторяет.
+        """
+        if self._snapshot is None:
+            if self._load_task is None or self._load_task.done():
+                self._load_task = asyncio.ensure_future(self.reload_async())
+            await asyncio.shield(self._load_task)
+        return self._snapshot
+
+    def start_watching(self) -> None:
+        """Запустить фоновую проверку mtime (нужен запущенный event loop)."""
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def stop_watching(self) -> None:
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _watch(self) -> None:
+        while True:
+            try:
+                if await self.reload_async():
+                    logger.info("Каталог маршрутов обновлён: %s", self.path.name)
+            except Exception as e:
+                logger.exception("Ошибка перезагрузки маршрутов: %s", e)
+            await asyncio.sleep(self.reload_interval)
@@ -3,21 +3,56 @@
 Поддерживает OpenRouteService (при наличии API-ключа) и fallback на JSON.
 """
 
-import json
+import asyncio
 import logging
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Any, AsyncIterator, Callable, Iterable, Optional, Union
 
 from config.settings import Settings
 from models.route import Route
 
-from services.openroute_service import OpenRouteService
+from services.geocode_cache import GeocodeCache
+from services.cache import MISSING
+from services.distance_calibrator import DistanceCalibrator
+from services.local_router import AsyncLocalRouter, LocalRouter
+from services.loop_generator import DEFAULT_BEARINGS, DEFAULT_SHAPES, LoopPlanner
+from services.metrics import SEARCHES
+from services.openroute_service import (
+    ORS_BASE,
+    ORS_PROFILE,
+    AsyncOpenRouteService,
+    OpenRouteService,
+)
+from services.route_cache import RouteCache, route_cache_profile
+from services.rate_limiter import (
+    DIRECTIONS_PER_DAY,
+    DIRECTIONS_PER_MINUTE,
+    GEOCODE_PER_DAY,
+    GEOCODE_PER_MINUTE,
+    RateLimiter,
+    RateLimitExceeded,
+)
+from services.route_db import RouteDatabase
+from services.redis_store import RedisStore, create_redis_client
+from services.route_loader import RELOAD_INTERVAL, RouteDataset
+from services.search_executor import SEARCH_QUEUE_SIZE, SEARCH_WORKERS, SearchExecutor
+from services.search_results import MAX_RESULT_ROUTES, SearchResult, SearchResultCache
+from services.surface_analysis import surface_shares
+from services.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 # Путь к файлу маршрутов относительно корня проекта
 ROUTES_FILE = Path(__file__).resolve().parent.parent.parent / "data" / "routes.json"
 
+# База предрассчитанных маршрутов (tools/precompute_routes.py)
+ROUTES_DB_FILE = Path(__file__).resolve().parent.parent.parent / "data" / "precomputed_routes.sqlite3"
+
+# Каталог локальных кэшей по умолчанию
+CACHE_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "cache"
+
 # Типы поверхности
 SURFACE_TYPES = {
     "asphalt": "Асфальт",
@@ -32,6 +67,72 @@ CITIES = ["Москва", "Санкт-Петербург"]
 # Порог доли нужного surface для принятия маршрута (0.6 = 60%)
 SURFACE_MATCH_THRESHOLD = 0.5
 
+# Направления предрасчёта маршрутов (tools/precompute_routes.py); живой поиск
+# выбирает кандидатов через LoopPlanner
+DIRECTIONS_ORDER = ["north", "east", "south", "west"]
+
+# Сколько маршрутов ORS показывать пользователю
+MAX_ORS_RESULTS = 3
+
+# Сколько запросов Directions одного поиска выполняется одновременно
+MAX_CONCURRENT_DIRECTIONS = 4
+
+# Бюджет запросов Directions на один поиск
+MAX_DIRECTIONS_REQUESTS = 4
+
+# Сколько ближайших маршрутов каталога показывать при поиске по геопозиции
+NEARBY_LIMIT = 5
+
+
+@dataclass
+class RouteCandidate:
+    """Маршрут-кандидат ORS: ответ Directions и доли поверхностей по нему."""
+
+    direction: str
+    route_data: dict
+    surface_share: dict[str, float]
+    match_ratio: float
+
+    @property
+    def is_match(self) -> bool:
+        return self.match_ratio >= SURFACE_MATCH_THRESHOLD
+
+
+def rank_candidates(
+    candidates: list[RouteCandidate],
+    limit: int = MAX_ORS_RESULTS,
+) -> list[RouteCandidate]:
+    """
+    Отобрать лучших кандидатов по доле нужной поверхности.
+
+    Возвращает до limit кандидатов выше SURFACE_MATCH_THRESHOLD; если таких
+    нет — один лучший из имеющихся, без повторных запросов к ORS.
+    """
+    ranked = sorted(candidates, key=lambda c: -c.match_ratio)
+    matched = [c for c in ranked if c.is_match]
+    if matched:
+        return matched[:limit]
+    return ranked[:1]
+
+
+class DirectionsBudget:
+    """
+    Запросы Directions одного поиска: первые запросы кандидатов и повторы коррекции дистанции.
+
+    Повтор коррекции расходует тот же бюджет, поэтому поиск не делает больше
+    max_directions_requests сетевых запросов.
+    """
+
+    def __init__(self, limit: int):
+        self.remaining = limit
+
+    def take(self) -> bool:
+        """Списать один запрос; False — бюджет исчерпан."""
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
 
 class RouteService:
     """Сервис для загрузки и фильтрации маршрутов."""
@@ -40,36 +141,386 @@ class RouteService:
         self,
         routes_file: Optional[Path] = None,
         ors_api_key: Optional[str] = None,
+        ors_base_url: str = ORS_BASE,
+        max_concurrent_directions: int = MAX_CONCURRENT_DIRECTIONS,
+        max_directions_requests: int = MAX_DIRECTIONS_REQUESTS,
+        cache_dir: Optional[Path] = None,
+        routes_reload_interval: float = RELOAD_INTERVAL,
+        geocode_limiter: Optional[RateLimiter] = None,
+        directions_limiter: Optional[RateLimiter] = None,
+        routes_db_file: Optional[Path] = None,
+        loop_bearings: int = DEFAULT_BEARINGS,
+        loop_shapes: Iterable[str] = DEFAULT_SHAPES,
+        distance_correction: bool = True,
+        local_graph_file: Optional[Path] = None,
+        redis_client: Optional[Any] = None,
+        search_workers: int = SEARCH_WORKERS,
+        search_queue_size: int = SEARCH_QUEUE_SIZE,
     ):
         self.routes_file = routes_file or ROUTES_FILE
-        self._routes: list[Route] = []
+        self.dataset = RouteDataset(self.routes_file, reload_interval=routes_reload_interval)
         self.ors_api_key = ors_api_key
-        self._ors_client: Optional[OpenRouteService] = None
+        self.ors_base_url = ors_base_url
+        self.max_concurrent_directions = max_concurrent_directions
+        self.max_directions_requests = max_directions_requests
+        # Без cache_dir кэш геокодинга живёт только в памяти процесса; с Redis
+        # кэши геокодинга и маршрутов общие для всех реплик
+        self.redis_client = redis_client
+        self.geocode_cache = GeocodeCache(
+            Path(cache_dir) / "geocode.sqlite3" if cache_dir else None,
+            store=RedisStore(redis_client, "geocode") if redis_client else None,
+        )
+        self.route_cache = RouteCache(
+            Path(cache_dir) / "routes.sqlite3" if cache_dir else None,
+            store=RedisStore(redis_client, "routes", compress=True) if redis_client else None,
+        )
+        # Показанные результаты поисков: листание и «ещё» без повторного поиска
+        self.search_results = SearchResultCache(
+            store=RedisStore(redis_client, "results", compress=True) if redis_client else None,
+        )
+        self.distance_calibrator = DistanceCalibrator(
+            Path(cache_dir) / "calibration.json" if cache_dir else None
+        )
+        # Повторный запрос, если первый маршрут вышел за допуск по дистанции
+        self.distance_correction = distance_correction
+        self.ors_searches = 0
+        self.directions_calls = 0
+        # База предрассчитанных маршрутов подключается, только если она уже построена
+        self.route_db: Optional[RouteDatabase] = None
+        if routes_db_file is not None and Path(routes_db_file).exists():
+            self.route_db = RouteDatabase(routes_db_file)
+        # Лимитеры общие для всех пользователей процесса
+        self.geocode_limiter = geocode_limiter or RateLimiter(
+            "geocode", GEOCODE_PER_MINUTE, GEOCODE_PER_DAY
+        )
+        self.directions_limiter = directions_limiter or RateLimiter(
+            "directions", DIRECTIONS_PER_MINUTE, DIRECTIONS_PER_DAY
+        )
+        self._inflight = SingleFlight()
+        # Пул поисков из обработчиков бота: ограничивает одновременные поиски с ORS
+        self.search_executor = SearchExecutor(search_workers, search_queue_size)
+        self.loop_planner = LoopPlanner(loop_bearings, loop_shapes)
+        # Локальный граф (tools/build_walk_graph.py) заменяет ORS как источник маршрутов
+        self.local_graph_file = local_graph_file
+        self._local_router: Optional[LocalRouter] = None
+        self._ors_client: Optional[Union[OpenRouteService, LocalRouter]] = None
+        self._async_ors_client: Optional[Union[AsyncOpenRouteService, AsyncLocalRouter]] = None
+        self._warm_task: Optional[asyncio.Task] = None
+
+    @property
+    def cache_profile(self) -> str:
+        """
+        Часть ключа кэша маршрутов, от которой зависит ответ: источник
+        (ORS или конкретный локальный граф), профиль и режим коррекции дистанции.
+        """
+        backend = f"local-{Path(self.local_graph_file).stem}" if self.local_graph_file else "ors"
+        return route_cache_profile(backend, ORS_PROFILE, self.distance_correction)
 
-    def _get_ors_client(self) -> Optional[OpenRouteService]:
-        """Ленивая инициализация клиента ORS."""
+    def _get_local_router(self) -> Optional[LocalRouter]:
+        """Ленивое открытие локального графа (если задан LOCAL_GRAPH_FILE)."""
+        if self._local_router is None and self.local_graph_file:
+            self._local_router = LocalRouter(self.local_graph_file)
+        return self._local_router
+
+    def _get_ors_client(self) -> Optional[Union[OpenRouteService, LocalRouter]]:
+        """Ленивая инициализация клиента ORS (или локального маршрутизатора)."""
+        if self._ors_client is None and self.local_graph_file:
+            self._ors_client = self._get_local_router()
         if self._ors_client is None and self.ors_api_key:
-            self._ors_client = OpenRouteService(self.ors_api_key)
+            self._ors_client = OpenRouteService(
+                self.ors_api_key,
+                geocode_cache=self.geocode_cache,
+                base_url=self.ors_base_url,
+                geocode_limiter=self.geocode_limiter,
+                directions_limiter=self.directions_limiter,
+            )
         return self._ors_client
 
-    def load_routes(self) -> list[Route]:
-        """Загрузить маршруты из JSON-файла (fallback)."""
-        if self._routes:
-            return self._routes
+    def _get_async_ors_client(
+        self,
+    ) -> Optional[Union[AsyncOpenRouteService, AsyncLocalRouter]]:
+        """Ленивая инициализация асинхронного клиента ORS (общий пул соединений)."""
+        if self._async_ors_client is None and self.local_graph_file:
+            self._async_ors_client = AsyncLocalRouter(self._get_local_router())
+        if self._async_ors_client is None and self.ors_api_key:
+            self._async_ors_client = AsyncOpenRouteService(
+                self.ors_api_key,
+                geocode_cache=self.geocode_cache,
+                base_url=self.ors_base_url,
+                geocode_limiter=self.geocode_limiter,
+                directions_limiter=self.directions_limiter,
+            )
+        return self._async_ors_client
 
-        if not self.routes_file.exists():
-            logger.warning("Файл маршрутов не найден: %s", self.routes_file)
-            return []
+    async def start(self) -> None:
+        """
+        Открыть соединения с внешними сервисами (Application.post_init).
 
+        Каталог маршрутов и кэш геокодинга прогреваются в фоне: бот начинает
+        принимать апдейты сразу, а поиск до конца прогрева читает каталог сам.
+        """
+        ors = self._get_async_ors_client()
+        if ors:
+            await ors.start()
+        if self._warm_task is None:
+            self._warm_task = asyncio.create_task(self._warm_up())
+
+    async def _warm_up(self) -> None:
+        started = time.perf_counter()
         try:
-            with open(self.routes_file, encoding="utf-8") as f:
-                data = json.load(f)
-            self._routes = [Route.from_dict(item) for item in data]
-            logger.info("Загружено %d маршрутов из JSON", len(self._routes))
-            return self._routes
-        except (json.JSONDecodeError, KeyError) as e:
-            logger.error("Ошибка загрузки маршрутов: %s", e)
-            return []
+            await self.dataset.load_async()
+            self.dataset.start_watching()
+            await self.warm_geocode_cache()
+        except Exception:
+            logger.exception("Ошибка фонового прогрева RouteService")
+            return
+        logger.info("RouteService прогрет за %.0f мс", (time.perf_counter() - started) * 1000)
+
+    async def wait_catalog(self) -> None:
+        """
+        Дождаться загрузки каталога маршрутов (в потоке, общей с фоновым прогревом).
+
+        Асинхронные поиски вызывают её до обращения к каталогу, чтобы поиск до
+        конца прогрева не читал файл синхронно в event loop.
+        """
+        await self.dataset.load_async()
+
+    async def wait_warm(self) -> None:
+        """Дождаться окончания фонового прогрева (no-op до start())."""
+        if self._warm_task is not None:
+            await asyncio.shield(self._warm_task)
+
+    async def aclose(self) -> None:
+        """Закрыть соединения с внешними сервисами (Application.post_shutdown)."""
+        if self._warm_task is not None and not self._warm_task.done():
+            self._warm_task.cancel()
+            try:
+                await self._warm_task
+            except asyncio.CancelledError:
+                pass
+        await self.dataset.stop_watching()
+        if self._async_ors_client is not None:
+            await self._async_ors_client.aclose()
+        logger.info("Кэш маршрутов ORS: %s", self.route_cache.stats())
+        logger.info("Кэш результатов поиска: %s", self.search_results.stats())
+        logger.info(
+            "Дистанция маршрутов ORS: %s, запросов Directions на поиск %.2f",
+            self.distance_calibrator.stats(),
+            self.directions_calls / self.ors_searches if self.ors_searches else 0.0,
+        )
+        self.distance_calibrator.save()
+        self.geocode_cache.close()
+        self.route_cache.close()
+        self.search_results.close()
+        if self.route_db is not None:
+            self.route_db.close()
+        if self._local_router is not None:
+            self._local_router.close()
+        if self.redis_client is not None:
+            self.redis_client.close()
+
+    async def warm_geocode_cache(self) -> None:
+        """Прогреть кэш геокодинга городами из CITIES (промахи уходят в ORS)."""
+        ors = self._get_async_ors_client()
+        if not ors:
+            return
+        self.geocode_cache.prefetch(CITIES)
+        for city in CITIES:
+            await ors.geocode(city)
+        logger.info("Кэш геокодинга прогрет: %d городов", len(CITIES))
+
+    def load_routes(self) -> list[Route]:
+        """Маршруты JSON-каталога (fallback); файл читается один раз, далее — по mtime."""
+        return self.dataset.snapshot.routes
+
+    def _evaluate_candidate(
+        self,
+        ors: Union[OpenRouteService, AsyncOpenRouteService],
+        route_data: dict,
+        direction: str,
+        surface_type: str,
+    ) -> RouteCandidate:
+        """Разобрать ответ Directions один раз и сохранить его вместе с оценкой."""
+        surface_share = ors.parse_surface_from_route(route_data)
+        return RouteCandidate(
+            direction=direction,
+            route_data=route_data,
+            surface_share=surface_share,
+            match_ratio=surface_share.get(surface_type, 0.0),
+        )
+
+    def _candidates_to_routes(
+        self,
+        candidates: list[RouteCandidate],
+        city: str,
+        surface_type: str,
+        limit: int = MAX_ORS_RESULTS,
+    ) -> list[Route]:
+        ranked = rank_candidates(candidates, limit)
+        return [
+            Route.from_ors(c.route_data, city, surface_type, c.direction) for c in ranked
+        ]
+
+    def _calibrate(
+        self,
+        city: str,
+        direction: str,
+        distance_km: float,
+        factor: float,
+        route_data: Optional[dict],
+    ) -> Optional[float]:
+        """
+        Учесть маршрут в калибровке.
+
+        Returns:
+            Коэффициент для повторного запроса, если маршрут вышел за допуск
+            и коррекция включена, иначе None
+        """
+        if not route_data:
+            return None
+        actual_km = route_data.get("summary", {}).get("distance", 0) / 1000
+        implied = self.distance_calibrator.observe(city, direction, distance_km, factor, actual_km)
+        if self.distance_correction and self.distance_calibrator.is_off_target(
+            distance_km, actual_km
+        ):
+            return implied
+        return None
+
+    def _closest(self, distance_km: float, *routes: Optional[dict]) -> Optional[dict]:
+        """Маршрут с дистанцией ближе всего к заказанной; учёт в статистике точности."""
+        built = [r for r in routes if r]
+        if not built:
+            return None
+        best = min(
+            built,
+            key=lambda r: abs(r.get("summary", {}).get("distance", 0) / 1000 - distance_km),
+        )
+        actual_km = best.get("summary", {}).get("distance", 0) / 1000
+        self.distance_calibrator.record_result(distance_km, actual_km, corrected=len(routes) > 1)
+        return best
+
+    def _get_round_route(
+        self,
+        ors: OpenRouteService,
+        city: str,
+        lon: float,
+        lat: float,
+        distance_km: float,
+        direction: str,
+        budget: DirectionsBudget,
+    ) -> Optional[dict]:
+        """
+        get_round_route через кэш маршрутов с калиброванной дистанцией.
+
+        Сетевые запросы (и повтор коррекции) списываются с budget; без бюджета
+        повтор не выполняется, а без бюджета на первый запрос — None.
+        """
+        cached = self.route_cache.get(lon, lat, distance_km, direction, self.cache_profile)
+        if cached is not MISSING:
+            return cached
+        if not budget.take():
+            return None
+        factor = self.distance_calibrator.factor(city, direction)
+        self.directions_calls += 1
+        route_data = ors.get_round_route(lon, lat, distance_km, direction, detour_factor=factor)
+        retry_factor = self._calibrate(city, direction, distance_km, factor, route_data)
+        if retry_factor is None or not budget.take():
+            route_data = self._closest(distance_km, route_data)
+        else:
+            self.directions_calls += 1
+            retry = ors.get_round_route(
+                lon, lat, distance_km, direction, detour_factor=retry_factor
+            )
+            self._calibrate(city, direction, distance_km, retry_factor, retry)
+            route_data = self._closest(distance_km, route_data, retry)
+        if route_data:
+            self.route_cache.set(lon, lat, distance_km, direction, self.cache_profile, route_data)
+        return route_data
+
+    async def _get_round_route_async(
+        self,
+        ors: AsyncOpenRouteService,
+        city: str,
+        lon: float,
+        lat: float,
+        distance_km: float,
+        direction: str,
+        semaphore: asyncio.Semaphore,
+        budget: DirectionsBudget,
+    ) -> Optional[dict]:
+        """
+        get_round_route через кэш маршрутов с калиброванной дистанцией.
+
+        Семафор занимают только сетевые запросы. Запросы (и повтор коррекции)
+        списываются с budget, как в _get_round_route.
+        """
+        cached = self.route_cache.get(lon, lat, distance_km, direction, self.cache_profile)
+        if cached is not MISSING:
+            return cached
+        factor = self.distance_calibrator.factor(city, direction)
+        async with semaphore:
+            if not budget.take():
+                return None
+            self.directions_calls += 1
+            route_data = await ors.get_round_route(
+                lon, lat, distance_km, direction, detour_factor=factor
+            )
+        retry_factor = self._calibrate(city, direction, distance_km, factor, route_data)
+        if retry_factor is None or not budget.take():
+            route_data = self._closest(distance_km, route_data)
+        else:
+            async with semaphore:
+                self.directions_calls += 1
+                retry = await ors.get_round_route(
+                    lon, lat, distance_km, direction, detour_factor=retry_factor
+                )
+            self._calibrate(city, direction, distance_km, retry_factor, retry)
+            route_data = self._closest(distance_km, route_data, retry)
+        if route_data:
+            self.route_cache.set(lon, lat, distance_km, direction, self.cache_profile, route_data)
+        return route_data
+
+    def _directions_for_search(
+        self,
+        lon: float,
+        lat: float,
+        distance_km: float,
+        surface_type: str,
+        budget: Optional[int] = None,
+    ) -> list[str]:
+        """
+        Кандидаты петли одного поиска с учётом бюджета запросов Directions.
+
+        Ранжирование локальное: закэшированные кандидаты первыми, затем по
+        долям поверхностей, полученным на прошлых поисках у этой точки.
+
+        Args:
+            budget: Сколько кандидатов охватить (по умолчанию max_directions_requests)
+        """
+        profile = self.cache_profile
+        cached = self.route_cache.contains_many(
+            lon, lat, distance_km, (c.direction for c in self.loop_planner.candidates), profile
+        )
+        directions = self.loop_planner.plan(
+            lon, lat, surface_type, budget or self.max_directions_requests, cached
+        )
+        # Закэшированные маршруты выбранных кандидатов — одним запросом к хранилищу
+        self.route_cache.prefetch(lon, lat, distance_km, directions, profile)
+        return directions
+
+    def _evaluate_at(
+        self,
+        ors: Union[OpenRouteService, AsyncOpenRouteService],
+        lon: float,
+        lat: float,
+        route_data: dict,
+        direction: str,
+        surface_type: str,
+    ) -> RouteCandidate:
+        """_evaluate_candidate с запоминанием результата для LoopPlanner."""
+        candidate = self._evaluate_candidate(ors, route_data, direction, surface_type)
+        self.loop_planner.record(lon, lat, direction, candidate.surface_share)
+        return candidate
 
     def search_ors(
         self,
@@ -77,7 +528,14 @@ class RouteService:
         distance_km: float,
         surface_type: str,
     ) -> list[Route]:
-        """Поиск маршрутов через OpenRouteService."""
+        """
+        Поиск маршрутов через OpenRouteService.
+
+        Квоты ORS общие с асинхронным поиском; ожидание токена блокирует поток.
+
+        Raises:
+            RateLimitExceeded: квота ORS исчерпана и ни один маршрут не получен
+        """
         ors = self._get_ors_client()
         if not ors:
             return []
@@ -88,34 +546,220 @@ class RouteService:
             return []
 
         lon, lat = coords
-        directions_order = ["north", "east", "south", "west"]
-        best_routes: list[tuple[float, Route]] = []
+        self.ors_searches += 1
+        candidates: list[RouteCandidate] = []
+        budget = DirectionsBudget(self.max_directions_requests)
+        rate_limited = 0
 
-        for direction in directions_order:
-            route_data = ors.get_round_route(lon, lat, distance_km, direction)
+        for direction in self._directions_for_search(lon, lat, distance_km, surface_type):
+            try:
+                route_data = self._get_round_route(
+                    ors, city, lon, lat, distance_km, direction, budget
+                )
+            except RateLimitExceeded:
+                rate_limited += 1
+                continue
             if not route_data:
                 continue
+            candidates.append(
+                self._evaluate_at(ors, lon, lat, route_data, direction, surface_type)
+            )
+
+        if not candidates and rate_limited:
+            raise RateLimitExceeded("ORS directions: превышена квота запросов")
+        return self._candidates_to_routes(candidates, city, surface_type)
+
+    async def search_ors_async(
+        self,
+        city: str,
+        distance_km: float,
+        surface_type: str,
+        on_progress: Optional[Callable[[list[Route]], None]] = None,
+    ) -> list[Route]:
+        """
+        Поиск маршрутов через OpenRouteService без блокировки event loop.
+
+        Одновременные одинаковые запросы (город, дистанция, поверхность)
+        разделяют один набор обращений к ORS.
+
+        Args:
+            on_progress: Вызывается с лучшими на данный момент маршрутами после
+                каждого полученного кандидата (только у вызова, который
+                выполняет запросы; присоединившиеся получают итог)
+
+        Raises:
+            RateLimitExceeded: квота ORS исчерпана и ни один маршрут не получен
+        """
+        ors = self._get_async_ors_client()
+        if not ors:
+            return []
+
+        key = (" ".join(city.split()).casefold(), round(distance_km, 1), surface_type)
+        return await self._inflight.run(
+            key, lambda: self._search_ors_async(ors, city, distance_km, surface_type, on_progress)
+        )
+
+    async def _search_ors_async(
+        self,
+        ors: AsyncOpenRouteService,
+        city: str,
+        distance_km: float,
+        surface_type: str,
+        on_progress: Optional[Callable[[list[Route]], None]] = None,
+        budget: Optional[int] = None,
+        limit: int = MAX_ORS_RESULTS,
+    ) -> list[Route]:
+        coords = await ors.geocode(city)
+        if not coords:
+            logger.warning("ORS: не удалось геокодировать %s", city)
+            return []
+
+        lon, lat = coords
+        self.ors_searches += 1
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.max_concurrent_directions)
+        # Сетевых запросов за вызов — не больше max_directions_requests, включая
+        # повторы коррекции (у «ещё» закэшированные кандидаты бюджет не тратят)
+        directions_budget = DirectionsBudget(self.max_directions_requests)
+
+        rate_limited = 0
+
+        async def fetch(direction: str) -> tuple[str, Optional[dict]]:
+            nonlocal rate_limited
+            try:
+                route_data = await self._get_round_route_async(
+                    ors, city, lon, lat, distance_km, direction, semaphore, directions_budget
+                )
+            except RateLimitExceeded:
+                rate_limited += 1
+                route_data = None
+            return direction, route_data
+
+        directions = self._directions_for_search(lon, lat, distance_km, surface_type, budget)
+        tasks = [asyncio.create_task(fetch(d)) for d in directions]
+        candidates: list[RouteCandidate] = []
+        accepted = 0
+        completed = 0
+
+        try:
+            # Обрабатываем ответы по мере готовности; как только набралось
+            # limit маршрутов выше порога — остальные запросы отменяем
+            for next_done in asyncio.as_completed(tasks):
+                direction, route_data = await next_done
+                completed += 1
+                if not route_data:
+                    continue
+
+                candidate = self._evaluate_at(ors, lon, lat, route_data, direction, surface_type)
+                candidates.append(candidate)
+                if candidate.is_match:
+                    accepted += 1
+                    if accepted >= limit:
+                        break
+                if on_progress is not None:
+                    on_progress(self._candidates_to_routes(candidates, city, surface_type, limit))
+        finally:
+            cancelled = sum(1 for t in tasks if not t.done())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        logger.info(
+            "ORS search %s/%.1f км/%s: %.0f мс, directions %d/%d, отменено %d, "
+            "вне квоты %d, подходящих %d",
+            city,
+            distance_km,
+            surface_type,
+            (time.perf_counter() - started) * 1000,
+            completed,
+            len(tasks),
+            cancelled,
+            rate_limited,
+            accepted,
+        )
 
-            surface_share = ors.parse_surface_from_route(route_data)
-            match_ratio = surface_share.get(surface_type, 0.0)
+        if not candidates and rate_limited:
+            raise RateLimitExceeded("ORS directions: превышена квота запросов")
+        return self._candidates_to_routes(candidates, city, surface_type, limit)
 
-            if match_ratio >= SURFACE_MATCH_THRESHOLD:
-                route = Route.from_ors(route_data, city, surface_type, direction)
-                best_routes.append((match_ratio, route))
+    async def extend_ors_async(
+        self,
+        city: str,
+        distance_km: float,
+        surface_type: str,
+        budget: int,
+    ) -> list[Route]:
+        """
+        Поиск ORS с бюджетом budget кандидатов и всеми подходящими маршрутами.
+
+        Уже построенные кандидаты берутся из кэша маршрутов, координаты города —
+        из кэша геокодинга: новые запросы Directions идут только за кандидатами
+        сверх прошлого бюджета.
+
+        Raises:
+            RateLimitExceeded: квота ORS исчерпана и ни один маршрут не получен
+        """
+        ors = self._get_async_ors_client()
+        if not ors:
+            return []
+
+        key = (" ".join(city.split()).casefold(), round(distance_km, 1), surface_type, budget)
+        return await self._inflight.run(
+            key,
+            lambda: self._search_ors_async(
+                ors, city, distance_km, surface_type, budget=budget, limit=MAX_RESULT_ROUTES
+            ),
+        )
 
-        if not best_routes:
-            # Вернуть лучший по surface даже если ниже порога
-            for direction in directions_order:
-                route_data = ors.get_round_route(lon, lat, distance_km, direction)
-                if route_data:
-                    surface_share = ors.parse_surface_from_route(route_data)
-                    match_ratio = surface_share.get(surface_type, 0.0)
-                    route = Route.from_ors(route_data, city, surface_type, direction)
-                    best_routes.append((match_ratio, route))
-                    break
+    def can_extend(self, result: SearchResult) -> bool:
+        """Можно ли дополнить результат («ещё похожие»)."""
+        if result.exhausted:
+            return False
+        if result.location is not None:
+            return True
+        return bool(result.city) and self._get_async_ors_client() is not None
 
-        best_routes.sort(key=lambda x: -x[0])
-        return [r for _, r in best_routes[:3]]
+    async def extend_results(self, result: SearchResult) -> int:
+        """
+        Дополнить сохранённый результат новыми маршрутами и пересохранить его.
+
+        Поиск по городу расширяет бюджет кандидатов петли ORS на
+        max_directions_requests, поиск рядом — число маршрутов каталога на
+        NEARBY_LIMIT. Показанные маршруты остаются на своих местах.
+        Одновременные нажатия «ещё» у одного результата разделяют одно
+        дополнение.
+
+        Returns:
+            Сколько маршрутов добавлено
+
+        Raises:
+            RateLimitExceeded: квота ORS исчерпана и ни один маршрут не получен
+        """
+        return await self._inflight.run(("extend", result.key), lambda: self._extend_results(result))
+
+    async def _extend_results(self, result: SearchResult) -> int:
+        if result.location is not None:
+            result.limit = (result.limit or NEARBY_LIMIT) + NEARBY_LIMIT
+            nearby = await self.search_nearby_async(
+                *result.location,
+                distance_km=result.distance_km,
+                surface_type=result.surface_type,
+                limit=result.limit,
+            )
+            added = result.merge([r for _, r in nearby], [d for d, _ in nearby])
+            result.exhausted = len(nearby) < result.limit
+        else:
+            step = self.max_directions_requests
+            result.budget = (result.budget or step) + step
+            routes = await self.extend_ors_async(
+                result.city, result.distance_km, result.surface_type, result.budget
+            )
+            added = result.merge(routes)
+            result.exhausted = result.budget >= len(self.loop_planner.candidates)
+        if len(result.routes) >= MAX_RESULT_ROUTES:
+            result.exhausted = True
+        self.search_results.put(result)
+        return added
 
     def search(
         self,
@@ -127,32 +771,297 @@ class RouteService:
         """
         Поиск маршрутов по критериям.
 
-        При наличии OPENROUTESERVICE_API_KEY использует ORS, иначе — JSON.
+        Порядок: база предрассчитанных маршрутов, ORS (при наличии
+        OPENROUTESERVICE_API_KEY), JSON.
+
+        Raises:
+            RateLimitExceeded: квота ORS исчерпана, а в JSON ничего не нашлось
         """
+        routes = self.search_precomputed(city, distance_km, surface_type)
+        if routes:
+            SEARCHES.labels("precomputed").inc()
+            return routes
+
         if self._get_ors_client():
             try:
                 routes = self.search_ors(city, distance_km, surface_type)
                 if routes:
                     logger.info("ORS: найдено %d маршрутов для %s", len(routes), city)
+                    SEARCHES.labels("ors").inc()
+                    return routes
+            except RateLimitExceeded:
+                routes = self.search_json(city, distance_km, surface_type, tolerance_km)
+                if routes:
+                    SEARCHES.labels("json").inc()
+                    return routes
+                raise
+            except Exception as e:
+                logger.error("ORS search error: %s, fallback to JSON", e)
+
+        SEARCHES.labels("json").inc()
+        return self.search_json(city, distance_km, surface_type, tolerance_km)
+
+    async def search_async(
+        self,
+        city: str,
+        distance_km: float,
+        surface_type: str,
+        tolerance_km: float = 2.0,
+    ) -> list[Route]:
+        """
+        Асинхронный поиск маршрутов по критериям (для обработчиков бота).
+
+        Порядок: база предрассчитанных маршрутов, ORS (при наличии
+        OPENROUTESERVICE_API_KEY), JSON.
+
+        Raises:
+            RateLimitExceeded: квота ORS исчерпана, а в JSON ничего не нашлось
+        """
+        await self.wait_catalog()
+        routes = await self._search_precomputed_async(city, distance_km, surface_type)
+        if routes:
+            SEARCHES.labels("precomputed").inc()
+            return routes
+
+        if self._get_async_ors_client():
+            try:
+                routes = await self.search_ors_async(city, distance_km, surface_type)
+                if routes:
+                    logger.info("ORS: найдено %d маршрутов для %s", len(routes), city)
+                    SEARCHES.labels("ors").inc()
+                    return routes
+            except RateLimitExceeded:
+                routes = self.search_json(city, distance_km, surface_type, tolerance_km)
+                if routes:
+                    SEARCHES.labels("json").inc()
                     return routes
+                raise
             except Exception as e:
                 logger.error("ORS search error: %s, fallback to JSON", e)
 
-        # Fallback на JSON
-        routes = self.load_routes()
-        min_dist = distance_km - tolerance_km
-        max_dist = distance_km + tolerance_km
-
-        filtered = [
-            r
-            for r in routes
-            if r.city == city
-            and r.surface_type == surface_type
-            and min_dist <= r.distance_km <= max_dist
+        SEARCHES.labels("json").inc()
+        return self.search_json(city, distance_km, surface_type, tolerance_km)
+
+    async def search_stream(
+        self,
+        city: str,
+        distance_km: float,
+        surface_type: str,
+        tolerance_km: float = 2.0,
+    ) -> AsyncIterator[tuple[list[Route], bool]]:
+        """
+        search_async с промежуточными результатами для постепенного вывода.
+
+        Каждый элемент — (текущий список маршрутов целиком, итог ли это),
+        лучшие первыми: с ORS первый построенный маршрут приходит, не дожидаясь
+        остальных запросов Directions, и заменяется лучшими по мере ответов.
+        Последний элемент (итог=True) — результат, как у search_async; маршрутов
+        JSON-каталога в нём не больше MAX_RESULT_ROUTES.
+
+        Raises:
+            RateLimitExceeded: квота ORS исчерпана, а в JSON ничего не нашлось
+        """
+        await self.wait_catalog()
+        routes = await self._search_precomputed_async(city, distance_km, surface_type)
+        if routes:
+            SEARCHES.labels("precomputed").inc()
+            yield routes, True
+            return
+
+        if self._get_async_ors_client():
+            progress: asyncio.Queue = asyncio.Queue()
+            search = asyncio.create_task(
+                self.search_ors_async(city, distance_km, surface_type, progress.put_nowait)
+            )
+            search.add_done_callback(lambda _: progress.put_nowait(None))
+            partial: list[Route] = []
+            try:
+                while (update := await progress.get()) is not None:
+                    partial = update
+                    yield partial, False
+                # Уже показанные маршруты не заменяются JSON при сбое хвоста поиска
+                routes = search.result() or partial
+                if routes:
+                    logger.info("ORS: найдено %d маршрутов для %s", len(routes), city)
+                    SEARCHES.labels("ors").inc()
+                    yield routes, True
+                    return
+            except RateLimitExceeded:
+                routes = self.search_json(
+                    city, distance_km, surface_type, tolerance_km, MAX_RESULT_ROUTES
+                )
+                if routes:
+                    SEARCHES.labels("json").inc()
+                    yield routes, True
+                    return
+                raise
+            except Exception as e:
+                if partial:
+                    logger.error("ORS search error: %s, остаются найденные маршруты", e)
+                    SEARCHES.labels("ors").inc()
+                    yield partial, True
+                    return
+                logger.error("ORS search error: %s, fallback to JSON", e)
+            finally:
+                search.cancel()
+
+        SEARCHES.labels("json").inc()
+        yield self.search_json(city, distance_km, surface_type, tolerance_km, MAX_RESULT_ROUTES), True
+
+    def search_precomputed(
+        self,
+        city: str,
+        distance_km: float,
+        surface_type: str,
+    ) -> list[Route]:
+        """
+        Поиск в базе предрассчитанных маршрутов ORS (без сетевых запросов).
+
+        Возвращает только маршруты выше SURFACE_MATCH_THRESHOLD: если в базе нет
+        подходящих, поиск переходит к живому ORS и JSON, а не отдаёт лучший
+        из неподходящих.
+        """
+        if self.route_db is None:
+            return []
+        candidates = [
+            RouteCandidate(
+                direction=direction,
+                route_data=route_data,
+                surface_share=share,
+                match_ratio=share.get(surface_type, 0.0),
+            )
+            for direction, route_data, share in self.route_db.get_candidates(city, distance_km)
         ]
+        return self._candidates_to_routes([c for c in candidates if c.is_match], city, surface_type)
 
-        filtered.sort(key=lambda r: abs(r.distance_km - distance_km))
-        return filtered
+    async def _search_precomputed_async(
+        self, city: str, distance_km: float, surface_type: str
+    ) -> list[Route]:
+        """search_precomputed в потоке: чтение SQLite и распаковка не держат event loop."""
+        if self.route_db is None:
+            return []
+        return await asyncio.to_thread(self.search_precomputed, city, distance_km, surface_type)
+
+    def search_cached(
+        self,
+        city: str,
+        distance_km: float,
+        surface_type: str,
+        tolerance_km: float = 2.0,
+        limit: int = MAX_RESULT_ROUTES,
+    ) -> list[Route]:
+        """
+        Поиск без сетевых запросов к ORS (inline-режим).
+
+        Порядок: база предрассчитанных маршрутов, петли ORS, уже лежащие в
+        кэше маршрутов (координаты города — только из кэша геокодинга), JSON.
+
+        Returns:
+            До limit маршрутов без повторов
+        """
+        routes = self.search_precomputed(city, distance_km, surface_type)
+
+        coords = self.geocode_cache.get(city)
+        if coords is not MISSING and coords is not None:
+            lon, lat = coords
+            profile = self.cache_profile
+            directions = [c.direction for c in self.loop_planner.candidates]
+            present = self.route_cache.contains_many(lon, lat, distance_km, directions, profile)
+            cached = [d for d in directions if d in present]
+            self.route_cache.prefetch(lon, lat, distance_km, cached, profile)
+            built = [
+                (d, route_data)
+                for d in cached
+                if (route_data := self.route_cache.get(lon, lat, distance_km, d, profile))
+                is not MISSING
+            ]
+            # Доли поверхностей всех закэшированных петель — одним пакетом
+            shares = surface_shares([route_data for _, route_data in built])
+            candidates = [
+                RouteCandidate(d, route_data, share, share.get(surface_type, 0.0))
+                for (d, route_data), share in zip(built, shares)
+            ]
+            routes += [
+                Route.from_ors(c.route_data, city, surface_type, c.direction)
+                for c in rank_candidates(candidates, limit)
+                if c.is_match
+            ]
+
+        routes += self.search_json(city, distance_km, surface_type, tolerance_km, limit)
+        unique = list({r.id: r for r in routes}.values())[:limit]
+        SEARCHES.labels("cached").inc()
+        return unique
+
+    async def search_cached_async(
+        self,
+        city: str,
+        distance_km: float,
+        surface_type: str,
+        tolerance_km: float = 2.0,
+        limit: int = MAX_RESULT_ROUTES,
+    ) -> list[Route]:
+        """
+        search_cached в потоке (inline-режим).
+
+        Чтение базы и кэша маршрутов, распаковка и сборка Route с упрощением
+        геометрии — синхронная работа, которая не должна держать event loop.
+        """
+        await self.wait_catalog()
+        return await asyncio.to_thread(
+            self.search_cached, city, distance_km, surface_type, tolerance_km, limit
+        )
+
+    def search_json(
+        self,
+        city: str,
+        distance_km: float,
+        surface_type: str,
+        tolerance_km: float = 2.0,
+        limit: Optional[int] = None,
+    ) -> list[Route]:
+        """
+        Поиск по маршрутам из JSON-файла (fallback) через RouteIndex.
+
+        Returns:
+            Маршруты в окне distance_km ± tolerance_km, ближайшие первыми
+            (не более limit, если задан)
+        """
+        index = self.dataset.snapshot.index
+        return index.query(city, surface_type, distance_km, tolerance_km, limit)
+
+    def search_nearby(
+        self,
+        lon: float,
+        lat: float,
+        distance_km: float,
+        surface_type: str,
+        tolerance_km: float = 2.0,
+        limit: int = NEARBY_LIMIT,
+    ) -> list[tuple[float, Route]]:
+        """
+        Маршруты каталога рядом с точкой пользователя (геопозиция Telegram).
+
+        Returns:
+            До limit пар (км до старта маршрута, маршрут), ближайшие первыми
+        """
+        spatial = self.dataset.snapshot.spatial
+        SEARCHES.labels("nearby").inc()
+        return spatial.nearest(lon, lat, surface_type, distance_km, tolerance_km, limit)
+
+    async def search_nearby_async(
+        self,
+        lon: float,
+        lat: float,
+        distance_km: float,
+        surface_type: str,
+        tolerance_km: float = 2.0,
+        limit: int = NEARBY_LIMIT,
+    ) -> list[tuple[float, Route]]:
+        """search_nearby в потоке, после загрузки каталога."""
+        await self.wait_catalog()
+        return await asyncio.to_thread(
+            self.search_nearby, lon, lat, distance_km, surface_type, tolerance_km, limit
+        )
 
     def get_cities(self) -> list[str]:
         """Получить список доступных городов."""
@@ -163,10 +1072,56 @@ class RouteService:
         return SURFACE_TYPES.copy()
 
 
-# Синглтон с настройками из окружения
-def _create_route_service() -> RouteService:
-    settings = Settings()
-    return RouteService(ors_api_key=settings.ors_api_key)
+def create_route_service(settings: Settings, redis_client: Optional[Any] = None) -> RouteService:
+    """RouteService с настройками из окружения; открытие соединений — в start()."""
+    return RouteService(
+        routes_file=Path(settings.routes_file) if settings.routes_file else None,
+        ors_api_key=settings.ors_api_key,
+        ors_base_url=settings.ors_base_url,
+        cache_dir=Path(settings.cache_dir) if settings.cache_dir else CACHE_DIR,
+        routes_reload_interval=settings.routes_reload_interval,
+        routes_db_file=Path(settings.routes_db_file) if settings.routes_db_file else ROUTES_DB_FILE,
+        loop_bearings=settings.loop_bearings,
+        loop_shapes=settings.loop_shapes,
+        distance_correction=settings.distance_correction,
+        local_graph_file=Path(settings.local_graph_file) if settings.local_graph_file else None,
+        redis_client=redis_client,
+        search_workers=settings.search_workers,
+        search_queue_size=settings.search_queue_size,
+        geocode_limiter=RateLimiter(
+            "geocode",
+            settings.ors_geocode_per_minute,
+            settings.ors_geocode_per_day,
+            settings.ors_queue_timeout,
+        ),
+        directions_limiter=RateLimiter(
+            "directions",
+            settings.ors_directions_per_minute,
+            settings.ors_directions_per_day,
+            settings.ors_queue_timeout,
+        ),
+    )
+
+
+# Сервис процесса: создаётся в Application.post_init (main.py), а не при импорте
+_route_service: Optional[RouteService] = None
+
+
+def get_route_service() -> RouteService:
+    """Сервис процесса; без post_init (скрипты, тесты) создаётся из окружения при первом вызове."""
+    global _route_service
+    if _route_service is None:
+        settings = Settings()
+        _route_service = create_route_service(
+            settings,
+            create_redis_client(
+                settings.redis_host, settings.redis_port, settings.redis_db, settings.redis_timeout
+            ),
+        )
+    return _route_service
 
 
-route_service = _create_route_service()
+def set_route_service(service: Optional[RouteService]) -> None:
+    """Назначить сервис процесса (None — сбросить)."""
+    global _route_service
+    _route_service = service
@@ -0,0 +1,72 @@
+"""
+Ограниченный пул поисков маршрутов с очередью и отказом при переполнении.
+
+Поиск с ORS — самая дорогая работа бота. Одновременно выполняется не больше
+workers поисков, ещё до max_queue ждут своей очереди (FIFO); сверх этого
+поиск сразу отклоняется SearchQueueFull, и пользователь получает ответ
+«занято, повторите», а не ждёт минуту за чужими запросами к ORS.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from services.metrics import SEARCH_QUEUE_DEPTH, SEARCH_QUEUE_WAIT_SECONDS, SEARCH_REJECTED
+
+logger = logging.getLogger(__name__)
+
+# Одновременных поисков: вместе с MAX_CONCURRENT_DIRECTIONS ограничивает нагрузку на ORS
+SEARCH_WORKERS = 4
+
+# Поисков в очереди сверх выполняемых
+SEARCH_QUEUE_SIZE = 32
+
+T = TypeVar("T")
+
+
+class SearchQueueFull(Exception):
+    """Очередь поисков заполнена: пользователю стоит повторить позже."""
+
+    pass
+
+
+class SearchExecutor:
+    """
+    Не больше workers одновременных поисков и max_queue ожидающих.
+
+    Ожидающие запускаются в порядке поступления. Отмена ожидающего вызова
+    освобождает его место в очереди.
+    """
+
+    def __init__(self, workers: int = SEARCH_WORKERS, max_queue: int = SEARCH_QUEUE_SIZE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._slots = asyncio.Semaphore(workers)
+        self.queued = 0
+        self.running = 0
+        self.rejected = 0
+        SEARCH_QUEUE_DEPTH.track((), lambda: self.queued)
+
+    async def run(self, func: Callable[[], Awaitable[T]]) -> T:
+        """Выполнить func в пуле или бросить SearchQueueFull, если очередь заполнена."""
+        if self._slots.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            SEARCH_REJECTED.labels().inc()
+            logger.warning("Очередь поисков заполнена (%d), поиск отклонён", self.queued)
+            raise SearchQueueFull("Очередь поисков заполнена")
+
+        enqueued = time.perf_counter()
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        SEARCH_QUEUE_WAIT_SECONDS.labels().observe(time.perf_counter() - enqueued)
+
+        self.running += 1
+        try:
+            return await func()
+        finally:
+            self.running -= 1
+            self._slots.release()
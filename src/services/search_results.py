@@ -0,0 +1,183 @@
+"""
+Результаты поисков для постраничного вывода и «ещё маршруты».
+
+Каждый показанный пользователю результат хранится под коротким ключом,
+который уходит в callback_data кнопок «назад / вперёд / ещё». Страницы
+отдаются из кэша без повторного поиска, а «ещё» дополняет тот же набор
+новыми кандидатами: уже построенные маршруты берутся из кэша маршрутов,
+координаты города — из кэша геокодинга.
+"""
+
+import secrets
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from models.route import Route
+from services.cache import MISSING, LRUCache, json_dumps
+
+# Маршрутов на странице результата
+PAGE_SIZE = 3
+
+# Сколько маршрутов держать в одном результате (JSON-каталог может дать сотни)
+MAX_RESULT_ROUTES = 30
+
+# Результат живёт, пока пользователь листает; потом кнопки отвечают «устарело»
+RESULTS_TTL = 3600
+
+# Бюджет памяти in-process уровня
+RESULTS_MAX_BYTES = 16 * 1024 * 1024
+RESULTS_MAX_ENTRIES = 10000
+
+# Байт случайности в ключе: 8 символов base64url, callback_data до 64 байт
+KEY_BYTES = 6
+
+
+@dataclass
+class SearchResult:
+    """
+    Набор маршрутов одного поиска: по городу (city) или по геопозиции (location).
+
+    budget — сколько кандидатов петли ORS уже охвачено, limit — сколько
+    маршрутов каталога запрошено у поиска рядом; «ещё» увеличивает их.
+    """
+
+    distance_km: float
+    surface_type: str
+    city: Optional[str] = None
+    location: Optional[tuple[float, float]] = None
+    routes: list[Route] = field(default_factory=list)
+    away_km: list[float] = field(default_factory=list)  # для поиска рядом, параллельно routes
+    budget: int = 0
+    limit: int = 0
+    exhausted: bool = False
+    key: str = ""
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-len(self.routes) // PAGE_SIZE))
+
+    def page(self, number: int) -> list[tuple[int, Route, Optional[float]]]:
+        """(номер маршрута с 1, маршрут, км до старта или None) на странице number."""
+        start = number * PAGE_SIZE
+        return [
+            (i + 1, self.routes[i], self.away_km[i] if self.away_km else None)
+            for i in range(start, min(start + PAGE_SIZE, len(self.routes)))
+        ]
+
+    def merge(self, routes: list[Route], away_km: Optional[list[float]] = None) -> int:
+        """
+        Дописать в конец маршруты, которых ещё нет (порядок показанных не меняется).
+
+        Returns:
+            Сколько маршрутов добавлено
+        """
+        known = {r.id for r in self.routes}
+        added = 0
+        for i, route in enumerate(routes):
+            if route.id in known or len(self.routes) >= MAX_RESULT_ROUTES:
+                continue
+            known.add(route.id)
+            self.routes.append(route)
+            if away_km is not None:
+                self.away_km.append(away_km[i])
+            added += 1
+        return added
+
+    def to_dict(self) -> dict:
+        return {
+            "distance_km": self.distance_km,
+            "surface_type": self.surface_type,
+            "city": self.city,
+            "location": list(self.location) if self.location else None,
+            "routes": [r.to_dict() for r in self.routes],
+            "away_km": self.away_km,
+            "budget": self.budget,
+            "limit": self.limit,
+            "exhausted": self.exhausted,
+            "key": self.key,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SearchResult":
+        location = data.get("location")
+        return cls(
+            distance_km=data["distance_km"],
+            surface_type=data["surface_type"],
+            city=data.get("city"),
+            location=tuple(location) if location else None,
+            routes=[Route.from_dict(r) for r in data.get("routes", [])],
+            away_km=list(data.get("away_km", [])),
+            budget=data.get("budget", 0),
+            limit=data.get("limit", 0),
+            exhausted=data.get("exhausted", False),
+            key=data.get("key", ""),
+        )
+
+
+class SearchResultCache:
+    """
+    Результаты поисков по короткому ключу: LRU в памяти с лимитом по байтам и TTL.
+
+    С store (services/redis_store.RedisStore) результат виден всем репликам:
+    нажатие кнопки может обработать не та реплика, что искала.
+    """
+
+    def __init__(
+        self,
+        ttl: float = RESULTS_TTL,
+        max_bytes: int = RESULTS_MAX_BYTES,
+        max_entries: int = RESULTS_MAX_ENTRIES,
+        store: Optional[Any] = None,
+    ):
+        self.ttl = ttl
+        self._memory = LRUCache(max_entries, max_bytes=max_bytes)
+        self._store = store
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, result: SearchResult) -> str:
+        """Сохранить результат (новый — под новым ключом) и вернуть ключ."""
+        if not result.key:
+            result.key = secrets.token_urlsafe(KEY_BYTES)
+        data = result.to_dict()
+        self._memory.set(result.key, result, self.ttl, size=len(json_dumps(data)))
+        if self._store is not None:
+            self._store.set(result.key, data, self.ttl)
+        return result.key
+
+    def get(self, key: str) -> Optional[SearchResult]:
+        """Результат по ключу или None, если он вытеснен или истёк."""
+        result = self._memory.get(key)
+        if result is not MISSING:
+            self.hits += 1
+            return result
+        if self._store is not None:
+            data, expires_at = self._store.get(key)
+            if data is not MISSING:
+                self.hits += 1
+                result = SearchResult.from_dict(data)
+                self._memory.set(key, result, expires_at - time.time(), size=len(json_dumps(data)))
+                return result
+        self.misses += 1
+        return None
+
+    @property
+    def evictions(self) -> int:
+        return self._memory.evictions
+
+    def stats(self) -> dict[str, Any]:
+        """Счётчики кэша: попадания, промахи, вытеснения, заполненность."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._memory),
+            "bytes": self._memory.total_bytes,
+        }
+
+    def close(self) -> None:
+        if self._store is not None:
+            self._store.close()
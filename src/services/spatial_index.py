@@ -0,0 +1,149 @@
+"""
+Пространственный индекс маршрутов каталога по точке старта (поиск «рядом со мной»).
+
+Маршруты разбиты по типу поверхности и разложены по сетке ячеек в градусах;
+внутри ячейки они отсортированы по дистанции, поэтому окно дистанции —
+бинарный поиск, а не перебор. k ближайших ищутся обходом колец ячеек вокруг
+пользователя; обход останавливается, как только ближе k-го найденного
+маршрута непросмотренных ячеек не осталось.
+"""
+
+import heapq
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Iterable
+
+from models.route import Route
+from services.walk_graph import EARTH_RADIUS_M, cell_key, haversine_m
+
+# Ячейка сетки, градусы (~1.1 км по широте)
+DEFAULT_CELL_DEG = 0.01
+
+# Дальше этого маршруты «рядом» не ищутся, км
+DEFAULT_RADIUS_KM = 30.0
+
+KM_PER_DEG = math.radians(1) * EARTH_RADIUS_M / 1000
+
+
+class _Partition:
+    """Маршруты одного типа поверхности, упорядоченные по (ячейка, дистанция)."""
+
+    __slots__ = ("spans", "distances", "lon", "lat", "routes", "rows", "cols")
+
+    def __init__(self, routes: list[Route], cell_deg: float):
+        keyed = sorted(
+            ((cell_key(*r.start, cell_deg), r.distance_km, i) for i, r in enumerate(routes)),
+        )
+        self.routes = [routes[i] for _, _, i in keyed]
+        self.distances = array("d", (d for _, d, _ in keyed))
+        self.lon = array("d", (r.start[0] for r in self.routes))
+        self.lat = array("d", (r.start[1] for r in self.routes))
+        # Ключ ячейки -> [начало, конец) в массивах
+        self.spans: dict[int, tuple[int, int]] = {}
+        start = 0
+        for i in range(1, len(keyed) + 1):
+            if i == len(keyed) or keyed[i][0] != keyed[start][0]:
+                self.spans[keyed[start][0]] = (start, i)
+                start = i
+        # Границы занятых ячеек: за ними кольца обходить незачем
+        keys = list(self.spans)
+        self.rows = (min(k >> 32 for k in keys), max(k >> 32 for k in keys)) if keys else (0, 0)
+        self.cols = (
+            (min(k & 0xFFFFFFFF for k in keys), max(k & 0xFFFFFFFF for k in keys)) if keys else (0, 0)
+        )
+
+
+class SpatialIndex:
+    """
+    Неизменяемый индекс маршрутов с координатами старта (Route.start).
+
+    Маршруты без start в индекс не попадают.
+    """
+
+    def __init__(self, routes: Iterable[Route], cell_deg: float = DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        grouped: dict[str, list[Route]] = defaultdict(list)
+        for route in routes:
+            if route.start is not None:
+                grouped[route.surface_type].append(route)
+        self._partitions = {
+            surface: _Partition(items, cell_deg) for surface, items in grouped.items()
+        }
+        self._size = sum(len(items) for items in grouped.values())
+
+    def __len__(self) -> int:
+        return self._size
+
+    def nearest(
+        self,
+        lon: float,
+        lat: float,
+        surface_type: str,
+        distance_km: float,
+        tolerance_km: float,
+        limit: int = 5,
+        radius_km: float = DEFAULT_RADIUS_KM,
+    ) -> list[tuple[float, Route]]:
+        """
+        Ближайшие к точке маршруты с дистанцией distance_km ± tolerance_km.
+
+        Returns:
+            До limit пар (расстояние до старта в км, маршрут), ближайшие первыми
+        """
+        partition = self._partitions.get(surface_type)
+        if partition is None or limit <= 0:
+            return []
+        spans, distances = partition.spans, partition.distances
+        lons, lats, routes = partition.lon, partition.lat, partition.routes
+        min_km, max_km = distance_km - tolerance_km, distance_km + tolerance_km
+
+        cell_deg = self.cell_deg
+        row_pos = (lat + 90.0) / cell_deg
+        col_pos = (lon + 180.0) / cell_deg
+        row, col = int(row_pos), int(col_pos)
+        # Положение точки внутри своей ячейки (0..1) — для оценки расстояния до края обхода
+        row_frac, col_frac = row_pos - row, col_pos - col
+
+        # Max-heap из limit лучших: (-расстояние, порядковый номер, маршрут)
+        best: list[tuple[float, int, Route]] = []
+        ring = 0
+        while True:
+            if ring == 0:
+                cells = [(row, col)]
+            else:
+                cells = [(row - ring, c) for c in range(col - ring, col + ring + 1)]
+                cells += [(row + ring, c) for c in range(col - ring, col + ring + 1)]
+                for r in range(row - ring + 1, row + ring):
+                    cells += [(r, col - ring), (r, col + ring)]
+
+            for r, c in cells:
+                span = spans.get((r << 32) | c)
+                if span is None:
+                    continue
+                lo = bisect_left(distances, min_km, *span)
+                hi = bisect_right(distances, max_km, lo, span[1])
+                for i in range(lo, hi):
+                    away = haversine_m(lon, lat, lons[i], lats[i]) / 1000
+                    if away > radius_km:
+                        continue
+                    if len(best) < limit:
+                        heapq.heappush(best, (-away, i, routes[i]))
+                    elif away < -best[0][0]:
+                        heapq.heapreplace(best, (-away, i, routes[i]))
+
+            # Ближайшая точка вне просмотренного квадрата колец 0..ring
+            far_lat = min(89.9, abs(lat) + (ring + 1) * cell_deg)
+            lat_cells = min(row_frac, 1 - row_frac) + ring
+            lon_cells = (min(col_frac, 1 - col_frac) + ring) * math.cos(math.radians(far_lat))
+            outside_km = min(lat_cells, lon_cells) * cell_deg * KM_PER_DEG
+            if outside_km >= radius_km or (len(best) == limit and -best[0][0] <= outside_km):
+                break
+            (min_row, max_row), (min_col, max_col) = partition.rows, partition.cols
+            covered = row - ring <= min_row and row + ring >= max_row
+            if covered and col - ring <= min_col and col + ring >= max_col:
+                break
+            ring += 1
+
+        return [(-neg, route) for neg, _, route in sorted(best, reverse=True)]
@@ -0,0 +1,133 @@
+"""
+Анализ extras маршрутов ORS (surface, waytype, steepness).
+
+ORS возвращает extras.<name>.values: [[from, to, value], ...]. Для каждого
+маршрута считается доля длины по значениям за один проход; surface
+дополнительно сводится к типам поверхности продукта — не на каждом сегменте,
+а один раз на каждое встретившееся значение.
+"""
+
+from typing import Sequence
+
+# ORS surface IDs: https://giscience.github.io/openrouteservice/api-reference/endpoints/directions/extra-info/surface/
+# 0=Unknown, 1=Paved, 2=Unpaved, 3=Asphalt, 4=Concrete, 8=Compacted Gravel, 10=Gravel,
+# 11=Dirt, 12=Ground, 14=Paving Stones, 17=Grass
+ORS_SURFACE_ID_TO_PRODUCT = {
+    0: "asphalt",
+    1: "asphalt",
+    2: "trail",
+    3: "asphalt",
+    4: "asphalt",
+    6: "asphalt",
+    7: "trail",
+    8: "trail",
+    10: "trail",
+    11: "trail",
+    12: "park",
+    13: "trail",
+    14: "embankment",
+    15: "trail",
+    17: "park",
+    18: "park",
+}
+
+DEFAULT_PRODUCT = "asphalt"
+PRODUCTS = ("asphalt", "park", "trail", "embankment")
+
+EXTRAS = ("surface", "waytype", "steepness")
+
+
+def _surface_product(value) -> str:
+    # Не int (строка, 12.0, None) — ID 0, как в прежнем parse_surface_from_route
+    surface_id = value if isinstance(value, int) else 0
+    return ORS_SURFACE_ID_TO_PRODUCT.get(surface_id, DEFAULT_PRODUCT)
+
+
+def _empty_result(extra: str) -> dict:
+    # Маршрут без данных о покрытии считается асфальтовым
+    return {DEFAULT_PRODUCT: 1.0} if extra == "surface" else {}
+
+
+def _lengths_by_value(segments: list, extra: str) -> tuple[float, dict]:
+    """
+    Общая длина и длины по значениям: (total, {value: length}).
+
+    Быстрый путь — распаковка [from, to, value] без проверок на сегмент; для
+    surface значения не-int собираются под ключом None (12.0 == 12 в словаре,
+    но для ORS ID это разные значения). Сегменты другой длины или
+    нехешируемые значения — общий цикл.
+    """
+    length_by_value: dict = {}
+    get = length_by_value.get
+    try:
+        if extra == "surface":
+            for start, end, value in segments:
+                if type(value) is not int:
+                    value = None
+                length_by_value[value] = get(value, 0) + end - start
+        else:
+            for start, end, value in segments:
+                length_by_value[value] = get(value, 0) + end - start
+        return sum(length_by_value.values()), length_by_value
+    except (ValueError, TypeError):
+        pass
+
+    total_length = 0.0
+    length_by_value = {}
+    for seg in segments:
+        if len(seg) < 2:
+            continue
+        length = seg[1] - seg[0]
+        total_length += length
+        if len(seg) < 3:
+            continue
+        value = seg[2]
+        if extra == "surface" and not isinstance(value, int):
+            value = None
+        length_by_value[value] = length_by_value.get(value, 0) + length
+    return total_length, length_by_value
+
+
+def _shares(segments: list, extra: str) -> dict:
+    """Доли длины по значениям extras одного маршрута."""
+    if not segments:
+        return _empty_result(extra)
+
+    total_length, length_by_value = _lengths_by_value(segments, extra)
+    if total_length <= 0:
+        return _empty_result(extra)
+    if extra != "surface":
+        return {value: length / total_length for value, length in length_by_value.items()}
+
+    length_by_product: dict[str, float] = {}
+    for value, length in length_by_value.items():
+        product = _surface_product(value)
+        length_by_product[product] = length_by_product.get(product, 0) + length
+    return {product: length / total_length for product, length in length_by_product.items()}
+
+
+def analyze_extras(
+    routes: Sequence[dict],
+    extras: Sequence[str] = EXTRAS,
+) -> list[dict[str, dict]]:
+    """
+    Доли длины по значениям extras для пачки маршрутов ORS.
+
+    Args:
+        routes: Маршруты в формате routes[0] (с ключом "extras")
+        extras: Какие extras считать
+
+    Returns:
+        [{"surface": {"asphalt": 0.7, "park": 0.3}, "waytype": {3: 1.0}, ...}, ...]
+        surface — по типам продукта, остальные — по значениям ORS.
+    """
+    results: list[dict[str, dict]] = [{} for _ in routes]
+    for extra in extras:
+        for result, route in zip(results, routes):
+            result[extra] = _shares(route.get("extras", {}).get(extra, {}).get("values", []), extra)
+    return results
+
+
+def surface_shares(routes: Sequence[dict]) -> list[dict[str, float]]:
+    """Доли типов поверхности продукта для пачки маршрутов."""
+    return [r["surface"] for r in analyze_extras(routes, ("surface",))]
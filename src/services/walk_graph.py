@@ -0,0 +1,220 @@
+"""
+Пешеходный граф на диске: компактные массивы (CSR) в одном файле, читаемом через mmap.
+
+Файл строится офлайн (tools/build_walk_graph.py) из выгрузки OSM. Открытие
+не читает и не разбирает файл целиком: массивы — представления memoryview
+над отображённой памятью, страницы подгружаются ОС по мере обращения и
+разделяются между процессами.
+
+Формат (little-endian, секции выровнены на 8 байт):
+
+    заголовок   magic, число узлов n, рёбер m, размер ячейки сетки, длина meta
+    lon, lat    int32[n]  — координаты × 1e7 (как в OSM)
+    cell        uint64[n] — ключ ячейки сетки; узлы отсортированы по нему
+    offsets     uint32[n + 1] — начало списка рёбер узла
+    targets     uint32[m]
+    lengths     float32[m] — длина ребра, м
+    surface     uint8[m]   — surface ID в кодировке ORS
+    meta        JSON: места (город -> координаты), bbox, источник
+"""
+
+import json
+import math
+import mmap
+import struct
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Any, Iterable, Optional, Sequence
+
+MAGIC = b"WALKGR01"
+_HEADER = struct.Struct("<8sIIdI4x")
+
+COORD_SCALE = 10_000_000
+
+# Ячейка сетки для поиска ближайшего узла, градусы (~500 м по широте)
+DEFAULT_CELL_DEG = 0.005
+
+EARTH_RADIUS_M = 6_371_008.8
+
+
+def cell_key(lon: float, lat: float, cell_deg: float) -> int:
+    row = int((lat + 90.0) / cell_deg)
+    col = int((lon + 180.0) / cell_deg)
+    return (row << 32) | col
+
+
+def haversine_m(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    rlat1, rlat2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((rlat2 - rlat1) / 2) ** 2
+        + math.cos(rlat1) * math.cos(rlat2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def write_walk_graph(
+    path: Path,
+    nodes: Sequence[tuple[float, float]],
+    edges: Iterable[tuple[int, int, float, int]],
+    meta: Optional[dict[str, Any]] = None,
+    cell_deg: float = DEFAULT_CELL_DEG,
+) -> None:
+    """
+    Записать граф в файл.
+
+    Args:
+        nodes: [(lon, lat), ...]
+        edges: Неориентированные рёбра (u, v, длина в м, surface ID ORS);
+            пешеход ходит в обе стороны, поэтому пишутся оба направления
+        meta: Доп. данные (например, {"places": {"москва": [lon, lat]}})
+    """
+    cells = [cell_key(lon, lat, cell_deg) for lon, lat in nodes]
+    order = sorted(range(len(nodes)), key=cells.__getitem__)
+    new_id = [0] * len(nodes)
+    for new, old in enumerate(order):
+        new_id[old] = new
+
+    adjacency: list[list[tuple[int, float, int]]] = [[] for _ in nodes]
+    for u, v, length, surface in edges:
+        if u == v:
+            continue
+        nu, nv = new_id[u], new_id[v]
+        adjacency[nu].append((nv, length, surface))
+        adjacency[nv].append((nu, length, surface))
+
+    n = len(nodes)
+    offsets = [0] * (n + 1)
+    for i, neighbours in enumerate(adjacency):
+        offsets[i + 1] = offsets[i] + len(neighbours)
+    m = offsets[-1]
+
+    meta_bytes = json.dumps(meta or {}, ensure_ascii=False).encode("utf-8")
+    sections = [
+        struct.pack(f"<{n}i", *(round(nodes[old][0] * COORD_SCALE) for old in order)),
+        struct.pack(f"<{n}i", *(round(nodes[old][1] * COORD_SCALE) for old in order)),
+        struct.pack(f"<{n}Q", *(cells[old] for old in order)),
+        struct.pack(f"<{n + 1}I", *offsets),
+        struct.pack(f"<{m}I", *(t for nb in adjacency for t, _, _ in nb)),
+        struct.pack(f"<{m}f", *(length for nb in adjacency for _, length, _ in nb)),
+        bytes(s for nb in adjacency for _, _, s in nb),
+        meta_bytes,
+    ]
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, n, m, cell_deg, len(meta_bytes)))
+        for data in sections:
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.write(data)
+    tmp.replace(path)
+
+
+class WalkGraph:
+    """
+    Граф, отображённый в память (только чтение).
+
+    Узлы — целые 0..n-1; рёбра узла i — индексы offsets[i]..offsets[i+1]
+    в targets/lengths/surface.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, n, m, cell_deg, meta_len = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            view.release()
+            self.close()
+            raise ValueError(f"{self.path}: не файл пешеходного графа")
+        self.node_count = n
+        self.edge_count = m
+        self.cell_deg = cell_deg
+
+        offset = _HEADER.size
+        self._views: list[memoryview] = [view]
+
+        def section(fmt: str, count: int, itemsize: int) -> memoryview:
+            nonlocal offset
+            offset = _align(offset)
+            part = view[offset : offset + count * itemsize].cast(fmt)
+            offset += count * itemsize
+            self._views.append(part)
+            return part
+
+        self.lon = section("i", n, 4)
+        self.lat = section("i", n, 4)
+        self.cells = section("Q", n, 8)
+        self.offsets = section("I", n + 1, 4)
+        self.targets = section("I", m, 4)
+        self.lengths = section("f", m, 4)
+        self.surface = section("B", m, 1)
+        offset = _align(offset)
+        self.meta: dict[str, Any] = json.loads(bytes(view[offset : offset + meta_len]) or b"{}")
+
+    def coord(self, node: int) -> tuple[float, float]:
+        """(lon, lat) узла."""
+        return self.lon[node] / COORD_SCALE, self.lat[node] / COORD_SCALE
+
+    def _scan_cells(self, row: int, col_from: int, col_to: int) -> range:
+        """Узлы ячеек строки row со столбцами col_from..col_to (непрерывный диапазон ключей)."""
+        start = bisect_left(self.cells, (row << 32) | max(col_from, 0))
+        end = bisect_right(self.cells, (row << 32) | max(col_to, 0))
+        return range(start, end)
+
+    def nearest_node(self, lon: float, lat: float, max_rings: int = 4) -> Optional[int]:
+        """
+        Ближайший узел к точке: просмотр ячеек сетки кольцами вокруг точки.
+
+        После первого кольца с узлами просматривается ещё одно — ближе узлов
+        за его пределами не бывает (с точностью до формы ячейки).
+
+        Returns:
+            Номер узла или None, если в max_rings кольцах узлов нет
+        """
+        row = int((lat + 90.0) / self.cell_deg)
+        col = int((lon + 180.0) / self.cell_deg)
+        best, best_dist = None, math.inf
+        found_ring: Optional[int] = None
+        for ring in range(max_rings + 1):
+            if ring == 0:
+                spans = [(row, col, col)]
+            else:
+                spans = [(row - ring, col - ring, col + ring), (row + ring, col - ring, col + ring)]
+                for r in range(row - ring + 1, row + ring):
+                    spans += [(r, col - ring, col - ring), (r, col + ring, col + ring)]
+            for r, c_from, c_to in spans:
+                for node in self._scan_cells(r, c_from, c_to):
+                    dist = haversine_m(lon, lat, *self.coord(node))
+                    if dist < best_dist:
+                        best, best_dist = node, dist
+            if best is not None:
+                if found_ring is None:
+                    found_ring = ring
+                elif ring > found_ring:
+                    break
+        return best
+
+    def places(self) -> dict[str, list[float]]:
+        return self.meta.get("places", {})
+
+    def close(self) -> None:
+        for view in reversed(getattr(self, "_views", [])):
+            view.release()
+        self._views = []
+        if getattr(self, "_mmap", None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> "WalkGraph":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
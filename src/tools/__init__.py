@@ -0,0 +1 @@
+"""Служебные утилиты: офлайн-прогоны, локальные заглушки внешних API."""
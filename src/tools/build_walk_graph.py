@@ -0,0 +1,298 @@
+"""
+Сборка пешеходного графа для локального маршрутизатора из выгрузки OSM.
+
+Берутся пешеходно-проходимые линии (highway=*), узлы и рёбра между
+соседними точками линий; тег surface переводится в surface ID ORS, чтобы
+анализ покрытия работал как с ответами ORS. Места place=city/town попадают
+в meta графа и служат локальным геокодером.
+
+    PYTHONPATH=src python -m tools.build_walk_graph moscow.osm.pbf -o data/graphs/moscow.wgraph
+    PYTHONPATH=src python -m tools.build_walk_graph moscow.osm.bz2 -o data/graphs/moscow.wgraph
+
+.osm/.osm.gz/.osm.bz2 читаются стандартной библиотекой; для .pbf нужен
+пакет osmium (pip install osmium).
+"""
+
+import argparse
+import bz2
+import gzip
+import logging
+import math
+import random
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import IO, Optional
+
+from services.walk_graph import DEFAULT_CELL_DEG, haversine_m, write_walk_graph
+
+logger = logging.getLogger(__name__)
+
+WALKABLE_HIGHWAYS = {
+    "footway",
+    "path",
+    "pedestrian",
+    "living_street",
+    "residential",
+    "service",
+    "track",
+    "steps",
+    "cycleway",
+    "bridleway",
+    "unclassified",
+    "tertiary",
+    "tertiary_link",
+    "secondary",
+    "secondary_link",
+    "primary",
+    "primary_link",
+    "road",
+}
+
+NO_ACCESS = {"no", "private"}
+
+# OSM surface -> surface ID ORS (services/surface_analysis.ORS_SURFACE_ID_TO_PRODUCT)
+OSM_SURFACE_TO_ORS = {
+    "paved": 1,
+    "unpaved": 2,
+    "asphalt": 3,
+    "concrete": 4,
+    "concrete:plates": 4,
+    "concrete:lanes": 4,
+    "cobblestone": 5,
+    "sett": 5,
+    "unhewn_cobblestone": 5,
+    "metal": 6,
+    "wood": 7,
+    "compacted": 8,
+    "fine_gravel": 9,
+    "gravel": 10,
+    "pebblestone": 10,
+    "dirt": 11,
+    "earth": 11,
+    "mud": 11,
+    "ground": 12,
+    "ice": 13,
+    "paving_stones": 14,
+    "sand": 15,
+    "woodchips": 16,
+    "grass": 17,
+    "grass_paver": 18,
+}
+
+# Покрытие по типу дороги, когда тега surface нет
+HIGHWAY_DEFAULT_SURFACE = {"path": 12, "track": 2, "bridleway": 12}
+
+PLACE_TYPES = {"city", "town"}
+
+
+def way_surface(tags: dict[str, str]) -> Optional[int]:
+    """surface ID ORS для пешеходной линии или None, если по ней не пройти."""
+    if tags.get("highway") not in WALKABLE_HIGHWAYS:
+        return None
+    if tags.get("foot") in NO_ACCESS or (
+        tags.get("access") in NO_ACCESS and tags.get("foot") not in {"yes", "designated"}
+    ):
+        return None
+    surface = tags.get("surface")
+    if surface in OSM_SURFACE_TO_ORS:
+        return OSM_SURFACE_TO_ORS[surface]
+    return HIGHWAY_DEFAULT_SURFACE.get(tags["highway"], 0)
+
+
+class _OsmData:
+    """Промежуточные данные разбора: координаты узлов, линии и места."""
+
+    def __init__(self):
+        self.coords: dict[int, tuple[float, float]] = {}
+        self.ways: list[tuple[list[int], int]] = []
+        self.places: dict[str, list[float]] = {}
+
+    def add_node(self, node_id: int, lon: float, lat: float, tags: dict[str, str]) -> None:
+        self.coords[node_id] = (lon, lat)
+        if tags.get("place") in PLACE_TYPES and tags.get("name"):
+            self.places[tags["name"]] = [lon, lat]
+
+    def add_way(self, refs: list[int], tags: dict[str, str]) -> None:
+        surface = way_surface(tags)
+        if surface is not None and len(refs) >= 2:
+            self.ways.append((refs, surface))
+
+
+def _open_xml(path: Path) -> IO[bytes]:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    if path.suffix == ".bz2":
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def read_osm_xml(path: Path) -> _OsmData:
+    """Потоковый разбор OSM XML (узлы и линии), память — только на нужные данные."""
+    data = _OsmData()
+    with _open_xml(path) as f:
+        tags: dict[str, str] = {}
+        refs: list[int] = []
+        root = None
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            if elem.tag == "tag":
+                tags[elem.get("k")] = elem.get("v")
+                continue
+            if elem.tag == "nd":
+                refs.append(int(elem.get("ref")))
+                continue
+            if elem.tag == "node":
+                lon, lat = float(elem.get("lon")), float(elem.get("lat"))
+                data.add_node(int(elem.get("id")), lon, lat, tags)
+            elif elem.tag == "way":
+                data.add_way(refs, tags)
+            elif elem.tag != "relation":
+                continue
+            tags, refs = {}, []
+            # Разобранные элементы не нужны: корень не должен копить их до конца файла
+            root.clear()
+    return data
+
+
+def read_osm_pbf(path: Path) -> _OsmData:
+    """Разбор .osm.pbf через pyosmium (опциональная зависимость)."""
+    try:
+        import osmium
+    except ImportError as e:
+        raise SystemExit(
+            "Для .pbf установите osmium (pip install osmium) или используйте .osm/.osm.bz2"
+        ) from e
+
+    data = _OsmData()
+
+    class Handler(osmium.SimpleHandler):
+        def node(self, n):
+            data.add_node(n.id, n.location.lon, n.location.lat, dict(n.tags))
+
+        def way(self, w):
+            data.add_way([nd.ref for nd in w.nodes], dict(w.tags))
+
+    Handler().apply_file(str(path))
+    return data
+
+
+def build_graph(source: Path, output: Path, cell_deg: float = DEFAULT_CELL_DEG) -> dict:
+    """
+    Построить файл графа из выгрузки OSM.
+
+    Returns:
+        Статистика: узлы, рёбра, места, размер файла
+    """
+    data = read_osm_pbf(source) if source.suffix == ".pbf" else read_osm_xml(source)
+
+    index: dict[int, int] = {}
+    nodes: list[tuple[float, float]] = []
+    edges: list[tuple[int, int, float, int]] = []
+    for refs, surface in data.ways:
+        previous: Optional[int] = None
+        for ref in refs:
+            coord = data.coords.get(ref)
+            if coord is None:
+                previous = None  # линия обрезана границей выгрузки
+                continue
+            node = index.get(ref)
+            if node is None:
+                node = index[ref] = len(nodes)
+                nodes.append(coord)
+            if previous is not None:
+                edges.append((previous, node, haversine_m(*nodes[previous], *coord), surface))
+            previous = node
+
+    meta = {"source": source.name, "places": data.places}
+    write_walk_graph(output, nodes, edges, meta, cell_deg)
+    return {
+        "nodes": len(nodes),
+        "edges": len(edges) * 2,
+        "places": len(data.places),
+        "bytes": output.stat().st_size,
+    }
+
+
+def write_synthetic_osm(
+    path: Path,
+    size: int,
+    spacing_m: float = 100.0,
+    origin: tuple[float, float] = (37.6173, 55.7558),
+    place: str = "Москва",
+    seed: int = 1,
+) -> None:
+    """
+    Синтетическая выгрузка OSM: сетка size × size улиц вокруг origin.
+
+    Для тестов и бенчмарков без настоящего города; часть кварталов —
+    парковые дорожки (ground/grass), часть — асфальт.
+    """
+    rng = random.Random(seed)
+    lon0, lat0 = origin
+    dlat = spacing_m / 111_320
+    dlon = dlat / max(0.1, math.cos(math.radians(lat0)))
+    half = size // 2
+
+    def node_id(row: int, col: int) -> int:
+        return row * size + col + 1
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6">\n')
+        for row in range(size):
+            for col in range(size):
+                lat = lat0 + (row - half) * dlat + rng.uniform(-0.1, 0.1) * dlat
+                lon = lon0 + (col - half) * dlon + rng.uniform(-0.1, 0.1) * dlon
+                f.write(f' <node id="{node_id(row, col)}" lat="{lat:.7f}" lon="{lon:.7f}"/>\n')
+        f.write(f' <node id="{size * size + 1}" lat="{lat0:.7f}" lon="{lon0:.7f}">')
+        f.write(f'<tag k="place" v="city"/><tag k="name" v="{place}"/></node>\n')
+
+        way_id = 1
+        for row in range(size):
+            for col in range(size):
+                for d_row, d_col in ((0, 1), (1, 0)):
+                    r2, c2 = row + d_row, col + d_col
+                    if r2 >= size or c2 >= size:
+                        continue
+                    park = (row // 8 + col // 8) % 3 == 0
+                    if park:
+                        highway, surface = "footway", rng.choice(["ground", "grass"])
+                    else:
+                        highway, surface = "residential", "asphalt"
+                    f.write(
+                        f' <way id="{way_id}"><nd ref="{node_id(row, col)}"/><nd ref="{node_id(r2, c2)}"/>'
+                        f'<tag k="highway" v="{highway}"/><tag k="surface" v="{surface}"/></way>\n'
+                    )
+                    way_id += 1
+        f.write("</osm>\n")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    logging.basicConfig(
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        level=logging.INFO,
+    )
+    parser = argparse.ArgumentParser(description="Сборка пешеходного графа из OSM")
+    parser.add_argument("source", type=Path, help=".osm, .osm.gz, .osm.bz2 или .osm.pbf")
+    parser.add_argument("-o", "--output", type=Path, required=True)
+    parser.add_argument("--cell-deg", type=float, default=DEFAULT_CELL_DEG)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    stats = build_graph(args.source, args.output, args.cell_deg)
+    logger.info(
+        "Граф %s за %.1f с: узлов %d, рёбер %d, мест %d, %.1f МБ",
+        args.output,
+        time.perf_counter() - started,
+        stats["nodes"],
+        stats["edges"],
+        stats["places"],
+        stats["bytes"] / 1e6,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Локальная заглушка Telegram Bot API для нагрузочных прогонов бота без сети.
+
+Отвечает на методы, которые вызывает бот (getMe, setWebhook, sendMessage,
+editMessageText, answerCallbackQuery, ...), правдоподобными объектами Bot API
+и сообщает о каждом ответе бота пользователю (sendMessage/editMessageText)
+через on_reply — по нему нагрузочный прогон (benchmarks/bench_webhook.py)
+считает задержку от апдейта до ответа. Апдейты, добавленные push_update,
+отдаются боту в режиме polling через getUpdates. Бот направляется сюда
+через TELEGRAM_API_URL.
+
+    python -m tools.fake_telegram --port 8081
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+BOT_ID = 1000000
+
+# Методы, которыми бот отвечает пользователю (на них и меряется задержка)
+REPLY_METHODS = frozenset({"sendMessage", "editMessageText"})
+
+# Максимальное ожидание апдейтов в getUpdates, сек (long polling бота — до timeout)
+MAX_POLL_WAIT = 1.0
+
+# (chat_id, метод, отправленное сообщение в формате Bot API, time.perf_counter())
+ReplyCallback = Callable[[int, str, dict, float], None]
+
+
+class FakeTelegramServer(ThreadingHTTPServer):
+    """
+    HTTP-сервер заглушки Bot API; calls — счётчик вызовов по методам.
+
+    on_reply(chat_id, method, message, perf_counter) вызывается из потока
+    сервера на каждый ответ бота пользователю.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], on_reply: Optional[ReplyCallback] = None):
+        super().__init__(address, _FakeTelegramHandler)
+        self.on_reply = on_reply
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        self._message_ids: Counter = Counter()
+        self._updates: list[dict] = []
+        self._updates_ready = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, method: str) -> None:
+        with self._lock:
+            self.calls[method] += 1
+
+    def next_message_id(self, chat_id: int) -> int:
+        """Номера сообщений растут в каждом чате отдельно, как в Telegram."""
+        with self._lock:
+            self._message_ids[chat_id] += 1
+            return self._message_ids[chat_id]
+
+    def push_update(self, update: dict) -> None:
+        """Поставить апдейт (с update_id) в очередь getUpdates."""
+        with self._updates_ready:
+            self._updates.append(update)
+            self._updates_ready.notify_all()
+
+    def next_updates(self, offset: int, timeout: float) -> list[dict]:
+        """Апдейты с update_id >= offset; без них — ожидание до timeout (long polling)."""
+        with self._updates_ready:
+            # offset подтверждает боту всё, что раньше: подтверждённые больше не отдаются
+            self._updates = [u for u in self._updates if u["update_id"] >= offset]
+            if not self._updates:
+                self._updates_ready.wait(min(timeout, MAX_POLL_WAIT))
+            return list(self._updates)
+
+    def start(self) -> "FakeTelegramServer":
+        """Запустить сервер в фоновом потоке."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def bot_user() -> dict:
+    return {"id": BOT_ID, "is_bot": True, "first_name": "Unicorn", "username": "unicorn_load_bot"}
+
+
+def _message(message_id: int, chat_id: int, text: str, reply_markup: Optional[str]) -> dict:
+    message = {
+        "message_id": message_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private"},
+        "from": bot_user(),
+        "text": text,
+    }
+    if reply_markup:
+        message["reply_markup"] = json.loads(reply_markup)
+    return message
+
+
+class _FakeTelegramHandler(BaseHTTPRequestHandler):
+    server: FakeTelegramServer
+    # keep-alive: пул соединений бота не переоткрывает сокет на каждый вызов;
+    # без Nagle заголовки и тело не ждут delayed ACK (~40 мс на вызов)
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _params(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("application/json"):
+            return json.loads(raw or b"{}")
+        # PTB отправляет параметры формой; вложенные объекты — JSON-строками
+        return {k: v[0] for k, v in parse_qs(raw.decode("utf-8")).items()}
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_GET(self):
+        self.do_POST()
+
+    def do_POST(self):
+        # /bot<token>/<method>
+        parts = urlparse(self.path).path.strip("/").split("/")
+        if len(parts) != 2 or not parts[0].startswith("bot"):
+            self._reply(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+            return
+        method = parts[1]
+        params = self._params()
+        self.server.count(method)
+        self._reply(200, {"ok": True, "result": self._result(method, params)})
+
+    def _result(self, method: str, params: dict):
+        if method == "getMe":
+            return {**bot_user(), "can_join_groups": False, "supports_inline_queries": False}
+        if method == "getWebhookInfo":
+            return {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+        if method == "getUpdates":
+            return self.server.next_updates(
+                int(params.get("offset", 0)), float(params.get("timeout", 0))
+            )
+        if method not in REPLY_METHODS:
+            # setWebhook, deleteWebhook, answerCallbackQuery и прочие — «ok»
+            return True
+
+        chat_id = int(params.get("chat_id", 0))
+        if method == "sendMessage":
+            message_id = self.server.next_message_id(chat_id)
+        else:
+            message_id = int(params.get("message_id", 0))
+        message = _message(message_id, chat_id, params.get("text", ""), params.get("reply_markup"))
+        if self.server.on_reply is not None:
+            self.server.on_reply(chat_id, method, message, time.perf_counter())
+        return message
+
+
+def start_fake_telegram(
+    host: str = "127.0.0.1", port: int = 0, on_reply: Optional[ReplyCallback] = None
+) -> FakeTelegramServer:
+    """Запустить заглушку Bot API в фоне (port=0 — свободный порт)."""
+    return FakeTelegramServer((host, port), on_reply=on_reply).start()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Локальная заглушка Telegram Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+
+    server = FakeTelegramServer((args.host, args.port))
+    print(f"Fake Bot API: {server.base_url} (TELEGRAM_API_URL)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""
+Локальная заглушка OpenRouteService для тестов, бенчмарков и офлайн-прогонов.
+
+Отвечает на /geocode/search и /v2/directions/foot-walking/geojson
+детерминированными синтетическими данными в формате ORS. С файлом записей
+(--recordings) сначала отдаёт записанные ответы настоящего ORS; с --upstream
+недостающие ответы запрашиваются у него и дописываются в файл. Задержка
+ответа (--latency, --jitter) и доля ответов 429 (--rate-limit-ratio)
+настраиваются для бенчмарков (benchmarks/bench_search.py).
+
+    python -m tools.ors_stub --port 8089 --latency 0.2
+    python -m tools.ors_stub --recordings data/ors_recordings.json \
+        --upstream https://api.openrouteservice.org
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+from services.openroute_service import DIRECTIONS_PATH, GEOCODE_PATH
+
+CITY_COORDS = {
+    "москва": (37.6173, 55.7558),
+    "санкт-петербург": (30.3351, 59.9343),
+}
+
+# Коэффициент извилистости улиц: реальный маршрут длиннее ломаной по точкам
+STRETCH = 1.3
+
+# Surface ID ORS, из которых заглушка собирает маршруты
+SURFACE_IDS = [3, 12, 17, 11, 14, 1, 10]
+
+POINTS_PER_LEG = 20
+POINTS_PER_SEGMENT = 5
+
+
+def haversine_km(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    rlat1, rlat2 = math.radians(lat1), math.radians(lat2)
+    dlat = rlat2 - rlat1
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(rlat1) * math.cos(rlat2) * math.sin(dlon / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+def synthetic_route(coordinates: list[list[float]]) -> dict:
+    """Ответ Directions (GeoJSON) для ломаной через coordinates."""
+    geometry: list[list[float]] = []
+    length_km = 0.0
+    for (lon1, lat1), (lon2, lat2) in zip(coordinates, coordinates[1:]):
+        length_km += haversine_km(lon1, lat1, lon2, lat2)
+        for i in range(POINTS_PER_LEG):
+            t = i / POINTS_PER_LEG
+            geometry.append([round(lon1 + (lon2 - lon1) * t, 6), round(lat1 + (lat2 - lat1) * t, 6)])
+    geometry.append(list(coordinates[-1]))
+
+    values = []
+    for start in range(0, len(geometry) - 1, POINTS_PER_SEGMENT):
+        end = min(start + POINTS_PER_SEGMENT, len(geometry) - 1)
+        lon, lat = geometry[start]
+        digest = hashlib.md5(f"{lon:.3f}:{lat:.3f}".encode()).digest()
+        values.append([start, end, SURFACE_IDS[digest[0] % len(SURFACE_IDS)]])
+
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": {"type": "LineString", "coordinates": geometry},
+                "properties": {
+                    "summary": {"distance": round(length_km * STRETCH * 1000, 1)},
+                    "extras": {"surface": {"values": values}},
+                },
+            }
+        ],
+    }
+
+
+class Recordings:
+    """
+    Записанные ответы ORS: геокодинг по тексту запроса, Directions по опорным точкам.
+
+    Файл — JSON {"geocode": {ключ: ответ}, "directions": {ключ: ответ}}.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self.geocode: dict[str, dict] = {}
+        self.directions: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.geocode = data.get("geocode", {})
+            self.directions = data.get("directions", {})
+
+    def __len__(self) -> int:
+        return len(self.geocode) + len(self.directions)
+
+    @staticmethod
+    def geocode_key(text: str) -> str:
+        return " ".join(text.split()).casefold()
+
+    @staticmethod
+    def directions_key(coordinates: list) -> str:
+        return json.dumps([[round(lon, 5), round(lat, 5)] for lon, lat in coordinates])
+
+    def get(self, table: dict[str, dict], key: str) -> Optional[dict]:
+        with self._lock:
+            payload = table.get(key)
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return payload
+
+    def put(self, table: dict[str, dict], key: str, payload: dict) -> None:
+        with self._lock:
+            table[key] = payload
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            data = {"geocode": self.geocode, "directions": self.directions}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+class OrsStubServer(ThreadingHTTPServer):
+    """
+    HTTP-сервер заглушки; calls — счётчик запросов по путям.
+
+    latency + U(0, jitter) — задержка ответа, сек; rate_limit_ratio — доля
+    запросов, на которые заглушка отвечает 429 (rate_limited — их число).
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit_ratio: float = 0.0,
+        recordings: Optional[Recordings] = None,
+        upstream: Optional[str] = None,
+        seed: int = 0,
+    ):
+        super().__init__(address, _OrsStubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.recordings = recordings
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.rate_limited = 0
+        self.calls: Counter = Counter()
+        self._calls_lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, path: str) -> None:
+        with self._calls_lock:
+            self.calls[path] += 1
+
+    def reset_counters(self) -> None:
+        with self._calls_lock:
+            self.calls.clear()
+            self.rate_limited = 0
+
+    def next_delay(self) -> float:
+        with self._calls_lock:
+            return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def should_rate_limit(self) -> bool:
+        """Ответить ли на этот запрос 429 (доля rate_limit_ratio)."""
+        if not self.rate_limit_ratio:
+            return False
+        with self._calls_lock:
+            limited = self._rng.random() < self.rate_limit_ratio
+            self.rate_limited += limited
+            return limited
+
+    def fetch_upstream(self, method: str, path: str, **kwargs) -> Optional[dict]:
+        """Ответ настоящего ORS для записи (None — upstream не задан или ошибка)."""
+        if self.upstream is None:
+            return None
+        try:
+            resp = httpx.request(method, f"{self.upstream}{path}", timeout=30.0, **kwargs)
+            resp.raise_for_status()
+            return resp.json()
+        except (httpx.HTTPError, ValueError):
+            return None
+
+    def start(self) -> "OrsStubServer":
+        """Запустить сервер в фоновом потоке."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self.recordings is not None and self.upstream is not None:
+            self.recordings.save()
+
+
+class _OrsStubHandler(BaseHTTPRequestHandler):
+    server: OrsStubServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # Клиент уже отменил запрос (например, медленный кандидат петли)
+            pass
+
+    def _delay(self) -> None:
+        delay = self.server.next_delay()
+        if delay:
+            time.sleep(delay)
+
+    def _rate_limited(self) -> bool:
+        if not self.server.should_rate_limit():
+            return False
+        self._reply(429, {"error": {"code": 429, "message": "Rate Limit Exceeded"}})
+        return True
+
+    def _recorded(self, table_name: str, key: str, method: str, path: str, **kwargs):
+        """Записанный ответ, при промахе — ответ upstream (дописывается в записи)."""
+        recordings = self.server.recordings
+        if recordings is None:
+            return None
+        table = getattr(recordings, table_name)
+        payload = recordings.get(table, key)
+        if payload is None:
+            payload = self.server.fetch_upstream(method, path, **kwargs)
+            if payload is not None:
+                recordings.put(table, key, payload)
+        return payload
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.count(url.path)
+        if url.path != GEOCODE_PATH:
+            self._reply(404, {"error": "not found"})
+            return
+        self._delay()
+        if self._rate_limited():
+            return
+        params = parse_qs(url.query)
+        text = params.get("text", [""])[0]
+        recorded = self._recorded(
+            "geocode",
+            Recordings.geocode_key(text),
+            "GET",
+            url.path,
+            params={k: v[0] for k, v in params.items()},
+        )
+        if recorded is not None:
+            self._reply(200, recorded)
+            return
+        coords = CITY_COORDS.get(" ".join(text.split()).casefold())
+        features = [{"geometry": {"type": "Point", "coordinates": list(coords)}}] if coords else []
+        self._reply(200, {"type": "FeatureCollection", "features": features})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        self.server.count(url.path)
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if url.path != DIRECTIONS_PATH:
+            self._reply(404, {"error": "not found"})
+            return
+        self._delay()
+        if self._rate_limited():
+            return
+        coordinates = body.get("coordinates") or []
+        if len(coordinates) < 2:
+            self._reply(400, {"error": "need at least 2 coordinates"})
+            return
+        recorded = self._recorded(
+            "directions",
+            Recordings.directions_key(coordinates),
+            "POST",
+            url.path,
+            params={k: v[0] for k, v in parse_qs(url.query).items()},
+            json=body,
+        )
+        self._reply(200, recorded if recorded is not None else synthetic_route(coordinates))
+
+
+def start_ors_stub(
+    host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, **kwargs
+) -> OrsStubServer:
+    """Запустить заглушку ORS в фоне (port=0 — свободный порт; kwargs — см. OrsStubServer)."""
+    return OrsStubServer((host, port), latency=latency, **kwargs).start()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Локальная заглушка OpenRouteService")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа, сек")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке, сек")
+    parser.add_argument(
+        "--rate-limit-ratio", type=float, default=0.0, help="доля ответов 429 (0..1)"
+    )
+    parser.add_argument("--recordings", type=Path, help="JSON с записанными ответами ORS")
+    parser.add_argument("--upstream", help="настоящий ORS для записи недостающих ответов")
+    args = parser.parse_args()
+
+    recordings = Recordings(args.recordings) if args.recordings else None
+    server = OrsStubServer(
+        (args.host, args.port),
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit_ratio=args.rate_limit_ratio,
+        recordings=recordings,
+        upstream=args.upstream if recordings is not None else None,
+    )
+    print(f"ORS stub: {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+        if recordings is not None and server.upstream is not None:
+            recordings.save()
+            print(f"Записано ответов: {len(recordings)} -> {recordings.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Офлайн-предрасчёт маршрутов ORS для всех городов, дистанций и направлений.
+
+Прогон по сетке CITIES × 1..50 км × направления заполняет базу
+(services/route_db.py), которую RouteService читает до живого ORS.
+Один маршрут годится для всех типов поверхности, поэтому SURFACE_TYPES
+не умножает число запросов. Прерванный прогон продолжается с места остановки.
+
+    PYTHONPATH=src python -m tools.precompute_routes --concurrency 4
+    PYTHONPATH=src python -m tools.precompute_routes --base-url http://127.0.0.1:8089
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from services.geocode_cache import GeocodeCache
+from services.openroute_service import ORS_BASE, AsyncOpenRouteService
+from services.rate_limiter import (
+    DIRECTIONS_PER_DAY,
+    DIRECTIONS_PER_MINUTE,
+    GEOCODE_PER_DAY,
+    GEOCODE_PER_MINUTE,
+    RateLimiter,
+    RateLimitExceeded,
+)
+from services.route_db import RouteDatabase
+from services.route_service import CACHE_DIR, CITIES, DIRECTIONS_ORDER, ROUTES_DB_FILE
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SweepStats:
+    """Итоги прогона."""
+
+    requested: int = 0
+    saved: int = 0
+    skipped: int = 0
+    failed: int = 0
+    rate_limited: bool = False
+
+
+async def sweep(
+    db: RouteDatabase,
+    ors: AsyncOpenRouteService,
+    cities: list[str],
+    distances: list[int],
+    directions: list[str],
+    concurrency: int = 4,
+) -> SweepStats:
+    """
+    Пройти сетку и сохранить маршруты в db, пропуская уже сохранённые ячейки.
+
+    При исчерпании квоты прогон останавливается; повторный запуск продолжит его.
+    """
+    stats = SweepStats()
+    done = db.done_keys()
+    semaphore = asyncio.Semaphore(concurrency)
+    stop = asyncio.Event()
+
+    async def fetch(city: str, lon: float, lat: float, target_km: int, direction: str) -> None:
+        async with semaphore:
+            if stop.is_set():
+                return
+            stats.requested += 1
+            try:
+                route_data = await ors.get_round_route(lon, lat, target_km, direction)
+            except RateLimitExceeded:
+                stats.rate_limited = True
+                stop.set()
+                return
+        if not route_data:
+            # Не сохраняем: ошибка могла быть временной, ячейка повторится в следующем прогоне
+            stats.failed += 1
+            return
+        db.save(city, target_km, direction, route_data, ors.parse_surface_from_route(route_data))
+        stats.saved += 1
+
+    for city in cities:
+        if stop.is_set():
+            break
+        coords = await ors.geocode(city)
+        if not coords:
+            logger.warning("Не удалось геокодировать %s — пропуск", city)
+            continue
+        lon, lat = coords
+        tasks = []
+        for target_km in distances:
+            for direction in directions:
+                if (city, target_km, direction) in done:
+                    stats.skipped += 1
+                    continue
+                tasks.append(fetch(city, lon, lat, target_km, direction))
+        await asyncio.gather(*tasks)
+        logger.info("%s: сохранено %d, пропущено %d", city, stats.saved, stats.skipped)
+
+    return stats
+
+
+def _parse_distances(value: str) -> list[int]:
+    """Разобрать "1-50" или "5,10,21" в список целых км."""
+    result: list[int] = []
+    for part in value.split(","):
+        if "-" in part:
+            start, end = part.split("-", 1)
+            result.extend(range(int(start), int(end) + 1))
+        elif part:
+            result.append(int(part))
+    return result
+
+
+async def run(args: argparse.Namespace) -> SweepStats:
+    db = RouteDatabase(Path(args.db))
+    cache_dir = Path(args.cache_dir)
+    ors = AsyncOpenRouteService(
+        args.api_key,
+        geocode_cache=GeocodeCache(cache_dir / "geocode.sqlite3"),
+        base_url=args.base_url,
+        geocode_limiter=RateLimiter("geocode", GEOCODE_PER_MINUTE, GEOCODE_PER_DAY),
+        directions_limiter=RateLimiter(
+            "directions", args.per_minute, DIRECTIONS_PER_DAY, queue_timeout=120
+        ),
+    )
+    started = time.perf_counter()
+    try:
+        await ors.start()
+        stats = await sweep(
+            db,
+            ors,
+            args.cities,
+            _parse_distances(args.distances),
+            DIRECTIONS_ORDER,
+            args.concurrency,
+        )
+    finally:
+        await ors.aclose()
+        total = db.count()
+        db.close()
+
+    logger.info(
+        "Прогон за %.1f с: запрошено %d, сохранено %d, пропущено %d, ошибок %d, в базе %d%s",
+        time.perf_counter() - started,
+        stats.requested,
+        stats.saved,
+        stats.skipped,
+        stats.failed,
+        total,
+        " — остановлен по квоте, запустите снова позже" if stats.rate_limited else "",
+    )
+    return stats
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    load_dotenv()
+    logging.basicConfig(
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        level=logging.INFO,
+    )
+    parser = argparse.ArgumentParser(description="Предрасчёт маршрутов ORS")
+    parser.add_argument("--db", default=os.getenv("ROUTES_DB_FILE") or str(ROUTES_DB_FILE))
+    parser.add_argument("--cache-dir", default=os.getenv("CACHE_DIR") or str(CACHE_DIR))
+    parser.add_argument("--api-key", default=os.getenv("OPENROUTESERVICE_API_KEY", ""))
+    parser.add_argument("--base-url", default=os.getenv("ORS_BASE_URL", ORS_BASE))
+    parser.add_argument("--cities", nargs="+", default=CITIES)
+    parser.add_argument("--distances", default="1-50", help='"1-50" или "5,10,21"')
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--per-minute", type=int, default=DIRECTIONS_PER_MINUTE, help="квота directions в минуту"
+    )
+    args = parser.parse_args(argv)
+    if not args.api_key and args.base_url == ORS_BASE:
+        parser.error("нужен OPENROUTESERVICE_API_KEY или --api-key")
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,19 +3,27 @@
 """
 
 import json
+from typing import Optional
 from urllib.parse import quote
 
+from utils.geometry import simplify_to_budget
+
+# 5 знаков ≈ 1 м: точнее карта в ссылке не покажет, а длина URL растёт
+DEFAULT_PRECISION = 5
+
 
 def build_route_map_link(
     coordinates: list[list[float]],
     max_points: int = 30,
+    precision: Optional[int] = DEFAULT_PRECISION,
 ) -> str:
     """
     Ссылка на geojson.io с отображением маршрута.
 
     Args:
         coordinates: [[lon, lat], ...] (GeoJSON order)
-        max_points: Максимум точек (прореживание при превышении)
+        max_points: Максимум точек (упрощение с сохранением формы при превышении)
+        precision: Знаков после запятой в координатах (None — без округления)
 
     Returns:
         URL для geojson.io с маршрутом
@@ -23,15 +31,15 @@ def build_route_map_link(
     if not coordinates:
         return "https://www.openstreetmap.org/"
 
-    if len(coordinates) > max_points:
-        step = len(coordinates) / max_points
-        indices = [min(int(i * step), len(coordinates) - 1) for i in range(max_points)]
-        coordinates = [coordinates[i] for i in indices]
+    coordinates = simplify_to_budget(coordinates, max_points)
+    if precision is not None:
+        coordinates = [[round(lon, precision), round(lat, precision)] for lon, lat, *_ in coordinates]
 
     geojson = {
         "type": "Feature",
         "properties": {},
         "geometry": {"type": "LineString", "coordinates": coordinates},
     }
-    encoded = quote(json.dumps(geojson), safe="")
+    # "," и ":" допустимы во фрагменте URL как есть — экранировать их незачем
+    encoded = quote(json.dumps(geojson, separators=(",", ":")), safe=",:")
     return f"https://geojson.io/#data=data:application/json,{encoded}"
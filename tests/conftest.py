@@ -0,0 +1,198 @@
+"""
+Общие фикстуры тестов.
+"""
+
+import inspect
+import json
+import os
+import time
+from typing import Any, Callable, Optional
+
+import httpx
+import pytest
+
+from services.openroute_service import DIRECTIONS_PATH, GEOCODE_PATH, AsyncOpenRouteService
+from services.route_service import RouteService
+from tools.ors_stub import haversine_km
+
+# Координаты, которые FakeORS возвращает на любой запрос геокодинга
+GEOCODE_POINT = [37.6, 55.7]
+LOOP_COORDINATES = [[37.6, 55.7], [37.61, 55.71], [37.6, 55.7]]
+
+
+class FakeRedis:
+    """
+    Redis в памяти процесса: подмножество команд, которое используют бот и кэши
+    (GET/SET PX/PTTL/EXISTS/DELETE и pipeline). Значения хранятся как bytes.
+    """
+
+    def __init__(self):
+        self.data: dict[str, tuple[bytes, float]] = {}
+        self.round_trips = 0
+
+    def _live(self, key: str):
+        item = self.data.get(key)
+        if item is not None and item[1] <= time.time():
+            del self.data[key]
+            return None
+        return item
+
+    def _get(self, key):
+        item = self._live(key)
+        return item[0] if item else None
+
+    def _set(self, key, value, px=None):
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        self.data[key] = (value, time.time() + px / 1000 if px else float("inf"))
+        return True
+
+    def _pttl(self, key):
+        item = self._live(key)
+        if item is None:
+            return -2
+        return -1 if item[1] == float("inf") else int((item[1] - time.time()) * 1000)
+
+    def _exists(self, key):
+        return int(self._live(key) is not None)
+
+    def _delete(self, key):
+        return int(self.data.pop(key, None) is not None)
+
+    def get(self, key):
+        self.round_trips += 1
+        return self._get(key)
+
+    def set(self, key, value, px=None):
+        self.round_trips += 1
+        return self._set(key, value, px)
+
+    def pttl(self, key):
+        self.round_trips += 1
+        return self._pttl(key)
+
+    def exists(self, key):
+        self.round_trips += 1
+        return self._exists(key)
+
+    def delete(self, key):
+        self.round_trips += 1
+        return self._delete(key)
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def close(self):
+        pass
+
+
+class _FakePipeline:
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, f"_{name}")
+        return lambda *args, **kwargs: self.commands.append((method, args, kwargs))
+
+    def execute(self):
+        self.redis.round_trips += 1
+        return [method(*args, **kwargs) for method, args, kwargs in self.commands]
+
+
+@pytest.fixture
+def redis_client():
+    """
+    Клиент Redis: настоящий при REDIS_TEST_HOST (база очищается), иначе FakeRedis.
+    """
+    host = os.getenv("REDIS_TEST_HOST")
+    if not host:
+        yield FakeRedis()
+        return
+    redis = pytest.importorskip("redis")
+    client = redis.Redis(host=host, port=int(os.getenv("REDIS_TEST_PORT", "6379")), db=15)
+    client.flushdb()
+    yield client
+    client.flushdb()
+    client.close()
+
+
+class FakeORS:
+    """
+    ORS на httpx.MockTransport: геокодинг отвечает GEOCODE_POINT, Directions — петлёй.
+
+    calls — пути всех запросов по порядку. Петля по умолчанию — LOOP_COORDINATES
+    с покрытием surface_id и длиной distance_m; со stretch длина — stretch ×
+    длина запрошенной ломаной (улицы извилистее прямых). directions(request)
+    (может быть async) заменяет ответ Directions целиком.
+    """
+
+    def __init__(
+        self,
+        surface_id: int = 12,
+        distance_m: float = 10000,
+        stretch: Optional[float] = None,
+        directions: Optional[Callable[[httpx.Request], Any]] = None,
+    ):
+        self.surface_id = surface_id
+        self.distance_m = distance_m
+        self.stretch = stretch
+        self.directions = directions
+        self.calls: list[str] = []
+        self.transport = httpx.MockTransport(self._handle)
+
+    @staticmethod
+    def route(
+        surface_id: int = 12, distance_m: float = 10000, coordinates: Optional[list] = None
+    ) -> dict:
+        """Ответ Directions в формате GeoJSON с одним маршрутом."""
+        return {
+            "features": [
+                {
+                    "geometry": {"coordinates": coordinates or LOOP_COORDINATES},
+                    "properties": {
+                        "summary": {"distance": distance_m},
+                        "extras": {"surface": {"values": [[0, 2, surface_id]]}},
+                    },
+                }
+            ]
+        }
+
+    @property
+    def geocode_calls(self) -> int:
+        return self.calls.count(GEOCODE_PATH)
+
+    @property
+    def directions_calls(self) -> int:
+        return self.calls.count(DIRECTIONS_PATH)
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(request.url.path)
+        if request.url.path.endswith(GEOCODE_PATH):
+            return httpx.Response(200, json={"features": [{"geometry": {"coordinates": GEOCODE_POINT}}]})
+        if self.directions is not None:
+            body = self.directions(request)
+            if inspect.isawaitable(body):
+                body = await body
+            return httpx.Response(200, json=body)
+        if self.stretch is None:
+            return httpx.Response(200, json=self.route(self.surface_id, self.distance_m))
+        points = json.loads(request.content)["coordinates"]
+        length_km = sum(haversine_km(*a, *b) for a, b in zip(points, points[1:]))
+        return httpx.Response(
+            200, json=self.route(self.surface_id, length_km * self.stretch * 1000, points)
+        )
+
+    def route_service(self) -> RouteService:
+        """RouteService с ключом ORS, чей async-клиент ходит в этот FakeORS."""
+        service = RouteService(ors_api_key="test-key")
+        service._async_ors_client = AsyncOpenRouteService(
+            "test-key", geocode_cache=service.geocode_cache, transport=self.transport
+        )
+        return service
+
+
+@pytest.fixture
+def fake_ors() -> type[FakeORS]:
+    """Фабрика FakeORS: fake_ors(), fake_ors(surface_id=3), fake_ors(directions=handler)."""
+    return FakeORS
@@ -0,0 +1,54 @@
+"""
+Тесты для кэшей внешних сервисов.
+"""
+
+from services.cache import MISSING
+from services.geocode_cache import GeocodeCache
+from services.route_cache import RouteCache
+
+
+def test_geocode_cache_survives_restart(tmp_path):
+    """Координаты читаются из SQLite новым экземпляром кэша."""
+    path = tmp_path / "geocode.sqlite3"
+    cache = GeocodeCache(path)
+    cache.set("Москва", (37.6, 55.7))
+    cache.close()
+
+    restored = GeocodeCache(path)
+
+    assert restored.get("  москва ") == (37.6, 55.7)
+
+
+def test_geocode_cache_negative_and_ttl(tmp_path):
+    """Отрицательный результат кэшируется, истёкшие записи — промах."""
+    cache = GeocodeCache(tmp_path / "geocode.sqlite3", ttl=-1, negative_ttl=60)
+    cache.set("Атлантида", None)
+    cache.set("Москва", (37.6, 55.7))
+
+    assert cache.get("Атлантида") is None
+    assert cache.get("Москва") is MISSING
+
+
+def test_route_cache_quantizes_key_and_counts(tmp_path):
+    """Близкие центры и дистанции попадают в один ключ; счётчики растут."""
+    cache = RouteCache(tmp_path / "routes.sqlite3")
+    cache.set(37.61731, 55.75581, 10.02, "north", "foot-walking", {"summary": {"distance": 1}})
+
+    assert cache.get(37.61749, 55.75551, 9.98, "north", "foot-walking") == {
+        "summary": {"distance": 1}
+    }
+    assert cache.get(37.61731, 55.75581, 10, "south", "foot-walking") is MISSING
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_route_cache_evicts_by_size_and_reads_disk(tmp_path):
+    """Память ограничена по размеру, вытесненное читается из сжатого SQLite."""
+    route = {"geometry": {"coordinates": [[37.6, 55.7]] * 50}}
+    cache = RouteCache(tmp_path / "routes.sqlite3", max_bytes=1500)
+    for direction in ("north", "east", "south", "west"):
+        cache.set(37.6, 55.7, 10, direction, "foot-walking", route)
+
+    assert cache.evictions > 0
+    assert cache.get(37.6, 55.7, 10, "north", "foot-walking") == route
+    assert cache.stats()["disk_hits"] == 1
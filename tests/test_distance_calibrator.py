@@ -0,0 +1,66 @@
+"""
+Тесты калибровки дистанции круговых маршрутов.
+"""
+
+import pytest
+
+from services.distance_calibrator import DistanceCalibrator
+from services.loop_generator import DETOUR_FACTOR
+
+# Настоящая извилистость улиц в тестовом «городе»
+TRUE_STRETCH = 1.6
+
+
+def test_factor_falls_back_from_direction_to_city_to_default():
+    calibrator = DistanceCalibrator()
+    assert calibrator.factor("Москва", "north") == DETOUR_FACTOR
+
+    # Ломаная 10/1.3 км, маршрут 12.3 км → коэффициент 1.6
+    implied = calibrator.observe("Москва", "north", 10, 1.3, 10 / 1.3 * 1.6)
+
+    assert implied == pytest.approx(1.6)
+    assert calibrator.factor(" москва ", "north") == pytest.approx(1.6)
+    assert calibrator.factor("Москва", "east") == pytest.approx(1.6)
+    assert calibrator.factor("Казань", "north") == DETOUR_FACTOR
+
+
+def test_calibration_persists_between_instances(tmp_path):
+    path = tmp_path / "calibration.json"
+    calibrator = DistanceCalibrator(path)
+    calibrator.observe("Москва", "triangle-east", 10, 1.3, 11.0)
+    calibrator.save()
+
+    restored = DistanceCalibrator(path)
+
+    assert restored.factor("Москва", "triangle-east") == pytest.approx(
+        calibrator.factor("Москва", "triangle-east")
+    )
+
+
+def test_broken_calibration_file_is_ignored(tmp_path):
+    path = tmp_path / "calibration.json"
+    path.write_text("{not json", encoding="utf-8")
+
+    assert DistanceCalibrator(path).factor("Москва", "north") == DETOUR_FACTOR
+
+
+@pytest.mark.asyncio
+async def test_search_corrects_once_then_uses_learned_factor(fake_ors):
+    """Первый поиск в городе корректирует дистанцию, следующие попадают сразу."""
+    ors = fake_ors(stretch=TRUE_STRETCH)
+    service = ors.route_service()
+    service.max_directions_requests = 2
+
+    first = await service.search_ors_async("Москва", 10, "park")
+    first_calls = ors.directions_calls
+    second = await service.search_ors_async("Москва", 15, "park")
+    await service.aclose()
+
+    # Повтор коррекции первого кандидата списан с бюджета поиска (2 запроса),
+    # следующий поиск строится по коэффициенту города без повторов
+    assert first_calls == 2
+    assert ors.directions_calls - first_calls == 2
+    assert all(abs(r.distance_km - 10) <= 1.5 for r in first)
+    assert all(abs(r.distance_km - 15) <= 2.25 for r in second)
+    assert service.distance_calibrator.stats()["within_tolerance"] == 1.0
+    assert service.distance_calibrator.stats()["corrections"] == 1
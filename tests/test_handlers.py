@@ -5,7 +5,13 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 
+from telegram import Update
+from telegram.ext import Application
+
+from bot.bot import Bot
 from handlers.commands import start_handler, help_handler
+from handlers.search import FIND_START_PARAMETER
+from tools.fake_telegram import start_fake_telegram
 
 
 @pytest.mark.asyncio
@@ -37,3 +43,72 @@ async def test_help_handler():
     
     # Проверка
     update.message.reply_text.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_find_conversation_against_fake_bot_api():
+    """Диалог /find целиком: ответы бота приходят в заглушку Bot API."""
+    replies = []
+    fake = start_fake_telegram(on_reply=lambda chat_id, method, message, at: replies.append(message))
+    application = (
+        Application.builder()
+        .token("123456:TEST")
+        .base_url(f"{fake.base_url}/bot")
+        .build()
+    )
+    Bot(application).setup_handlers()
+    await application.initialize()
+
+    user = {"id": 42, "is_bot": False, "first_name": "Test"}
+    chat = {"id": 42, "type": "private"}
+
+    def message(update_id: int, text: str) -> Update:
+        data = {"message_id": update_id, "date": 0, "chat": chat, "from": user, "text": text}
+        if text.startswith("/"):
+            data["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+        return Update.de_json({"update_id": update_id, "message": data}, application.bot)
+
+    def callback(update_id: int, data: str) -> Update:
+        query = {"id": str(update_id), "from": user, "chat_instance": "42", "data": data}
+        query["message"] = replies[-1]
+        return Update.de_json({"update_id": update_id, "callback_query": query}, application.bot)
+
+    await application.process_update(message(1, "/find"))
+    await application.process_update(callback(2, "city:Москва"))
+    await application.process_update(message(3, "6"))
+    await application.process_update(callback(4, "surface:park"))
+    await application.shutdown()
+    fake.close()
+
+    assert len(replies) == 4
+    assert replies[-1]["text"].startswith("Нашёл")
+    assert fake.calls["answerCallbackQuery"] == 2
+
+
+@pytest.mark.asyncio
+async def test_start_find_deep_link_opens_search():
+    """Ссылка /start find из кнопки inline-режима начинает /find, простой /start — приветствие."""
+    replies = []
+    fake = start_fake_telegram(on_reply=lambda chat_id, method, message, at: replies.append(message))
+    application = Application.builder().token("123456:TEST").base_url(f"{fake.base_url}/bot").build()
+    Bot(application).setup_handlers()
+    await application.initialize()
+
+    def start(update_id: int, text: str) -> Update:
+        data = {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 42, "type": "private"},
+            "from": {"id": 42, "is_bot": False, "first_name": "Test"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len("/start")}],
+        }
+        return Update.de_json({"update_id": update_id, "message": data}, application.bot)
+
+    await application.process_update(start(1, f"/start {FIND_START_PARAMETER}"))
+    await application.process_update(start(2, "/start"))
+    await application.shutdown()
+    fake.close()
+
+    assert replies[0]["text"].startswith("Выберите город")
+    assert replies[1]["text"].startswith("Привет")
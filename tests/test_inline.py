@@ -0,0 +1,104 @@
+"""
+Тесты inline-режима: разбор запроса и ответ без запросов к ORS.
+"""
+
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from handlers.search import INLINE_CACHE_TIME, _parse_inline_query, inline_query_handler
+from services.route_service import RouteService
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("москва 10 парк", ("Москва", 10.0, "park")),
+        ("спб 5,5км набережной", ("Санкт-Петербург", 5.5, "embankment")),
+        ("Трейл 12 Санкт-Петербург", ("Санкт-Петербург", 12.0, "trail")),
+        ("москва парк", None),
+        ("москва 100 парк", None),
+        ("", None),
+    ],
+)
+def test_parse_inline_query(text, expected):
+    assert _parse_inline_query(text) == expected
+
+
+def _inline_update(text: str) -> MagicMock:
+    update = MagicMock()
+    update.inline_query.query = text
+    update.inline_query.answer = AsyncMock()
+    return update
+
+
+@pytest.mark.asyncio
+async def test_inline_answer_uses_cached_ors_routes_without_requests(monkeypatch, fake_ors):
+    """Петли ORS из прошлых поисков попадают в ответ, новых запросов к ORS нет."""
+    ors = fake_ors()
+    service = ors.route_service()
+    monkeypatch.setattr("handlers.search.get_route_service", lambda: service)
+    shown = await service.search_ors_async("Москва", 10, "park")
+    requests_before = len(ors.calls)
+
+    update = _inline_update("москва 10 парк")
+    await inline_query_handler(update, MagicMock())
+    await service.aclose()
+
+    assert len(ors.calls) == requests_before
+    results = update.inline_query.answer.call_args.args[0]
+    titles = [r.title for r in results]
+    assert all(r.name in titles for r in shown)
+    assert len({r.id for r in results}) == len(results)
+    assert update.inline_query.answer.call_args.kwargs["cache_time"] == INLINE_CACHE_TIME
+
+
+@pytest.mark.asyncio
+async def test_inline_answer_for_unknown_city_does_not_geocode(monkeypatch, fake_ors):
+    """Города нет в кэше геокодинга: ответ из JSON-каталога, ORS не вызывается."""
+    ors = fake_ors()
+    service = ors.route_service()
+    monkeypatch.setattr("handlers.search.get_route_service", lambda: service)
+
+    update = _inline_update("москва 6 парк")
+    await inline_query_handler(update, MagicMock())
+    await service.aclose()
+
+    assert ors.calls == []
+    results = update.inline_query.answer.call_args.args[0]
+    assert results and all("Москва" in r.description for r in results)
+
+
+@pytest.mark.asyncio
+async def test_inline_incomplete_query_offers_button(monkeypatch):
+    """Неполный запрос: пустой ответ с кнопкой перехода в бота."""
+    service = RouteService()
+    monkeypatch.setattr("handlers.search.get_route_service", lambda: service)
+
+    update = _inline_update("москва")
+    await inline_query_handler(update, MagicMock())
+
+    call = update.inline_query.answer.call_args
+    assert call.args[0] == []
+    assert call.kwargs["button"].start_parameter == "find"
+
+
+@pytest.mark.asyncio
+async def test_inline_answer_is_built_off_the_event_loop(monkeypatch):
+    """База, кэш маршрутов и сборка Route для inline-ответа — в потоке, не в event loop."""
+    service = RouteService()
+    monkeypatch.setattr("handlers.search.get_route_service", lambda: service)
+    search_cached = service.search_cached
+    threads: list = []
+
+    def recording_search_cached(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return search_cached(*args, **kwargs)
+
+    monkeypatch.setattr(service, "search_cached", recording_search_cached)
+    update = _inline_update("москва 6 парк")
+    await inline_query_handler(update, MagicMock())
+
+    assert update.inline_query.answer.call_args.args[0]
+    assert threads and threading.main_thread() not in threads
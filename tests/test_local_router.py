@@ -0,0 +1,118 @@
+"""
+Тесты локального маршрутизатора по пешеходному графу.
+"""
+
+import heapq
+import math
+import random
+
+import pytest
+
+from services.cache import MISSING
+from services.local_router import LocalRouter
+from services.route_service import RouteService
+from services.walk_graph import WalkGraph, haversine_m
+from tools.build_walk_graph import build_graph, way_surface, write_synthetic_osm
+
+
+@pytest.fixture(scope="module")
+def graph_file(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("graph")
+    write_synthetic_osm(directory / "city.osm", size=40)
+    build_graph(directory / "city.osm", directory / "city.wgraph")
+    return directory / "city.wgraph"
+
+
+def _dijkstra(graph: WalkGraph, source: int, target: int) -> float:
+    best = {source: 0.0}
+    heap = [(0.0, source)]
+    while heap:
+        cost, node = heapq.heappop(heap)
+        if node == target:
+            return cost
+        if cost > best[node]:
+            continue
+        for edge in range(graph.offsets[node], graph.offsets[node + 1]):
+            nxt, new_cost = graph.targets[edge], cost + graph.lengths[edge]
+            if new_cost < best.get(nxt, math.inf):
+                best[nxt] = new_cost
+                heapq.heappush(heap, (new_cost, nxt))
+    return math.inf
+
+
+def test_way_surface_uses_osm_tags():
+    assert way_surface({"highway": "footway", "surface": "grass"}) == 17
+    assert way_surface({"highway": "path"}) == 12
+    assert way_surface({"highway": "residential", "foot": "no"}) is None
+    assert way_surface({"highway": "motorway"}) is None
+
+
+def test_nearest_node_matches_brute_force(graph_file):
+    rng = random.Random(3)
+    with WalkGraph(graph_file) as graph:
+        for _ in range(20):
+            lon = 37.6173 + rng.uniform(-0.02, 0.02)
+            lat = 55.7558 + rng.uniform(-0.015, 0.015)
+            expected = min(
+                range(graph.node_count), key=lambda n: haversine_m(lon, lat, *graph.coord(n))
+            )
+
+            assert graph.nearest_node(lon, lat) == expected
+
+
+def test_astar_finds_shortest_path(graph_file):
+    router = LocalRouter(graph_file)
+    graph = router.graph
+    rng = random.Random(5)
+    for _ in range(5):
+        source, target = rng.randrange(graph.node_count), rng.randrange(graph.node_count)
+
+        path = router._shortest_path(source, target, set())
+
+        assert sum(graph.lengths[e] for e in path) == pytest.approx(_dijkstra(graph, source, target))
+    router.close()
+
+
+@pytest.mark.parametrize("direction", ["north", "triangle-east", "square-southwest"])
+def test_round_route_has_ors_shape(graph_file, direction):
+    router = LocalRouter(graph_file)
+    lon, lat = router.geocode(" москва ")
+
+    route = router.get_round_route(lon, lat, 3, direction)
+    router.close()
+
+    coordinates = route["geometry"]["coordinates"]
+    values = route["extras"]["surface"]["values"]
+    assert coordinates[0] == coordinates[-1]
+    assert values[0][0] == 0 and values[-1][1] == len(coordinates) - 1
+    assert all(a[1] == b[0] for a, b in zip(values, values[1:]))
+    assert 1500 < route["summary"]["distance"] < 4500
+    assert set(router.parse_surface_from_route(route)) <= {"asphalt", "park"}
+
+
+@pytest.mark.asyncio
+async def test_route_service_searches_local_graph_without_ors(graph_file):
+    service = RouteService(local_graph_file=graph_file)
+    await service.start()
+
+    routes = await service.search_ors_async("Москва", 3, "asphalt")
+    sync_routes = service.search_ors("Москва", 3, "asphalt")
+    await service.aclose()
+
+    assert routes and sync_routes
+    assert all(r.id.startswith("ors-Москва") for r in routes)
+
+
+def test_route_cache_key_separates_backend_and_correction(graph_file):
+    """Маршрут локального графа не отдаётся из кэша вместо ответа ORS (и наоборот)."""
+    local = RouteService(local_graph_file=graph_file)
+    ors = RouteService(ors_api_key="test-key")
+    raw = RouteService(ors_api_key="test-key", distance_correction=False)
+    route = {"summary": {"distance": 3000}}
+
+    local.route_cache.set(37.6, 55.7, 3, "north", local.cache_profile, route)
+
+    assert len({local.cache_profile, ors.cache_profile, raw.cache_profile}) == 3
+    assert local.route_cache.get(37.6, 55.7, 3, "north", local.cache_profile) == route
+    assert local.route_cache.get(37.6, 55.7, 3, "north", ors.cache_profile) is MISSING
+    assert local.route_cache.get(37.6, 55.7, 3, "north", raw.cache_profile) is MISSING
@@ -0,0 +1,90 @@
+"""
+Тесты генератора кандидатов кругового маршрута.
+"""
+
+import math
+
+import pytest
+
+from config.settings import Settings
+from services.loop_generator import (
+    DETOUR_FACTOR,
+    LoopPlanner,
+    destination_point,
+    format_direction,
+    generate_candidates,
+    loop_waypoints,
+    parse_direction,
+)
+
+
+def _haversine_km(a, b) -> float:
+    lon1, lat1, lon2, lat2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(h))
+
+
+@pytest.mark.parametrize("lat", [-33.9, 0.0, 55.75, 69.0])
+@pytest.mark.parametrize("bearing", [0, 45, 90, 200])
+def test_destination_point_distance_independent_of_latitude(lat, bearing):
+    end = destination_point(30.0, lat, bearing, 5.0)
+
+    assert _haversine_km((30.0, lat), end) == pytest.approx(5.0, rel=1e-6)
+
+
+@pytest.mark.parametrize("lat", [40.0, 55.75, 69.0])
+@pytest.mark.parametrize("direction", ["north", "east", "triangle-southwest", "square-b30"])
+def test_loop_perimeter_matches_distance(lat, direction):
+    points = loop_waypoints(30.0, lat, 10.0, direction)
+
+    perimeter = sum(_haversine_km(a, b) for a, b in zip(points, points[1:]))
+    assert points[0] == points[-1] == [30.0, lat]
+    assert perimeter == pytest.approx(10.0 / DETOUR_FACTOR, rel=1e-3)
+
+
+def test_polygon_centre_lies_along_bearing():
+    points = loop_waypoints(37.6, 55.75, 10.0, "square-east")
+
+    centre_lon = sum(p[0] for p in points[:-1]) / 4
+    centre_lat = sum(p[1] for p in points[:-1]) / 4
+    assert centre_lon > 37.6
+    assert centre_lat == pytest.approx(55.75, abs=1e-3)
+
+
+def test_direction_names_round_trip(caplog):
+    for candidate in generate_candidates(16):
+        assert parse_direction(candidate.direction) == (candidate.shape, candidate.bearing)
+    assert parse_direction("west") == ("out-back", 270.0)
+    assert not caplog.records
+    assert parse_direction("unknown") == ("out-back", 0.0)
+    assert "unknown" in caplog.text
+    assert format_direction("triangle", 22.5) == "triangle-b22.5"
+
+
+def test_loop_shapes_setting_is_stripped_and_validated(monkeypatch):
+    """LOOP_SHAPES: пробелы и пустые элементы отбрасываются, неизвестная форма — ошибка при загрузке."""
+    monkeypatch.setenv("LOOP_SHAPES", " triangle , square,")
+    assert Settings().loop_shapes == ["triangle", "square"]
+
+    monkeypatch.setenv("LOOP_SHAPES", "triangle,hexagon")
+    with pytest.raises(ValueError, match="hexagon"):
+        Settings()
+
+
+def test_default_order_starts_with_cardinal_out_and_back():
+    directions = [c.direction for c in generate_candidates()]
+
+    assert directions[:4] == ["north", "east", "south", "west"]
+    assert len(directions) == 24
+
+
+def test_planner_prefers_cached_then_known_good():
+    planner = LoopPlanner()
+    planner.record(37.6, 55.75, "north", {"asphalt": 1.0})
+    planner.record(37.6, 55.75, "triangle-west", {"park": 0.9, "asphalt": 0.1})
+
+    plan = planner.plan(37.601, 55.751, "park", budget=4, cached=["square-south"])
+
+    assert plan[:2] == ["square-south", "triangle-west"]
+    assert "north" not in plan
+    assert len(plan) == 4
@@ -0,0 +1,72 @@
+"""
+Тесты упрощения геометрии и ссылок на карту.
+"""
+
+import json
+import math
+from urllib.parse import unquote
+
+from utils.geometry import simplify_to_budget
+from utils.map_links import build_route_map_link
+
+
+def _l_shape(points_per_leg: int) -> list[list[float]]:
+    """Плотная линия на восток, затем на север: угол в (37.1, 55.0)."""
+    east = [[37.0 + 0.1 * i / points_per_leg, 55.0] for i in range(points_per_leg)]
+    north = [[37.1, 55.0 + 0.1 * i / points_per_leg] for i in range(points_per_leg + 1)]
+    return east + north
+
+
+def test_simplify_keeps_endpoints_and_corner():
+    line = _l_shape(500)
+
+    simplified = simplify_to_budget(line, 3)
+
+    assert simplified == [line[0], [37.1, 55.0], line[-1]]
+
+
+def test_simplify_respects_budget_and_order():
+    line = [[37.0 + i * 1e-4, 55.0 + 0.01 * math.sin(i / 50)] for i in range(10_000)]
+
+    simplified = simplify_to_budget(line, 30)
+
+    assert len(simplified) == 30
+    indices = [line.index(point) for point in simplified]
+    assert indices == sorted(indices)
+    assert simplified[0] == line[0] and simplified[-1] == line[-1]
+
+
+def test_simplify_long_line_keeps_exact_corners():
+    """Длинная линия прореживается до кандидатов, но углы берутся из исходных точек."""
+    side = 10_000
+    corners = [[37.0, 55.0], [37.1, 55.0], [37.1, 55.1], [37.0, 55.1], [37.0, 55.0]]
+    line = []
+    for (ax, ay), (bx, by) in zip(corners, corners[1:]):
+        line += [[ax + (bx - ax) * i / side, ay + (by - ay) * i / side] for i in range(side)]
+    line.append(corners[-1])
+
+    assert simplify_to_budget(line, 5) == corners
+
+
+def test_simplify_short_line_unchanged():
+    line = [[37.0, 55.0], [37.1, 55.1]]
+
+    assert simplify_to_budget(line, 30) == line
+
+
+def test_map_link_is_compact_geojson():
+    line = [[37.61731234, 55.75581234, 150.0]] + _l_shape(200)
+
+    link = build_route_map_link(line, max_points=10)
+
+    prefix = "https://geojson.io/#data=data:application/json,"
+    assert link.startswith(prefix)
+    assert " " not in link
+    geojson = json.loads(unquote(link[len(prefix):]))
+    coordinates = geojson["geometry"]["coordinates"]
+    assert len(coordinates) == 10
+    assert coordinates[0] == [37.61731, 55.75581]
+
+
+def test_map_link_without_coordinates():
+    assert build_route_map_link([]) == "https://www.openstreetmap.org/"
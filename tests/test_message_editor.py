@@ -0,0 +1,115 @@
+"""
+Тесты постепенного вывода результатов поиска в пределах лимита правок чата.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+from telegram.error import BadRequest, RetryAfter
+
+from bot.message_editor import MessageEditor
+from handlers.search import surface_callback
+from services.rate_limiter import TokenBucket
+
+
+@pytest.mark.asyncio
+async def test_editor_coalesces_updates_within_chat_rate():
+    """Первая правка — сразу, промежуточные сверх лимита схлопываются в последнюю."""
+    sent: list[tuple[float, str]] = []
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+
+    async def edit(text: str, **kwargs) -> None:
+        sent.append((loop.time() - t0, text))
+
+    editor = MessageEditor(edit, TokenBucket(1, 20))
+    editor.update("ищу")
+    await asyncio.sleep(0)
+    editor.update("1 маршрут")
+    editor.update("2 маршрута")
+    await editor.flush()
+
+    assert [text for _, text in sent] == ["ищу", "2 маршрута"]
+    assert sent[0][0] < 0.02 and sent[1][0] >= 0.04
+    assert editor.edits == 2 and editor.skipped == 1
+
+
+@pytest.mark.asyncio
+async def test_editor_retries_after_telegram_flood_control():
+    """RetryAfter — повтор той же правки после паузы, «not modified» не ошибка."""
+    calls: list[str] = []
+
+    async def edit(text: str, **kwargs) -> None:
+        calls.append(text)
+        if len(calls) == 1:
+            raise RetryAfter(0)
+        if text == "тот же":
+            raise BadRequest("Message is not modified")
+
+    editor = MessageEditor(edit, TokenBucket(5, 100))
+    editor.update("итог")
+    await editor.flush()
+    editor.update("тот же")
+    await editor.flush()
+
+    assert calls == ["итог", "итог", "тот же"]
+
+
+@pytest.mark.asyncio
+async def test_editor_sends_final_text_after_rejected_intermediate_edit():
+    """Отклонённая промежуточная правка не мешает итоговому тексту и не роняет flush()."""
+    calls: list[str] = []
+    release = asyncio.Event()
+
+    async def edit(text: str, **kwargs) -> None:
+        calls.append(text)
+        if text == "длинный":
+            await release.wait()
+            raise BadRequest("Message is too long")
+
+    editor = MessageEditor(edit, TokenBucket(5, 100))
+    editor.update("длинный")
+    await asyncio.sleep(0)
+    editor.update("итог")
+    release.set()
+    await editor.flush()
+
+    assert calls == ["длинный", "итог"]
+    assert editor.edits == 1
+
+
+@pytest.mark.asyncio
+async def test_surface_callback_shows_first_route_before_search_finishes(monkeypatch, fake_ors):
+    """«Ищу…», затем первый маршрут до ответа медленных запросов, затем итог."""
+
+    async def directions(request: httpx.Request) -> dict:
+        await asyncio.sleep(0.01 if ors.directions_calls == 1 else 0.2)
+        return fake_ors.route(12, distance_m=5000)
+
+    ors = fake_ors(directions=directions)
+    service = ors.route_service()
+    monkeypatch.setattr("handlers.search.get_route_service", lambda: service)
+    monkeypatch.setattr("handlers.search.chat_edit_bucket", lambda chat_id: TokenBucket(10, 100))
+
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    edits: list[tuple[float, str]] = []
+
+    async def edit_message_text(text: str, **kwargs) -> None:
+        edits.append((loop.time() - t0, text))
+
+    context = MagicMock()
+    context.user_data = {"search_city": "Москва", "search_distance": 5.0}
+    update = MagicMock()
+    update.callback_query.data = "surface:park"
+    update.callback_query.answer = AsyncMock()
+    update.callback_query.edit_message_text = edit_message_text
+
+    await surface_callback(update, context)
+    await service.aclose()
+
+    assert edits[0][1].startswith("🔎")
+    assert "ищу ещё" in edits[1][1] and edits[1][0] < 0.15
+    assert edits[-1][1].startswith("Нашёл 3") and edits[-1][0] >= 0.2
@@ -0,0 +1,123 @@
+"""
+Тесты для метрик Prometheus и эндпоинта /metrics.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from services.metrics import (
+    HANDLER_SECONDS,
+    ORS_RATE_LIMITED,
+    ORS_RESPONSES,
+    SEARCHES,
+    CallbackMetric,
+    Counter,
+    Histogram,
+    MetricsServer,
+    Registry,
+    _Metric,
+    timed_handler,
+)
+from services.openroute_service import AsyncOpenRouteService
+from services.rate_limiter import RateLimiter, RateLimitExceeded
+from services.route_service import RouteService
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Корзины выводятся накопленными, с +Inf, суммой и числом наблюдений."""
+    registry = Registry()
+    histogram = registry.register(Histogram("t_seconds", "Тест", ["handler"], buckets=(0.1, 1.0)))
+    counter = registry.register(Counter("t_total", "Тест", ["status"]))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.labels("find").observe(value)
+    counter.labels('a"b').inc()
+
+    text = registry.render()
+
+    assert "# TYPE t_seconds histogram" in text
+    assert 't_seconds_bucket{handler="find",le="0.1"} 1' in text
+    assert 't_seconds_bucket{handler="find",le="1"} 3' in text
+    assert 't_seconds_bucket{handler="find",le="+Inf"} 4' in text
+    assert 't_seconds_count{handler="find"} 4' in text
+    assert 't_seconds_sum{handler="find"} 4.25' in text
+    assert 't_total{status="a\\"b"} 1' in text
+
+
+def test_metric_kinds_must_define_children_and_samples():
+    """Базовый класс метрики абстрактный; у CallbackMetric значения — только через track()."""
+
+    class Incomplete(_Metric):
+        def _new_child(self):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete("t_incomplete", "Тест")
+    with pytest.raises(TypeError, match="track"):
+        CallbackMetric("t_callback", "Тест", ["cache"]).labels("geocode")
+
+
+@pytest.mark.asyncio
+async def test_ors_429_and_local_quota_are_counted():
+    """429 от ORS и отказ локальной квоты попадают в ors_rate_limited_total."""
+    transport = httpx.MockTransport(lambda request: httpx.Response(429, json={}))
+    ors = AsyncOpenRouteService("test-key", transport=transport)
+    responses = ORS_RESPONSES.labels("directions", "429")
+    http_429 = ORS_RATE_LIMITED.labels("directions", "http_429")
+    quota = ORS_RATE_LIMITED.labels("geocode", "quota")
+    before = responses.value, http_429.value, quota.value
+
+    assert await ors.get_round_route(37.6, 55.7, 10, "north") is None
+    await ors.aclose()
+    limiter = RateLimiter("geocode", per_minute=1, per_day=100)
+    await limiter.acquire()
+    with pytest.raises(RateLimitExceeded):
+        await limiter.acquire(timeout=0.01)
+
+    assert (responses.value, http_429.value, quota.value) == (
+        before[0] + 1,
+        before[1] + 1,
+        before[2] + 1,
+    )
+
+
+@pytest.mark.asyncio
+async def test_json_fallback_search_and_handler_latency_are_counted():
+    """Поиск без ORS считается как json, обработчик — в bot_handler_seconds."""
+    service = RouteService()
+    json_searches = SEARCHES.labels("json")
+    before = json_searches.value
+
+    @timed_handler
+    async def metrics_test_handler():
+        return await service.search_async("Москва", 6, "park")
+
+    assert await metrics_test_handler()
+    assert json_searches.value == before + 1
+    assert HANDLER_SECONDS.labels("metrics_test_handler").count == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_server_serves_prometheus_text():
+    """GET /metrics отдаёт текст Prometheus, другие пути — 404."""
+    registry = Registry()
+    registry.register(Counter("up_total", "Тест")).labels().inc()
+    server = MetricsServer(0, host="127.0.0.1", registry=registry)
+    await server.start()
+
+    async def get(path: str) -> bytes:
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    metrics, missing = await get("/metrics"), await get("/")
+    await server.aclose()
+
+    assert metrics.startswith(b"HTTP/1.1 200 OK")
+    assert b"text/plain; version=0.0.4" in metrics
+    assert metrics.endswith(b"up_total 1\n")
+    assert missing.startswith(b"HTTP/1.1 404")
@@ -0,0 +1,109 @@
+"""
+Тесты офлайн-предрасчёта маршрутов и локальной заглушки ORS.
+"""
+
+import pytest
+
+from services.openroute_service import DIRECTIONS_PATH, AsyncOpenRouteService
+from services.route_db import RouteDatabase
+from services.route_service import RouteService
+from tools.ors_stub import Recordings, start_ors_stub
+from tools.precompute_routes import sweep
+
+
+@pytest.fixture
+def ors_stub():
+    server = start_ors_stub()
+    yield server
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_sweep_fills_db_and_resumes(ors_stub, tmp_path):
+    """Прогон заполняет базу, повторный — ничего не запрашивает."""
+    db = RouteDatabase(tmp_path / "routes.sqlite3")
+    ors = AsyncOpenRouteService("test-key", base_url=ors_stub.base_url)
+    directions = ["north", "east", "south", "west"]
+
+    stats = await sweep(db, ors, ["Москва"], [5, 10], directions)
+    resumed = await sweep(db, ors, ["Москва"], [5, 10], directions)
+    await ors.aclose()
+
+    assert stats.saved == 8
+    assert resumed.requested == 0 and resumed.skipped == 8
+    assert ors_stub.calls[DIRECTIONS_PATH] == 8
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_search_reads_precomputed_db_first(ors_stub, tmp_path):
+    """RouteService отдаёт маршруты из базы без обращений к ORS."""
+    path = tmp_path / "routes.sqlite3"
+    db = RouteDatabase(path)
+    ors = AsyncOpenRouteService("test-key", base_url=ors_stub.base_url)
+    await sweep(db, ors, ["Москва"], [10], ["north", "east", "south", "west"])
+    await ors.aclose()
+    db.close()
+    calls_before = sum(ors_stub.calls.values())
+
+    service = RouteService(
+        ors_api_key="test-key", ors_base_url=ors_stub.base_url, routes_db_file=path
+    )
+    routes = await service.search_async("Москва", 10.2, "park")
+    await service.aclose()
+
+    assert routes
+    assert sum(ors_stub.calls.values()) == calls_before
+
+
+@pytest.mark.asyncio
+async def test_stub_records_from_upstream_and_replays(ors_stub, tmp_path):
+    """Ответы upstream записываются в файл, повторный прогон отдаёт их без upstream."""
+    path = tmp_path / "recordings.json"
+    recorder = start_ors_stub(recordings=Recordings(path), upstream=ors_stub.base_url)
+    ors = AsyncOpenRouteService("test-key", base_url=recorder.base_url)
+    recorded = await ors.get_round_route(37.6173, 55.7558, 5, "north")
+    await ors.aclose()
+    recorder.close()
+
+    replay = start_ors_stub(recordings=Recordings(path))
+    ors = AsyncOpenRouteService("test-key", base_url=replay.base_url)
+    replayed = await ors.get_round_route(37.6173, 55.7558, 5, "north")
+    await ors.aclose()
+    replay.close()
+
+    assert ors_stub.calls[DIRECTIONS_PATH] == 1
+    assert replay.recordings.hits == 1
+    assert replayed == recorded
+
+
+@pytest.mark.asyncio
+async def test_stub_injects_rate_limit_responses():
+    """rate_limit_ratio=1 — каждый запрос получает 429."""
+    stub = start_ors_stub(rate_limit_ratio=1.0)
+    ors = AsyncOpenRouteService("test-key", base_url=stub.base_url)
+    route = await ors.get_round_route(37.6173, 55.7558, 5, "north")
+    await ors.aclose()
+    stub.close()
+
+    assert route is None
+    assert stub.rate_limited == 1
+
+
+def test_precomputed_cell_of_other_surface_falls_through_to_json(tmp_path):
+    """Ячейка базы с другой поверхностью не перекрывает подходящие маршруты JSON."""
+    path = tmp_path / "routes.sqlite3"
+    db = RouteDatabase(path)
+    route_data = {
+        "summary": {"distance": 6000},
+        "geometry": {"coordinates": [[37.6, 55.7], [37.61, 55.71], [37.6, 55.7]]},
+    }
+    db.save("Москва", 6, "north", route_data, {"asphalt": 1.0})
+    db.close()
+
+    service = RouteService(routes_db_file=path)
+    routes = service.search("Москва", 6, "park")
+    service.route_db.close()
+
+    assert routes == service.search_json("Москва", 6, "park")
+    assert routes and not any(r.id.startswith("ors-") for r in routes)
@@ -0,0 +1,94 @@
+"""
+Тесты для лимитера запросов ORS и single-flight.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from services.openroute_service import OpenRouteService
+from services.rate_limiter import RateLimiter, RateLimitExceeded
+from services.route_service import RouteService
+from services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_queues_then_rejects_past_deadline():
+    """Запрос сверх квоты ждёт токен, а если не дождётся — отклоняется сразу."""
+    limiter = RateLimiter("test", per_minute=600, per_day=10000, queue_timeout=0.5)
+    loop = asyncio.get_running_loop()
+    for _ in range(600):
+        await limiter.acquire()
+
+    t0 = loop.time()
+    await limiter.acquire()  # токен появится через ~0.1 с
+    assert 0.05 < loop.time() - t0 < 0.5
+
+    with pytest.raises(RateLimitExceeded):
+        await limiter.acquire(timeout=0.01)
+    assert limiter.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_releases_queue_after_timeout_and_cancel():
+    """Отклонённый по дедлайну или отменённый запрос не оставляет очередь занятой."""
+    limiter = RateLimiter("test", per_minute=1, per_day=100, queue_timeout=120.0)
+    await limiter.acquire()
+    holder = asyncio.create_task(limiter.acquire())  # ждёт токен ~60 с, держа очередь
+    await asyncio.sleep(0)
+
+    with pytest.raises(RateLimitExceeded):
+        await limiter.acquire(timeout=0.01)
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    holder.cancel()
+    await asyncio.gather(holder, waiter, return_exceptions=True)
+
+    assert not limiter._lock.locked()
+
+
+@pytest.mark.asyncio
+async def test_sync_search_shares_quota_with_async_path():
+    """Синхронный поиск ORS расходует ту же квоту, что и асинхронный, и не идёт в сеть сверх неё."""
+    service = RouteService(ors_api_key="test-key")
+    service.directions_limiter = RateLimiter(
+        "directions", per_minute=1, per_day=100, queue_timeout=0.01
+    )
+    service.geocode_cache.set("Москва", (37.6, 55.7))
+    assert service._get_ors_client().directions_limiter is service.directions_limiter
+
+    await service.directions_limiter.acquire()
+
+    with pytest.raises(RateLimitExceeded):
+        service.search_ors("Москва", 10, "park")
+
+
+def test_sync_client_drains_quota_on_429():
+    """Ответ 429 синхронному клиенту обнуляет минутную квоту лимитера."""
+    limiter = RateLimiter("directions", per_minute=60, per_day=1000, queue_timeout=0.01)
+
+    OpenRouteService._send("directions", limiter, lambda: httpx.Response(429))
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire_blocking()
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_one_call():
+    """Одновременные вызовы с одним ключом выполняют func один раз."""
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(flight.run("key", work) for _ in range(5)))
+
+    assert results == [1] * 5
+    assert flight.coalesced == 4
+    assert len(flight) == 0
@@ -0,0 +1,198 @@
+"""
+Тесты общих для реплик кэшей и состояния диалогов в Redis.
+
+Без REDIS_TEST_HOST используется FakeRedis из conftest.py.
+"""
+
+import time
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from telegram import CallbackQuery, Chat, Message, MessageEntity, Update, User
+from telegram.ext import MessageHandler, filters
+
+from bot.conversation_store import RedisConversationStore
+from handlers.search import CITY, DISTANCE, SURFACE, get_search_conversation_handler
+from services.cache import MISSING
+from services.geocode_cache import GeocodeCache
+from services.redis_store import CircuitBreaker, RedisStore
+from services.route_cache import RouteCache
+
+
+def _round_trips(client) -> int:
+    return getattr(client, "round_trips", 0)
+
+
+def test_redis_store_roundtrip_and_ttl(redis_client):
+    store = RedisStore(redis_client, "test", compress=True)
+    store.set("a", {"x": [1, 2]}, ttl=60)
+
+    value, expires_at = store.get("a")
+
+    assert value == {"x": [1, 2]}
+    assert 0 < expires_at - time.time() <= 60
+    assert store.get("missing") == (MISSING, 0.0)
+    assert store.contains_many(["a", "missing"]) == {"a"}
+
+
+class _DownRedis:
+    """Недоступный Redis: каждый запрос — ошибка соединения."""
+
+    def __init__(self):
+        self.attempts = 0
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def get(self, key):
+        pass
+
+    def pttl(self, key):
+        pass
+
+    def execute(self):
+        self.attempts += 1
+        raise ConnectionError("Redis недоступен")
+
+    def set(self, key, value, px=None):
+        self.execute()
+
+
+def test_store_stops_calling_unavailable_redis_until_reset(monkeypatch):
+    """После ошибки Redis не опрашивается RESET_AFTER секунд, затем — один пробный запрос."""
+    client = _DownRedis()
+    store = RedisStore(client, "test", breaker=CircuitBreaker(reset_after=5))
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+
+    for _ in range(10):
+        assert store.get("a") == (MISSING, 0.0)
+        store.set("a", 1, ttl=60)
+    assert client.attempts == 1
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert store.get("a") == (MISSING, 0.0)
+    store.set("a", 1, ttl=60)
+    assert client.attempts == 2
+    assert store.breaker.trips == 1 and store.breaker.skipped == 20
+
+
+def test_route_cache_shared_between_replicas_in_one_pipeline(redis_client):
+    replica_a = RouteCache(store=RedisStore(redis_client, "routes", compress=True))
+    replica_b = RouteCache(store=RedisStore(redis_client, "routes", compress=True))
+    directions = ["north", "east", "south", "west"]
+    for direction in directions[:3]:
+        replica_a.set(37.6, 55.7, 10, direction, "foot-walking", {"direction": direction})
+
+    before = _round_trips(redis_client)
+    cached = replica_b.contains_many(37.6, 55.7, 10, directions, "foot-walking")
+    loaded = replica_b.prefetch(37.6, 55.7, 10, directions, "foot-walking")
+
+    assert cached == {"north", "east", "south"}
+    assert loaded == 3
+    if hasattr(redis_client, "round_trips"):
+        assert _round_trips(redis_client) - before == 2
+    # Прочитанное pipeline-ом отдаётся из памяти реплики
+    before = _round_trips(redis_client)
+    assert replica_b.get(37.6, 55.7, 10, "east", "foot-walking") == {"direction": "east"}
+    assert _round_trips(redis_client) == before
+
+
+def test_geocode_cache_shared_between_replicas(redis_client):
+    replica_a = GeocodeCache(store=RedisStore(redis_client, "geocode"))
+    replica_b = GeocodeCache(store=RedisStore(redis_client, "geocode"))
+    replica_a.set("Москва", (37.6, 55.75))
+    replica_a.set("Нигдебург", None)
+
+    assert replica_b.prefetch(["москва", "Нигдебург", "Казань"]) == 2
+    assert replica_b.get(" МОСКВА ") == (37.6, 55.75)
+    assert replica_b.get("Нигдебург") is None
+    assert replica_b.get("Казань") is MISSING
+
+
+def _bot() -> MagicMock:
+    bot = MagicMock()
+    bot.username = "runbot"
+    bot.send_message = AsyncMock()
+    bot.edit_message_text = AsyncMock()
+    bot.answer_callback_query = AsyncMock()
+    return bot
+
+
+def _message(text: str, bot: MagicMock) -> Message:
+    entities = [MessageEntity(MessageEntity.BOT_COMMAND, 0, len(text))] if text.startswith("/") else []
+    message = Message(
+        message_id=1,
+        date=datetime.now(),
+        chat=Chat(1, Chat.PRIVATE),
+        from_user=User(42, "Runner", False),
+        text=text,
+        entities=entities,
+    )
+    message.set_bot(bot)
+    return message
+
+
+def _callback(data: str, bot: MagicMock) -> Update:
+    query = CallbackQuery("q", User(42, "Runner", False), "chat", message=_message("…", bot), data=data)
+    query.set_bot(bot)
+    return Update(2, callback_query=query)
+
+
+async def _process(handler, update: Update) -> None:
+    """Обработка апдейта «репликой»: свой процесс — своя пустая user_data."""
+    check = handler.check_update(update)
+    assert check is not None
+    context = MagicMock()
+    context.user_data = {}
+    await handler.handle_update(update, MagicMock(), check, context)
+
+
+@pytest.mark.asyncio
+async def test_conversation_continues_on_another_replica(redis_client):
+    store = RedisConversationStore(redis_client)
+    replica_a = get_search_conversation_handler(store)
+    replica_b = get_search_conversation_handler(store)
+    bot = _bot()
+
+    await _process(replica_a, Update(1, message=_message("/find", bot)))
+    assert store.load("search", (1, 42), 42) == (CITY, None)
+
+    await _process(replica_b, _callback("city:Москва", bot))
+    assert store.load("search", (1, 42), 42) == (DISTANCE, {"search_city": "Москва"})
+
+    await _process(replica_a, Update(3, message=_message("10", bot)))
+    state, user_data = store.load("search", (1, 42), 42)
+    assert state == SURFACE
+    assert user_data == {"search_city": "Москва", "search_distance": 10.0}
+
+    # /cancel на одной реплике завершает диалог и для другой
+    await _process(replica_b, Update(4, message=_message("/cancel", bot)))
+    assert store.load("search", (1, 42), 42) == (None, None)
+
+
+@pytest.mark.asyncio
+async def test_shared_conversation_reads_redis_only_in_handle_update(redis_client):
+    """check_update не ходит в Redis; апдейт не для диалога уходит следующему обработчику."""
+    store = RedisConversationStore(redis_client)
+    conversation = get_search_conversation_handler(store)
+    fallback = AsyncMock()
+    application = MagicMock()
+    application.handlers = {0: [conversation, MessageHandler(filters.TEXT & ~filters.COMMAND, fallback)]}
+    bot = _bot()
+    text = Update(5, message=_message("10", bot))
+    trips = _round_trips(redis_client)
+
+    assert conversation.check_update(_callback("page:abc:1", bot)) is None
+    check = conversation.check_update(text)
+    assert check is not None
+    assert _round_trips(redis_client) == trips
+
+    # Диалога нет: текст обрабатывает fallback группы, состояние не появляется
+    context = MagicMock()
+    context.user_data = {}
+    await conversation.handle_update(text, application, check, context)
+
+    fallback.assert_awaited_once()
+    assert store.load("search", (1, 42), 42) == (None, None)
@@ -0,0 +1,55 @@
+"""
+Тесты для индекса маршрутов.
+"""
+
+import random
+
+from models.route import Route
+from services.route_index import RouteIndex
+
+
+def _route(i: int, city: str, surface: str, distance: float) -> Route:
+    return Route(
+        id=f"r{i}",
+        city=city,
+        name=f"Маршрут {i}",
+        distance_km=distance,
+        surface_type=surface,
+        description="",
+        features=[],
+    )
+
+
+def test_query_matches_linear_scan():
+    """Индекс возвращает то же окно, что и полный перебор с сортировкой."""
+    rng = random.Random(42)
+    routes = [
+        _route(i, rng.choice(["Москва", "Казань"]), rng.choice(["park", "trail"]),
+               round(rng.uniform(1, 50), 1))
+        for i in range(2000)
+    ]
+    index = RouteIndex(routes)
+
+    for distance in (1, 7.3, 25, 50):
+        expected = sorted(
+            (r for r in routes
+             if r.city == "Москва" and r.surface_type == "park"
+             and distance - 2 <= r.distance_km <= distance + 2),
+            key=lambda r: abs(r.distance_km - distance),
+        )
+        result = index.query("Москва", "park", distance, 2)
+        assert [abs(r.distance_km - distance) for r in result] == [
+            abs(r.distance_km - distance) for r in expected
+        ]
+        assert {r.id for r in result} == {r.id for r in expected}
+
+
+def test_query_limit_returns_nearest():
+    """limit отдаёт ближайшие k маршрутов."""
+    routes = [_route(i, "Москва", "park", d) for i, d in enumerate([3, 5, 6, 9, 10, 12])]
+    index = RouteIndex(routes)
+
+    result = index.query("Москва", "park", 9.5, 3, limit=2)
+
+    assert [r.distance_km for r in result] == [9, 10]
+    assert index.query("Казань", "park", 9.5, 3) == []
@@ -0,0 +1,55 @@
+"""
+Тесты для загрузчика каталога маршрутов.
+"""
+
+import json
+import os
+
+from services.route_loader import RouteDataset, iter_route_records
+
+
+def _record(i: int, distance: float = 5.0) -> dict:
+    return {
+        "id": f"r{i}",
+        "city": "Москва",
+        "name": f"Маршрут {i}",
+        "distance_km": distance,
+        "surface_type": "park",
+        "description": "",
+        "features": [],
+    }
+
+
+def test_iter_json_array_streams_small_chunks(tmp_path):
+    """JSON-массив читается по записям при блоке меньше записи."""
+    path = tmp_path / "routes.json"
+    records = [_record(i) for i in range(20)]
+    path.write_text(json.dumps(records, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    assert list(iter_route_records(path, chunk_size=7)) == records
+
+
+def test_iter_ndjson(tmp_path):
+    """NDJSON читается построчно."""
+    path = tmp_path / "routes.ndjson"
+    path.write_text("\n".join(json.dumps(_record(i)) for i in range(3)) + "\n", encoding="utf-8")
+
+    assert [r["id"] for r in iter_route_records(path)] == ["r0", "r1", "r2"]
+
+
+def test_dataset_reloads_on_mtime_change_and_keeps_old_on_error(tmp_path):
+    """Каталог подменяется при изменении файла; битый файл не ломает поиск."""
+    path = tmp_path / "routes.json"
+    path.write_text(json.dumps([_record(1)]), encoding="utf-8")
+    dataset = RouteDataset(path)
+    assert len(dataset.snapshot.routes) == 1
+
+    path.write_text(json.dumps([_record(1), _record(2, 10)]), encoding="utf-8")
+    os.utime(path, (1, 1))
+    assert dataset.reload()
+    assert len(dataset.snapshot.index.query("Москва", "park", 10, 1)) == 1
+
+    path.write_text('[{"id": "r3"', encoding="utf-8")
+    os.utime(path, (2, 2))
+    assert not dataset.reload()
+    assert len(dataset.snapshot.routes) == 2
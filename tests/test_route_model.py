@@ -0,0 +1,86 @@
+"""
+Тесты модели маршрута: сериализация и разбор ответа ORS.
+"""
+
+import json
+from pathlib import Path
+
+from models.route import Route
+from services.route_loader import iter_route_records, load_snapshot
+
+ROUTES_FILE = Path(__file__).resolve().parent.parent / "data" / "routes.json"
+
+
+def test_route_dict_round_trip_keeps_start_and_features():
+    """to_dict → from_dict возвращает тот же маршрут; features — кортеж, start — пара float."""
+    route = Route(
+        id="r1",
+        city="Москва",
+        name="Маршрут 1",
+        distance_km=5.0,
+        surface_type="park",
+        description="Тестовый маршрут",
+        features=["парк", "освещение"],
+        map_link="https://example.com/map",
+        start=(37, 55.7),
+    )
+
+    data = json.loads(json.dumps(route.to_dict(), ensure_ascii=False))
+    restored = Route.from_dict(data)
+
+    assert restored == route
+    assert restored.features == ("парк", "освещение")
+    assert restored.start == (37.0, 55.7)
+
+
+def test_route_without_start_omits_it_in_dict():
+    route = Route.from_dict(
+        {
+            "id": "r2",
+            "city": "Казань",
+            "name": "Маршрут 2",
+            "distance_km": "3.5",
+            "surface_type": "asphalt",
+            "description": "",
+        }
+    )
+
+    assert route.distance_km == 3.5 and route.features == () and route.start is None
+    assert "start" not in route.to_dict()
+    assert Route.from_dict(route.to_dict()) == route
+
+
+def test_from_ors_builds_name_id_and_start_from_response():
+    route_data = {
+        "summary": {"distance": 10049},
+        "geometry": {"coordinates": [[37.6, 55.7, 150.0], [37.61, 55.71], [37.6, 55.7]]},
+    }
+
+    route = Route.from_ors(route_data, "Санкт-Петербург", "park", direction="triangle-northeast")
+
+    assert route.id == "ors-Санкт-Петербург-10.0-park-triangle-northeast"
+    assert route.name == "Петля-треугольник на северо-восток (10.0 км)"
+    assert route.distance_km == 10.0
+    assert route.features == ("park", "динамический маршрут")
+    assert route.start == (37.6, 55.7)
+    assert route.map_link and route.map_link.startswith("https://geojson.io/")
+    assert Route.from_dict(route.to_dict()) == route
+
+
+def test_from_ors_without_geometry_or_direction():
+    route = Route.from_ors({"summary": {"distance": 5000}}, "Москва", "asphalt")
+
+    assert route.name == "Маршрут от центра (5.0 км)"
+    assert route.map_link is None and route.start is None
+
+
+def test_bundled_catalog_loads_completely_and_round_trips():
+    """Каждая запись data/routes.json разбирается и переживает to_dict → from_dict."""
+    records = list(iter_route_records(ROUTES_FILE))
+    snapshot = load_snapshot(ROUTES_FILE)
+
+    assert records and len(snapshot.routes) == len(records)
+    assert len({r.id for r in snapshot.routes}) == len(records)
+    for record, route in zip(records, snapshot.routes):
+        assert route.id == record["id"]
+        assert Route.from_dict(route.to_dict()) == route
@@ -0,0 +1,308 @@
+"""
+Тесты для сервиса маршрутов и клиента OpenRouteService.
+"""
+
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import httpx
+import pytest
+
+from services.openroute_service import GEOCODE_PATH, AsyncOpenRouteService, OpenRouteService
+from services.route_service import RouteService
+
+
+@pytest.mark.asyncio
+async def test_async_client_reuses_one_connection_pool(fake_ors):
+    """Async-клиент держит один httpx.AsyncClient между вызовами."""
+    ors = AsyncOpenRouteService("test-key", transport=fake_ors().transport)
+    await ors.start()
+    client = ors._client
+
+    assert await ors.geocode("Москва") == (37.6, 55.7)
+    assert await ors.get_round_route(37.6, 55.7, 10, "north") is not None
+    assert ors._client is client
+
+    await ors.aclose()
+    assert not ors.is_started
+
+
+@pytest.mark.asyncio
+async def test_search_async_returns_ors_routes(fake_ors):
+    """search_async возвращает маршруты ORS с нужной поверхностью."""
+    ors = fake_ors(surface_id=12)
+    service = ors.route_service()
+    await service.start()
+
+    routes = await service.search_async("Москва", 10, "park")
+    await service.aclose()
+
+    assert routes
+    assert all(r.surface_type == "park" for r in routes)
+    assert ors.calls[0] == GEOCODE_PATH
+
+
+@pytest.mark.asyncio
+async def test_warm_geocode_cache_skips_geocode_on_search(fake_ors):
+    """После прогрева из CITIES поиск не геокодирует город повторно."""
+    ors = fake_ors()
+    service = ors.route_service()
+    await service.start()
+    await service.wait_warm()
+    geocode_calls = ors.geocode_calls
+
+    await service.search_async("Москва", 10, "park")
+    await service.aclose()
+
+    assert geocode_calls == len(service.get_cities())
+    assert ors.geocode_calls == geocode_calls
+
+
+@pytest.mark.asyncio
+async def test_start_warms_catalog_and_geocode_in_background(fake_ors):
+    """start() не ждёт прогрева: каталог и кэш геокодинга догружаются в фоне."""
+    ors = fake_ors()
+    service = ors.route_service()
+    await service.start()
+
+    assert ors.calls == [] and service.dataset._snapshot is None
+    await service.wait_warm()
+    await service.aclose()
+
+    assert ors.geocode_calls == len(service.get_cities())
+    assert service.dataset._snapshot is not None and service.dataset._snapshot.routes
+
+
+@pytest.mark.asyncio
+async def test_search_during_warm_up_loads_catalog_off_the_event_loop(fake_ors):
+    """Поиск до конца прогрева ждёт фоновую загрузку каталога, а не читает файл в loop."""
+    service = fake_ors().route_service()
+    reload = service.dataset.reload
+    threads: list = []
+
+    def recording_reload():
+        threads.append(threading.current_thread())
+        return reload()
+
+    service.dataset.reload = recording_reload
+    await service.start()
+    routes = await service.search_async("Москва", 6, "park")
+    await service.wait_warm()
+    await service.aclose()
+
+    assert routes
+    assert threads and threading.main_thread() not in threads
+
+
+def test_import_does_not_build_service_load_numpy_or_read_dotenv():
+    """Импорт бота не читает .env, не создаёт RouteService (это делает post_init) и не тянет NumPy."""
+    code = (
+        "import sys, dotenv; calls = []; "
+        "dotenv.load_dotenv = lambda *args, **kwargs: calls.append(args); "
+        "import main, services.route_service as rs; "
+        "print(rs._route_service is None, 'numpy' in sys.modules, bool(calls))"
+    )
+    src_dir = Path(__file__).resolve().parent.parent / "src"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=src_dir, capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.split() == ["True", "False", "False"]
+
+
+@pytest.mark.asyncio
+async def test_search_async_falls_back_to_json_without_api_key():
+    """Без API-ключа async-поиск идёт по JSON."""
+    service = RouteService()
+
+    routes = await service.search_async("Москва", 6, "park")
+
+    assert routes
+    assert all(r.city == "Москва" and r.surface_type == "park" for r in routes)
+
+
+@pytest.mark.asyncio
+async def test_search_ors_async_fans_out_and_cancels_slow_directions(fake_ors):
+    """Направления запрашиваются параллельно, медленный запрос отменяется."""
+    started: list = []
+
+    async def directions(request: httpx.Request) -> dict:
+        mid_lon = json.loads(request.content)["coordinates"][1][0]
+        started.append(mid_lon)
+        if mid_lon < 37.6:  # west
+            await asyncio.sleep(5)
+        return fake_ors.route(12)
+
+    service = fake_ors(directions=directions).route_service()
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+
+    routes = await service.search_ors_async("Москва", 10, "park")
+    await service.aclose()
+
+    assert len(routes) == 3
+    assert len(started) == 4
+    assert loop.time() - t0 < 1
+
+
+@pytest.mark.asyncio
+async def test_search_stream_yields_first_route_before_slow_directions(fake_ors):
+    """Первый подходящий маршрут приходит до ответа медленных запросов Directions."""
+
+    async def directions(request: httpx.Request) -> dict:
+        await asyncio.sleep(0.01 if ors.directions_calls == 1 else 0.3)
+        return fake_ors.route(12)
+
+    ors = fake_ors(directions=directions)
+    service = ors.route_service()
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    yielded = []
+    async for routes, final in service.search_stream("Москва", 10, "park"):
+        yielded.append((loop.time() - t0, len(routes), final))
+    await service.aclose()
+
+    assert yielded[0][1] == 1 and yielded[0][0] < 0.2 and not yielded[0][2]
+    assert yielded[-1][1] == 3 and yielded[-1][0] >= 0.3 and yielded[-1][2]
+    assert [final for *_, final in yielded].count(True) == 1
+
+
+@pytest.mark.asyncio
+async def test_search_ors_async_reuses_candidates_below_threshold(fake_ors):
+    """Если ни одно направление не прошло порог, повторных запросов нет."""
+    ors = fake_ors(surface_id=3)  # asphalt
+    service = ors.route_service()
+
+    routes = await service.search_ors_async("Москва", 10, "park")
+    await service.aclose()
+
+    assert len(routes) == 1
+    assert ors.directions_calls == 4
+
+
+@pytest.mark.asyncio
+async def test_search_ors_async_respects_directions_budget(fake_ors):
+    """Поиск не тратит больше max_directions_requests запросов Directions."""
+    ors = fake_ors(surface_id=3)
+    service = ors.route_service()
+    service.max_directions_requests = 2
+
+    await service.search_ors_async("Москва", 10, "park")
+    await service.aclose()
+
+    assert ors.directions_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_distance_correction_retry_counts_against_directions_budget(fake_ors):
+    """Повтор коррекции дистанции не выводит поиск за max_directions_requests."""
+    # Всегда 16 км на 10 км заказа: каждый ответ вне допуска
+    ors = fake_ors(distance_m=16000)
+    service = ors.route_service()
+    service.max_directions_requests = 2
+
+    routes = await service.search_ors_async("Москва", 10, "park")
+    await service.aclose()
+
+    assert routes
+    assert ors.directions_calls == 2
+    assert service.directions_calls == 2
+
+
+class _CountingOpenRouteService(OpenRouteService):
+    """Синхронный клиент без сети, считающий запросы Directions."""
+
+    def __init__(self, response: dict):
+        super().__init__("test-key")
+        self.response = response
+        self.directions_calls = 0
+
+    def geocode(self, text):
+        return (37.6, 55.7)
+
+    def get_round_route(self, lon, lat, distance_km, direction="north", detour_factor=1.3):
+        self.directions_calls += 1
+        return self._parse_directions(self.response)
+
+
+def test_search_ors_reuses_candidates_below_threshold(fake_ors):
+    """Синхронный поиск тоже не запрашивает направления повторно."""
+    service = RouteService(ors_api_key="test-key")
+    service._ors_client = _CountingOpenRouteService(fake_ors.route(3))
+
+    routes = service.search_ors("Москва", 10, "park")
+
+    assert len(routes) == 1
+    assert service._ors_client.directions_calls == 4
+
+
+def test_search_ors_correction_retry_counts_against_directions_budget(fake_ors):
+    """Синхронный поиск: повтор коррекции тоже списывается с бюджета."""
+    service = RouteService(ors_api_key="test-key")
+    service._ors_client = _CountingOpenRouteService(fake_ors.route(12, distance_m=16000))
+    service.max_directions_requests = 3
+
+    service.search_ors("Москва", 10, "park")
+
+    assert service._ors_client.directions_calls == 3
+
+
+@pytest.mark.asyncio
+async def test_repeated_search_served_from_route_cache(fake_ors):
+    """Повторный поиск с теми же параметрами не вызывает Directions."""
+    ors = fake_ors()
+    service = ors.route_service()
+
+    await service.search_ors_async("Москва", 10, "park")
+    first = ors.directions_calls
+    routes = await service.search_ors_async("Москва", 10, "park")
+    await service.aclose()
+
+    assert routes
+    assert ors.directions_calls == first
+    assert service.route_cache.stats()["hits"] > 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_searches_share_ors_calls(fake_ors):
+    """Одинаковые одновременные поиски разных пользователей — один набор запросов."""
+    ors = fake_ors(surface_id=3)
+    service = ors.route_service()
+
+    results = await asyncio.gather(
+        *(service.search_ors_async("Москва", 10, "park") for _ in range(3))
+    )
+    await service.aclose()
+
+    assert all(len(r) == 1 for r in results)
+    assert ors.geocode_calls == 1
+    assert ors.directions_calls == 4
+
+
+@pytest.mark.asyncio
+async def test_planner_spends_budget_on_bearing_that_matched_before(fake_ors):
+    """Следующий поиск у той же точки начинает с азимута, давшего нужное покрытие."""
+    far_points: list = []
+
+    def directions(request: httpx.Request) -> dict:
+        start, far, _ = json.loads(request.content)["coordinates"]
+        far_points.append(far)
+        # Парк только к востоку от старта
+        return fake_ors.route(12 if far[0] > start[0] + 1e-3 else 3)
+
+    service = fake_ors(directions=directions).route_service()
+    service.max_directions_requests = 2
+    service.distance_correction = False
+
+    await service.search_ors_async("Москва", 10, "park")
+    first_search = len(far_points)
+    routes = await service.search_ors_async("Москва", 12, "park")
+    await service.aclose()
+
+    assert first_search == 2
+    assert routes[0].name.startswith("Маршрут на восток")
+    assert [p[0] > 37.601 for p in far_points[first_search:]].count(True) == 1
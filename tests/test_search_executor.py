@@ -0,0 +1,93 @@
+"""
+Тесты пула поисков и параллельной обработки апдейтов по пользователям.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from telegram import Update
+
+from bot.update_processor import PerUserUpdateProcessor
+from handlers.search import SURFACE, surface_callback
+from services.route_service import RouteService
+from services.search_executor import SearchExecutor, SearchQueueFull
+
+
+@pytest.mark.asyncio
+async def test_executor_limits_workers_and_rejects_when_queue_is_full():
+    """Не больше workers поисков одновременно, сверх очереди — SearchQueueFull."""
+    executor = SearchExecutor(workers=2, max_queue=1)
+    release = asyncio.Event()
+    started: list[int] = []
+
+    async def search(n: int) -> int:
+        started.append(n)
+        await release.wait()
+        return n
+
+    tasks = [asyncio.create_task(executor.run(lambda n=n: search(n))) for n in range(3)]
+    await asyncio.sleep(0)
+
+    assert started == [0, 1] and executor.queued == 1
+    with pytest.raises(SearchQueueFull):
+        await executor.run(lambda: search(3))
+    release.set()
+    assert await asyncio.gather(*tasks) == [0, 1, 2]
+    assert executor.rejected == 1 and executor.queued == 0
+
+
+def _update(user_id: int) -> MagicMock:
+    update = MagicMock(spec=Update)
+    update.effective_user.id = user_id
+    return update
+
+
+@pytest.mark.asyncio
+async def test_processor_keeps_user_order_and_does_not_block_other_users():
+    """Апдейты пользователя — по порядку, другой пользователь не ждёт первого."""
+    processor = PerUserUpdateProcessor(8)
+    release = asyncio.Event()
+    events: list[str] = []
+
+    async def handle(name: str, wait: bool = False) -> None:
+        events.append(f"{name} start")
+        if wait:
+            await release.wait()
+        events.append(f"{name} end")
+
+    first = asyncio.create_task(processor.process_update(_update(1), handle("a1", wait=True)))
+    second = asyncio.create_task(processor.process_update(_update(1), handle("a2")))
+    await asyncio.sleep(0)
+    await processor.process_update(_update(2), handle("b1"))
+    release.set()
+    await asyncio.gather(first, second)
+
+    assert events == ["a1 start", "b1 start", "b1 end", "a1 end", "a2 start", "a2 end"]
+    assert processor._queues == {}
+
+
+@pytest.mark.asyncio
+async def test_surface_callback_replies_busy_when_search_queue_is_full(monkeypatch):
+    """Полная очередь поисков: ответ «занято» с кнопками, данные поиска сохранены."""
+    service = RouteService(search_workers=1, search_queue_size=0)
+    monkeypatch.setattr("handlers.search.get_route_service", lambda: service)
+    release = asyncio.Event()
+    busy = asyncio.create_task(service.search_executor.run(release.wait))
+    await asyncio.sleep(0)
+
+    context = MagicMock()
+    context.user_data = {"search_city": "Москва", "search_distance": 5.0}
+    update = MagicMock()
+    update.callback_query.data = "surface:park"
+    update.callback_query.answer = AsyncMock()
+    update.callback_query.edit_message_text = AsyncMock()
+
+    assert await surface_callback(update, context) == SURFACE
+    release.set()
+    await busy
+
+    call = update.callback_query.edit_message_text.call_args
+    assert "слишком много поисков" in call.args[0]
+    assert call.kwargs["reply_markup"] is not None
+    assert context.user_data == {"search_city": "Москва", "search_distance": 5.0}
@@ -0,0 +1,191 @@
+"""
+Тесты кэша результатов поиска, листания и «ещё похожие».
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from telegram.constants import MessageLimit
+
+from handlers.search import results_callback, surface_callback
+from models.route import Route
+from services.redis_store import RedisStore
+from services.route_service import RouteService
+from services.search_results import SearchResult, SearchResultCache
+
+
+def _route(n: int) -> Route:
+    return Route(
+        id=f"r{n}",
+        city="Москва",
+        name=f"Маршрут {n}",
+        distance_km=5.0,
+        surface_type="park",
+        description="Тестовый маршрут",
+        features=("парк",),
+    )
+
+
+def test_cache_returns_result_by_key_and_counts_evictions():
+    """Результат доступен по ключу до вытеснения по памяти; вытеснения считаются."""
+    first = SearchResult(5.0, "park", city="Москва", routes=[_route(n) for n in range(3)])
+    size = len(str(first.to_dict()).encode())
+    cache = SearchResultCache(max_bytes=size * 2)
+
+    key = cache.put(first)
+    assert cache.get(key) is first
+    for _ in range(3):
+        cache.put(SearchResult(5.0, "park", city="Москва", routes=[_route(n) for n in range(3)]))
+
+    assert cache.get(key) is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["evictions"] >= 2 and stats["bytes"] <= size * 2
+
+
+def test_cache_expires_results_after_ttl(monkeypatch):
+    """По истечении TTL кнопки результата получают «устарело»."""
+    cache = SearchResultCache(ttl=60)
+    key = cache.put(SearchResult(5.0, "park", city="Москва", routes=[_route(1)]))
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+
+    assert cache.get(key) is None
+
+
+def test_result_saved_on_one_replica_is_paged_on_another(redis_client):
+    """Кнопку может обработать другая реплика: результат читается из Redis."""
+    replica_a = SearchResultCache(store=RedisStore(redis_client, "results", compress=True))
+    replica_b = SearchResultCache(store=RedisStore(redis_client, "results", compress=True))
+    result = SearchResult(
+        5.0, "park", location=(37.6, 55.7), routes=[_route(1), _route(2)], away_km=[0.4, 1.2]
+    )
+
+    key = replica_a.put(result)
+
+    assert replica_b.get(key) == result
+    assert replica_b.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_extend_reuses_geocode_and_built_directions(fake_ors):
+    """«Ещё» не геокодирует город заново и не строит уже построенные петли."""
+    ors = fake_ors()
+    service = ors.route_service()
+    routes = await service.search_ors_async("Москва", 10, "park")
+    result = SearchResult(10, "park", city="Москва")
+    result.merge(routes)
+    first_directions = ors.directions_calls
+
+    added = await service.extend_results(result)
+    await service.aclose()
+
+    assert added > 0
+    assert result.routes[: len(routes)] == routes
+    assert len({r.id for r in result.routes}) == len(result.routes)
+    assert ors.geocode_calls == 1
+    # Новые запросы — только за кандидатами сверх прошлого бюджета
+    new_directions = ors.directions_calls - first_directions
+    assert new_directions <= service.max_directions_requests + first_directions - len(routes)
+    assert service.search_results.get(result.key) is result
+
+
+def _callback(data: str) -> MagicMock:
+    update = MagicMock()
+    update.effective_chat.id = 1
+    update.callback_query.data = data
+    update.callback_query.answer = AsyncMock()
+    update.callback_query.edit_message_text = AsyncMock()
+    return update
+
+
+@pytest.mark.asyncio
+async def test_results_callback_pages_stored_result(monkeypatch):
+    """Кнопка «вперёд» показывает следующую страницу из кэша со сквозной нумерацией."""
+    service = RouteService()
+    monkeypatch.setattr("handlers.search.get_route_service", lambda: service)
+    key = service.search_results.put(
+        SearchResult(5.0, "park", city="Москва", routes=[_route(n) for n in range(1, 6)], exhausted=True)
+    )
+
+    update = _callback(f"page:{key}:1")
+    await results_callback(update, MagicMock())
+
+    text = update.callback_query.edit_message_text.call_args.args[0]
+    assert "(стр. 2/2)" in text and "4. Маршрут 4" in text and "Маршрут 1" not in text
+    keyboard = update.callback_query.edit_message_text.call_args.kwargs["reply_markup"]
+    assert [b.callback_data for row in keyboard.inline_keyboard for b in row] == [f"page:{key}:0"]
+
+
+@pytest.mark.asyncio
+async def test_results_callback_reports_expired_result(monkeypatch):
+    """Неизвестный ключ: всплывающий ответ без правки сообщения."""
+    service = RouteService()
+    monkeypatch.setattr("handlers.search.get_route_service", lambda: service)
+
+    update = _callback("more:missing")
+    await results_callback(update, MagicMock())
+
+    assert "устарели" in update.callback_query.answer.call_args.args[0]
+    update.callback_query.edit_message_text.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_streamed_search_fits_message_limit_and_final_has_no_progress_mark(monkeypatch):
+    """Промежуточные тексты — не больше страницы, итог — без «ищу ещё»."""
+    service = RouteService()
+    monkeypatch.setattr("handlers.search.get_route_service", lambda: service)
+    routes = [_route(n) for n in range(1, 201)]
+
+    async def search_stream(**kwargs):
+        yield routes[:100], False
+        yield routes, True
+
+    monkeypatch.setattr(service, "search_stream", search_stream)
+    context = MagicMock()
+    context.user_data = {"search_city": "Москва", "search_distance": 5.0}
+    update = _callback("surface:park")
+    edits: list[str] = []
+
+    async def edit(text, **kwargs):
+        edits.append(text)
+
+    update.callback_query.edit_message_text = edit
+    await surface_callback(update, context)
+
+    assert all(len(text) <= MessageLimit.MAX_TEXT_LENGTH for text in edits)
+    assert "ищу ещё" not in edits[-1] and "1. Маршрут 1" in edits[-1]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_more_presses_extend_result_once(fake_ors):
+    """Два одновременных «ещё» у одного результата — одно дополнение."""
+    service = fake_ors().route_service()
+    result = SearchResult(10, "park", city="Москва")
+    result.merge(await service.search_ors_async("Москва", 10, "park"))
+    service.search_results.put(result)
+
+    added = await asyncio.gather(service.extend_results(result), service.extend_results(result))
+    await service.aclose()
+
+    assert added[0] == added[1] > 0
+    assert result.budget == 2 * service.max_directions_requests
+    assert len({r.id for r in result.routes}) == len(result.routes)
+
+
+@pytest.mark.parametrize("data", ["page:abc:x", "page:abc:", "page:abc:-1", "bogus:abc"])
+@pytest.mark.asyncio
+async def test_results_callback_ignores_malformed_data(monkeypatch, data):
+    """Чужие callback_data не роняют обработчик."""
+    service = RouteService()
+    monkeypatch.setattr("handlers.search.get_route_service", lambda: service)
+    service.search_results.put(SearchResult(5.0, "park", city="Москва", routes=[_route(1)], key="abc"))
+
+    update = _callback(data)
+    await results_callback(update, MagicMock())
+
+    update.callback_query.answer.assert_called_once_with()
+    update.callback_query.edit_message_text.assert_not_called()
@@ -0,0 +1,112 @@
+"""
+Тесты пространственного индекса маршрутов (поиск по геопозиции).
+"""
+
+import random
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from handlers.search import DISTANCE, location_handler, surface_callback
+from models.route import Route
+from services.route_service import RouteService
+from services.spatial_index import SpatialIndex
+from services.walk_graph import haversine_m
+
+
+def _route(i: int, surface: str, distance: float, lon: float, lat: float) -> Route:
+    return Route(
+        id=f"r{i}",
+        city="Москва",
+        name=f"Маршрут {i}",
+        distance_km=distance,
+        surface_type=surface,
+        description="",
+        features=[],
+        start=(lon, lat),
+    )
+
+
+def test_nearest_matches_brute_force():
+    """k ближайших в окне дистанции совпадают с полным перебором."""
+    rng = random.Random(7)
+    routes = [
+        _route(
+            i,
+            rng.choice(["park", "trail"]),
+            round(rng.uniform(1, 50), 1),
+            37.6 + rng.gauss(0, 0.1),
+            55.75 + rng.gauss(0, 0.06),
+        )
+        for i in range(5000)
+    ]
+    index = SpatialIndex(routes)
+
+    for _ in range(20):
+        lon, lat = 37.6 + rng.uniform(-0.3, 0.3), 55.75 + rng.uniform(-0.2, 0.2)
+        distance = rng.uniform(3, 40)
+        expected = sorted(
+            haversine_m(lon, lat, *r.start) / 1000
+            for r in routes
+            if r.surface_type == "park" and abs(r.distance_km - distance) <= 2
+        )
+        expected = [d for d in expected if d <= 30][:5]
+
+        result = index.nearest(lon, lat, "park", distance, 2, limit=5)
+
+        assert [round(d, 9) for d, _ in result] == [round(d, 9) for d in expected]
+        assert all(r.surface_type == "park" for _, r in result)
+
+
+def test_routes_without_start_are_skipped():
+    routes = [
+        _route(1, "park", 5, 37.6, 55.75),
+        Route("r2", "Москва", "Без точки", 5, "park", "", []),
+    ]
+    index = SpatialIndex(routes)
+
+    assert len(index) == 1
+    assert [r.id for _, r in index.nearest(37.6, 55.75, "park", 5, 1)] == ["r1"]
+    assert index.nearest(37.6, 55.75, "trail", 5, 1) == []
+
+
+def test_route_start_read_from_catalog():
+    route = Route.from_dict(
+        {
+            "id": "x",
+            "city": "Москва",
+            "name": "x",
+            "distance_km": 5,
+            "surface_type": "park",
+            "description": "",
+            "start": [37.6, 55.7],
+        }
+    )
+
+    assert route.start == (37.6, 55.7)
+
+
+@pytest.mark.asyncio
+async def test_location_search_returns_nearest_catalog_routes(monkeypatch):
+    """Геопозиция → дистанция → поверхность: ближайшие маршруты с расстоянием до старта."""
+    service = RouteService()
+    monkeypatch.setattr("handlers.search.get_route_service", lambda: service)
+    context = MagicMock()
+    context.user_data = {}
+
+    update = MagicMock()
+    update.message.location.longitude = 37.60
+    update.message.location.latitude = 55.73
+    update.message.reply_text = AsyncMock()
+    assert await location_handler(update, context) == DISTANCE
+
+    context.user_data["search_distance"] = 7.0
+    update.callback_query.data = "surface:park"
+    update.callback_query.answer = AsyncMock()
+    update.callback_query.edit_message_text = AsyncMock()
+    await surface_callback(update, context)
+
+    text = update.callback_query.edit_message_text.call_args.args[0]
+    assert "рядом с вами" in text
+    assert "Парк Горького" in text and "км от вас" in text
+    assert context.user_data == {}
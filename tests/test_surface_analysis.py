@@ -0,0 +1,113 @@
+"""
+Тесты анализа extras маршрутов ORS.
+"""
+
+import random
+
+import pytest
+
+from services.surface_analysis import ORS_SURFACE_ID_TO_PRODUCT, analyze_extras, surface_shares
+
+
+def _legacy_parse_surface(route: dict) -> dict[str, float]:
+    """parse_surface_from_route до векторизации — эталон для сравнения."""
+    values = route.get("extras", {}).get("surface", {}).get("values", [])
+    if not values:
+        return {"asphalt": 1.0}
+    total_length = 0
+    product_lengths: dict[str, float] = {}
+    for seg in values:
+        if len(seg) >= 2:
+            total_length += seg[1] - seg[0]
+    if total_length <= 0:
+        return {"asphalt": 1.0}
+    for seg in values:
+        if len(seg) < 3:
+            continue
+        start, end, surface_id = seg[0], seg[1], seg[2]
+        length = end - start
+        product = ORS_SURFACE_ID_TO_PRODUCT.get(
+            surface_id if isinstance(surface_id, int) else 0, "asphalt"
+        )
+        product_lengths[product] = product_lengths.get(product, 0) + length
+    return {k: v / total_length for k, v in product_lengths.items()}
+
+
+def _random_route(rng: random.Random, segments: int) -> dict:
+    values, position = [], 0
+    for _ in range(segments):
+        step = rng.randint(1, 40)
+        values.append([position, position + step, rng.choice([0, 1, 3, 5, 11, 12, 14, 17, 25, -1])])
+        position += step
+    return {"extras": {"surface": {"values": values}}}
+
+
+def _assert_same_shares(actual: dict, expected: dict) -> None:
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        assert actual[key] == pytest.approx(value)
+
+
+def test_surface_shares_match_legacy():
+    rng = random.Random(7)
+    routes = [_random_route(rng, rng.choice([1, 5, 300, 2000])) for _ in range(20)]
+    routes += [
+        {},
+        {"extras": {"surface": {"values": []}}},
+        {"extras": {"surface": {"values": [[0, 0, 3], [5, 5, 12]]}}},
+        {"extras": {"surface": {"values": [[0, 10, "x"], [10, 30, 12]]}}},
+        {"extras": {"surface": {"values": [[0, 10], [10, 30, 17]]}}},
+    ]
+
+    for actual, route in zip(surface_shares(routes), routes):
+        _assert_same_shares(actual, _legacy_parse_surface(route))
+
+
+def test_analyze_extras_waytype_and_steepness():
+    segments = 100
+    route = {
+        "extras": {
+            "surface": {"values": [[i, i + 1, 3] for i in range(segments)]},
+            "waytype": {"values": [[i, i + 1, 3 if i < 75 else 4] for i in range(segments)]},
+            "steepness": {"values": [[i, i + 1, -2 if i < 50 else 1] for i in range(segments)]},
+        }
+    }
+
+    result = analyze_extras([route, {}])
+
+    assert result[0]["surface"] == {"asphalt": 1.0}
+    assert result[0]["waytype"] == {3: 0.75, 4: 0.25}
+    assert result[0]["steepness"] == {-2: 0.5, 1: 0.5}
+    assert result[1] == {"surface": {"asphalt": 1.0}, "waytype": {}, "steepness": {}}
+
+
+def test_parse_surface_from_route_uses_analyser():
+    from services.openroute_service import OpenRouteService
+
+    route = _random_route(random.Random(3), 500)
+
+    shares = OpenRouteService(api_key="").parse_surface_from_route(route)
+
+    _assert_same_shares(shares, _legacy_parse_surface(route))
+
+
+def test_surface_shares_keep_legacy_mapping_for_non_int_ids():
+    """Дробные границы считаются как есть; ID не-int (12.0, "12", None) — асфальт, как раньше."""
+    rng = random.Random(11)
+    routes = []
+    for value_type in (int, float):
+        values, position = [], 0.0
+        for _ in range(200):
+            step = rng.choice([0.5, 10.5, 3, 7.25])
+            values.append([position, position + step, value_type(rng.choice([3, 12, 17]))])
+            position += step
+        routes.append({"extras": {"surface": {"values": values}}})
+    routes.append({"extras": {"surface": {"values": [[0, 10, 12.0], [10, 25, 12], [25, 30, None]]}}})
+    routes.append({"extras": {"surface": {"values": [[0, 10, "12"], [10, 30, 12], [30, 40]]}}})
+
+    shares = surface_shares(routes)
+
+    for actual, route in zip(shares, routes):
+        _assert_same_shares(actual, _legacy_parse_surface(route))
+    assert shares[1] == {"asphalt": 1.0}
+    assert shares[2] == {"asphalt": pytest.approx(0.5), "park": pytest.approx(0.5)}